@@ -13,4 +13,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "EcoCity2050_BE.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# 앱 로딩 이후에 import 해야 한다
+from city.services import prefill_name_pool  # noqa: E402
+from EcoCity2050_BE.db import warm_up  # noqa: E402
+from users.longpoll import KakaoSessionLongPollMiddleware  # noqa: E402
+
+# 요청의 DB 작업은 sync_to_async 스레드에서 돌므로 풀만 미리 연다
+warm_up(pool_only=True)
+prefill_name_pool()
+
+application = KakaoSessionLongPollMiddleware(django_application)
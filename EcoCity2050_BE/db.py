@@ -0,0 +1,35 @@
+"""DB 연결 워밍업
+
+wsgi.py/asgi.py가 앱을 만든 직후 부른다. 첫 요청이 연결(TLS 핸드셰이크 포함)을
+기다리지 않도록 DB_CONN_MODE에 맞춰 설정된 DB(복제본 포함)마다 미리 연결해 둔다.
+    pool: 풀을 열고 min_size개 연결이 준비될 때까지 기다린다
+    persistent: 부른 스레드의 연결을 연다 (gunicorn sync 워커는 요청도 이 스레드에서 처리)
+    none: 요청이 끝나면 닫히므로 하지 않는다
+"""
+import logging
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up(pool_only=False):
+    """pool_only: ASGI처럼 요청이 다른 스레드에서 DB를 쓰면 스레드 연결은 미리 열지 않는다"""
+    if not settings.DB_WARM_UP or settings.DB_CONN_MODE == "none":
+        return
+    for alias in settings.DATABASES:
+        _warm_up(alias, pool_only)
+
+
+def _warm_up(alias, pool_only):
+    connection = connections[alias]
+    try:
+        pool = getattr(connection, "pool", None)
+        if pool is not None:
+            pool.open(wait=True, timeout=settings.DB_POOL_TIMEOUT)
+        elif not pool_only:
+            connection.ensure_connection()
+    except Exception as e:  # DatabaseError, psycopg_pool.PoolTimeout 등
+        # DB가 아직 안 떠 있어도 워커는 뜨고, 첫 요청이 다시 연결을 시도한다
+        logger.warning("DB 연결 워밍업 실패 (%s): %r", alias, e)
@@ -0,0 +1,314 @@
+"""요청별 지연 / DB 쿼리 / 외부 HTTP 시간 계측
+
+InstrumentationMiddleware가 요청마다 RequestMetrics를 contextvar에 두면
+    - 모든 DB 연결에 건 execute_wrapper가 쿼리 수와 시간을,
+    - users.http_client와 도시 이름 생성이 record_outbound()로 외부 호출 시간을
+거기에 더한다. 끝나면 URL 이름별 통계에 합치고 Server-Timing 헤더를 붙인다.
+모은 값은 metrics/ (INTERNAL_IPS에서만)에서 Prometheus 텍스트 형식으로 본다.
+뷰에 쿼리 예산(query_budget.py)이 있으면 넘긴 요청을 경고 로그로 남긴다.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+from .query_budget import get_query_budget, is_transaction_statement
+
+logger = logging.getLogger(__name__)
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+UNMATCHED = "<unmatched>"
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """요청 하나에서 쓴 DB/외부 호출 횟수와 시간"""
+
+    __slots__ = ("queries", "db_time", "outbound", "outbound_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.outbound = 0
+        self.outbound_time = 0.0
+
+
+def current_metrics():
+    """현재 요청의 RequestMetrics (요청 밖이면 None)"""
+    return _current.get()
+
+
+def record_outbound(elapsed):
+    """외부 HTTP 호출 시간을 현재 요청에 더한다 (요청 밖, 예를 들어 백그라운드 스레드면 무시)"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.outbound += 1
+        metrics.outbound_time += elapsed
+
+
+def _execute_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if not is_transaction_statement(sql):
+            metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_db_hook(sender=None, connection=None, **kwargs):
+    # 연결 객체(스레드별)마다 한 번만 건다. async 뷰의 DB 호출은 sync_to_async가
+    # contextvar를 복사해 가므로 다른 스레드에서도 같은 요청으로 집계된다
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.buckets = [0] * (len(REQUEST_BUCKETS) + 1)  # 마지막 칸은 +Inf
+        self.statuses = Counter()
+        self.queries = 0
+        self.query_buckets = [0] * (len(QUERY_COUNT_BUCKETS) + 1)
+        self.db_time = 0.0
+        self.outbound = 0
+        self.outbound_time = 0.0
+        self.budget_exceeded = 0
+
+    def record(self, status, elapsed, metrics, over_budget):
+        self.count += 1
+        self.duration += elapsed
+        self.buckets[bisect.bisect_left(REQUEST_BUCKETS, elapsed)] += 1
+        self.statuses[status] += 1
+        self.queries += metrics.queries
+        self.query_buckets[bisect.bisect_left(QUERY_COUNT_BUCKETS, metrics.queries)] += 1
+        self.db_time += metrics.db_time
+        self.outbound += metrics.outbound
+        self.outbound_time += metrics.outbound_time
+        self.budget_exceeded += over_budget
+
+    def as_dict(self):
+        count = self.count or 1
+        return {
+            "count": self.count,
+            "avg_ms": round(self.duration / count * 1000, 2),
+            "queries_per_request": round(self.queries / count, 2),
+            "db_ms_per_request": round(self.db_time / count * 1000, 2),
+            "outbound_ms_per_request": round(self.outbound_time / count * 1000, 2),
+            "statuses": dict(self.statuses),
+            "budget_exceeded": self.budget_exceeded,
+        }
+
+
+_stats_lock = threading.Lock()
+_stats = {}  # URL 이름 -> EndpointStats
+
+
+def _record(endpoint, status, elapsed, metrics, over_budget=False):
+    with _stats_lock:
+        stats = _stats.get(endpoint)
+        if stats is None:
+            stats = _stats[endpoint] = EndpointStats()
+        stats.record(status, elapsed, metrics, over_budget)
+
+
+def get_stats():
+    """URL 이름별 요청 통계"""
+    with _stats_lock:
+        return {endpoint: stats.as_dict() for endpoint, stats in _stats.items()}
+
+
+def _over_budget(request, endpoint, metrics):
+    match = getattr(request, "resolver_match", None)
+    budget = get_query_budget(match.func) if match else None
+    if budget is None or metrics.queries <= budget:
+        return False
+    logger.warning("쿼리 예산 초과: %s 쿼리 %d개 (예산 %d개)", endpoint, metrics.queries, budget)
+    return True
+
+
+def _endpoint(request):
+    match = getattr(request, "resolver_match", None)
+    return (match.view_name if match else None) or UNMATCHED
+
+
+def _server_timing(elapsed, metrics):
+    return (
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries", '
+        f'http;dur={metrics.outbound_time * 1000:.1f};desc="{metrics.outbound} calls", '
+        f"total;dur={elapsed * 1000:.1f}"
+    )
+
+
+class InstrumentationMiddleware:
+    """MIDDLEWARE 맨 앞에 둔다 (다른 미들웨어의 쿼리까지 포함)"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = settings.METRICS_SERVER_TIMING
+        self.check_budget = settings.QUERY_BUDGET_LOG
+        connection_created.connect(install_db_hook, dispatch_uid="instrumentation_db_hook")
+        for connection in connections.all(initialized_only=True):
+            install_db_hook(connection=connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _finish(self, request, response, started, metrics):
+        elapsed = time.perf_counter() - started
+        endpoint = _endpoint(request)
+        over_budget = self.check_budget and _over_budget(request, endpoint, metrics)
+        _record(endpoint, response.status_code, elapsed, metrics, over_budget)
+        if self.server_timing:
+            response["Server-Timing"] = _server_timing(elapsed, metrics)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, started, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, started, metrics)
+
+
+# --- Prometheus 텍스트 형식 ---
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _header(lines, name, kind, help_text):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _histogram(lines, name, labels, bounds, buckets, total):
+    cumulative = 0
+    for bound, count in zip(bounds + (float("inf"),), buckets):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else repr(float(bound))
+        lines.append(f"{name}_bucket{_labels(**labels, le=le)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(**labels)} {total}")
+    lines.append(f"{name}_count{_labels(**labels)} {cumulative}")
+
+
+def _export_endpoints(lines):
+    # 엔드포인트 수만큼의 문자열 작업이라 잠금을 잡은 채로 만든다
+    with _stats_lock:
+        endpoints = sorted(_stats.items())
+
+        _header(lines, "ecocity_request_duration_seconds", "histogram", "요청 처리 시간")
+        for endpoint, stats in endpoints:
+            _histogram(
+                lines, "ecocity_request_duration_seconds", {"endpoint": endpoint},
+                REQUEST_BUCKETS, stats.buckets, stats.duration,
+            )
+
+        _header(lines, "ecocity_requests_total", "counter", "응답 상태 코드별 요청 수")
+        for endpoint, stats in endpoints:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(f"ecocity_requests_total{_labels(endpoint=endpoint, status=status)} {count}")
+
+        _header(lines, "ecocity_request_db_queries", "histogram", "요청당 DB 쿼리 수")
+        for endpoint, stats in endpoints:
+            _histogram(
+                lines, "ecocity_request_db_queries", {"endpoint": endpoint},
+                QUERY_COUNT_BUCKETS, stats.query_buckets, stats.queries,
+            )
+
+        _header(lines, "ecocity_query_budget_exceeded_total", "counter", "쿼리 예산을 넘긴 요청 수")
+        for endpoint, stats in endpoints:
+            lines.append(f"ecocity_query_budget_exceeded_total{_labels(endpoint=endpoint)} {stats.budget_exceeded}")
+
+        _header(lines, "ecocity_request_db_seconds_total", "counter", "DB 쿼리 실행 시간 합")
+        for endpoint, stats in endpoints:
+            lines.append(f"ecocity_request_db_seconds_total{_labels(endpoint=endpoint)} {stats.db_time}")
+
+        _header(lines, "ecocity_request_outbound_calls_total", "counter", "요청 중 외부 HTTP 호출 수")
+        for endpoint, stats in endpoints:
+            lines.append(f"ecocity_request_outbound_calls_total{_labels(endpoint=endpoint)} {stats.outbound}")
+
+        _header(lines, "ecocity_request_outbound_seconds_total", "counter", "요청 중 외부 HTTP 호출 시간 합")
+        for endpoint, stats in endpoints:
+            lines.append(f"ecocity_request_outbound_seconds_total{_labels(endpoint=endpoint)} {stats.outbound_time}")
+
+
+def _export_outbound_hosts(lines):
+    from users.http_client import LATENCY_BUCKETS, get_stats as outbound_stats
+
+    hosts = outbound_stats()
+    _header(lines, "ecocity_outbound_duration_seconds", "histogram", "외부 호스트별 HTTP 응답 시간")
+    for host, stats in sorted(hosts.items()):
+        _histogram(
+            lines, "ecocity_outbound_duration_seconds", {"host": host},
+            LATENCY_BUCKETS, list(stats["buckets"].values()), stats["total_seconds"],
+        )
+    _header(lines, "ecocity_outbound_errors_total", "counter", "외부 호스트별 실패(5xx/연결 오류) 수")
+    for host, stats in sorted(hosts.items()):
+        lines.append(f"ecocity_outbound_errors_total{_labels(host=host)} {stats['errors']}")
+
+
+def _export_values(lines, name, help_text, values):
+    _header(lines, name, "untyped", help_text)
+    for key, value in sorted(values.items()):
+        if isinstance(value, (int, float)):
+            lines.append(f"{name}{_labels(key=key)} {value}")
+
+
+def render_prometheus():
+    from city.services import get_stats as city_name_stats
+
+    lines = []
+    _export_endpoints(lines)
+    _export_outbound_hosts(lines)
+    _export_values(lines, "ecocity_city_name", "도시 이름 생성 카운터 (city.services.get_stats)", city_name_stats())
+    if settings.JWT_BLACKLIST_FILTER:
+        from users.blacklist import get_blacklist_filter
+
+        _export_values(
+            lines, "ecocity_jwt_blacklist", "JWT 블랙리스트 확인 카운터 (users.blacklist)",
+            get_blacklist_filter().get_stats(),
+        )
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """Prometheus 스크랩용. INTERNAL_IPS 밖에서는 없는 URL처럼 404"""
+    if request.META.get("REMOTE_ADDR") not in settings.INTERNAL_IPS:
+        raise Http404
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
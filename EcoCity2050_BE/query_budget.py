@@ -0,0 +1,66 @@
+"""뷰별 DB 쿼리 예산
+
+    @query_budget(1)
+    @api_view(["GET"])
+    def load_game_data(request): ...
+
+    class UserDetailView(generics.RetrieveAPIView):
+        query_budget = 0
+
+예산은 요청 하나(미들웨어 포함)에서 실행하는 쿼리 수의 상한이다 (BEGIN/COMMIT/SAVEPOINT 제외).
+운영에서는 InstrumentationMiddleware가 넘긴 요청을 로그와 metrics/로 남기고,
+테스트에서는 QueryBudgetTestMixin.assertWithinQueryBudget()으로 막는다.
+응답을 스트리밍하는 뷰는 응답을 돌려준 뒤에 쿼리가 실행되므로 예산을 달지 않는다.
+"""
+from urllib.parse import urlsplit
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.urls import resolve
+
+TRANSACTION_STATEMENTS = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE SAVEPOINT")
+
+
+def is_transaction_statement(sql):
+    return sql.lstrip()[:17].upper().startswith(TRANSACTION_STATEMENTS)
+
+
+def query_budget(limit):
+    """뷰 함수에 쿼리 예산을 단다 (api_view 같은 다른 데코레이터보다 바깥에)"""
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def get_query_budget(view_func):
+    """URL에 연결된 뷰 함수의 쿼리 예산. 없으면 None"""
+    budget = getattr(view_func, "query_budget", None)
+    if budget is None:
+        # 클래스 기반 뷰는 as_view()가 만든 함수에 view_class가 붙어 있다
+        budget = getattr(getattr(view_func, "view_class", None), "query_budget", None)
+    return budget
+
+
+class QueryBudgetTestMixin:
+    """TestCase에 섞어 쓰는 예산 검사
+
+        response = self.assertWithinQueryBudget(self.client.get, "/load-game/", {"userId": "1"})
+    """
+
+    def assertWithinQueryBudget(self, send, path, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+        from django.test.utils import CaptureQueriesContext
+
+        budget = get_query_budget(resolve(urlsplit(path).path).func)
+        if budget is None:
+            self.fail(f"{path} 뷰에 쿼리 예산(@query_budget)이 없습니다.")
+
+        with CaptureQueriesContext(connections[using]) as context:
+            response = send(path, *args, **kwargs)
+
+        queries = [query["sql"] for query in context.captured_queries if not is_transaction_statement(query["sql"])]
+        if len(queries) > budget:
+            self.fail(
+                f"{path}: 쿼리 {len(queries)}개로 예산 {budget}개를 넘었습니다.\n"
+                + "\n".join(f"  {index}. {sql}" for index, sql in enumerate(queries, 1))
+            )
+        return response
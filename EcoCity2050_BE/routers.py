@@ -0,0 +1,90 @@
+"""읽기 전용 복제본 라우팅
+
+replica_reads(함수 뷰)나 ReplicaReadMixin(클래스 뷰)을 붙인 뷰 안의 읽기만
+'replica' DB(DB_REPLICA_HOST)로 보내고, 그 밖의 읽기와 모든 쓰기는 primary('default')로 간다.
+
+저장 직후 DB_REPLICA_STICKY_SECONDS 동안은 복제 지연으로 이전 데이터를 읽지 않도록
+같은 사용자의 읽기도 primary에서 한다 (read-your-writes). pin_to_primary()가
+    - 저장 응답에 쿠키를 붙이고 (같은 클라이언트)
+    - 캐시에 사용자별 표시를 남긴다 (userId로 읽는 다른 기기/워커, 공유 캐시일 때)
+"""
+import contextvars
+import functools
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = "replica"
+STICKY_COOKIE = "primaryPin"
+STICKY_PARAM = "userId"  # load-game/check-saved-data가 사용자를 받는 쿼리 파라미터
+
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+
+def replica_enabled():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def _sticky_key(user_id):
+    return f"replica_sticky:v1:{user_id}"
+
+
+def pin_to_primary(user_ids, response=None):
+    """방금 저장한 사용자의 읽기를 잠시 primary로 고정한다"""
+    if not replica_enabled():
+        return
+    window = settings.DB_REPLICA_STICKY_SECONDS
+    cache.set_many({_sticky_key(user_id): True for user_id in user_ids}, window)
+    if response is not None:
+        secure_cookie = not getattr(settings, "DEBUG", False)
+        response.set_cookie(STICKY_COOKIE, "1", max_age=window, httponly=True, secure=secure_cookie, samesite="None")
+
+
+def _alias_for(request):
+    """이 요청의 읽기를 보낼 DB. 복제본이 없거나 고정 중이면 None (primary)"""
+    if not replica_enabled() or request.COOKIES.get(STICKY_COOKIE):
+        return None
+    user_id = request.GET.get(STICKY_PARAM)
+    if user_id and cache.get(_sticky_key(user_id)) is not None:
+        return None
+    return REPLICA_DB_ALIAS
+
+
+def replica_reads(view):
+    """함수 뷰 데코레이터: 뷰 안의 읽기를 복제본으로 보낸다"""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = _read_alias.set(_alias_for(request))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """클래스 뷰용 replica_reads (뷰 클래스의 가장 앞에 섞는다)"""
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _read_alias.set(_alias_for(request))
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 복제본은 primary와 같은 데이터다
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # 복제본 스키마는 복제로 따라온다
+        return db != REPLICA_DB_ALIAS
@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 from datetime import timedelta
-from decouple import config
+from decouple import Choices, Csv, config
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "EcoCity2050_BE.instrumentation.InstrumentationMiddleware",  # 요청별 지연/쿼리/외부 호출 계측 (맨 앞)
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -72,6 +73,11 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "EcoCity2050_BE.urls"
 
+# 계측 (EcoCity2050_BE/instrumentation.py). metrics/는 INTERNAL_IPS에서만 열린다
+INTERNAL_IPS = config('INTERNAL_IPS', default='127.0.0.1', cast=Csv())
+METRICS_SERVER_TIMING = config('METRICS_SERVER_TIMING', default=True, cast=bool)  # Server-Timing 응답 헤더
+QUERY_BUDGET_LOG = config('QUERY_BUDGET_LOG', default=True, cast=bool)  # 뷰 쿼리 예산(@query_budget) 초과 시 경고 로그
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -108,6 +114,68 @@ DATABASES = {
     }
 }
 
+# DB 연결 방식 (배포 환경별로 고른다)
+#   pool: psycopg 3 연결 풀 (OPTIONS['pool']). 프로세스 안 스레드/ASGI 요청이 연결을 빌려 쓰고 돌려준다
+#   persistent: 스레드마다 연결을 DB_CONN_MAX_AGE초 유지하고 요청 시작 때 상태를 확인한다 (gunicorn sync 워커)
+#   none: 요청마다 새로 연결 (예전 동작, 외부 풀러(PgBouncer)를 쓸 때)
+DB_CONN_MODE = config('DB_CONN_MODE', default='persistent', cast=Choices(['pool', 'persistent', 'none']))
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)  # 초, persistent에서만
+DB_POOL_MIN_SIZE = config('DB_POOL_MIN_SIZE', default=2, cast=int)  # 워커마다 열어 두는 연결 수
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=float)  # 빈 연결을 기다리는 최대 시간 (초)
+DB_POOL_MAX_IDLE = config('DB_POOL_MAX_IDLE', default=300, cast=float)  # min_size를 넘는 유휴 연결을 닫는 시간 (초)
+DB_POOL_MAX_LIFETIME = config('DB_POOL_MAX_LIFETIME', default=1800, cast=float)  # 연결 교체 주기 (초)
+# 워커 시작 때 연결(풀)을 미리 연다 (EcoCity2050_BE/db.py). gunicorn --preload면 꺼야 한다 (fork 전에 연결됨)
+DB_WARM_UP = config('DB_WARM_UP', default=True, cast=bool)
+
+if DB_CONN_MODE == 'pool':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+            'max_idle': DB_POOL_MAX_IDLE,
+            'max_lifetime': DB_POOL_MAX_LIFETIME,
+        },
+    }
+    # Django가 풀에 check=ConnectionPool.check_connection을 넘긴다 (빌려주기 전에 끊긴 연결을 걸러냄).
+    # OPTIONS['pool']에 check를 또 넣으면 풀을 만들 때 TypeError가 난다
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_CONN_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# 읽기 전용 복제본 (EcoCity2050_BE/routers.py). 비어 있으면 모든 읽기가 primary로 간다
+# load-game, check-saved-data, users/profile의 읽기만 복제본에서 하고, 저장 직후에는 primary로 고정
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+DB_REPLICA_STICKY_SECONDS = config('DB_REPLICA_STICKY_SECONDS', default=10, cast=int)  # 복제 지연보다 길게 (초)
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),  # 풀은 alias별로 따로 생긴다
+        'TEST': {'MIRROR': 'default'},  # 테스트에서는 primary 테스트 DB를 같이 쓴다
+    }
+DATABASE_ROUTERS = ['EcoCity2050_BE.routers.ReplicaRouter']
+
+
+# Cache -> 기본은 프로세스 로컬 메모리, 워커가 여러 개면 Redis 사용
+# 예) CACHE_BACKEND=django.core.cache.backends.redis.RedisCache, CACHE_LOCATION=redis://127.0.0.1:6379/0
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ecocity2050'),
+    }
+}
+# 워커끼리 공유되지 않는 캐시인지 (SAVEGAME_CACHE_TTL, JWT_BLACKLIST_FILTER 기본값에 사용)
+CACHE_IS_LOCAL = CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -165,6 +233,8 @@ ACCOUNT_USER_MODEL_EMAIL_FIELD = "email"
 
 # REST Framework + JWT 설정
 REST_FRAMEWORK = {
+    # 요청마다 사용자 행을 읽어 삭제/비활성 사용자를 거절한다.
+    # 자주 불리는 뷰만 authentication_classes에 ClaimsJWTAuthentication(DB 조회 없음)을 지정
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
@@ -195,7 +265,9 @@ SIMPLE_JWT = {
 
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
-    'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    'TOKEN_USER_CLASS': 'users.authentication.ClaimsUser',
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.UserClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.UserClaimsTokenRefreshSerializer',
 
     'JTI_CLAIM': 'jti',
 
@@ -204,6 +276,81 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# refresh 토큰 블랙리스트 확인 앞단 (users/blacklist.py). 워커가 여러 개면 JWT_BLACKLIST_CACHE가 공유 캐시여야 함
+# 로컬 캐시에서는 다른 워커가 폐기한 토큰을 필터를 다시 만들 때까지 통과시키므로 기본으로 끈다
+JWT_BLACKLIST_FILTER = config('JWT_BLACKLIST_FILTER', default=not CACHE_IS_LOCAL, cast=bool)
+JWT_BLACKLIST_BLOOM_REBUILD = config('JWT_BLACKLIST_BLOOM_REBUILD', default=60, cast=int)  # 블룸 필터 재생성 주기 (초)
+JWT_BLACKLIST_CACHE = config('JWT_BLACKLIST_CACHE', default='default')
+JWT_PURGE_BATCH = config('JWT_PURGE_BATCH', default=1000, cast=int)  # purge_jwt_tokens 한 번에 지울 토큰 수
+
+# OpenAI (도시 이름 생성)
+OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default='')  # OpenAI 호환 서버(테스트용 가짜 서버 등) 주소
+CITY_NAME_MODEL = config('CITY_NAME_MODEL', default='gpt-4o-mini')
+CITY_NAME_CACHE_SIZE = config('CITY_NAME_CACHE_SIZE', default=2048, cast=int)
+CITY_NAME_CACHE_TTL = config('CITY_NAME_CACHE_TTL', default=3600, cast=int)  # 초
+# True면 name-city를 async 뷰로 처리한다 (uvicorn 등 ASGI로 배포할 때 사용). WSGI에서는 False로 둔다
+CITY_NAME_ASYNC = config('CITY_NAME_ASYNC', default=False, cast=bool)
+# 실시간 생성 마감 시간과 차단기 (넘기면 로컬 생성 이름으로 대체)
+CITY_NAME_DEADLINE = config('CITY_NAME_DEADLINE', default=4.0, cast=float)  # 초
+CITY_NAME_BREAKER_FAILURES = config('CITY_NAME_BREAKER_FAILURES', default=5, cast=int)  # 연속 실패 횟수
+CITY_NAME_BREAKER_RECOVERY = config('CITY_NAME_BREAKER_RECOVERY', default=30.0, cast=float)  # 초
+CITY_NAME_BREAKER_SLOW_CALL = config('CITY_NAME_BREAKER_SLOW_CALL', default=3.0, cast=float)  # 이 이상 걸리면 실패로 간주
+# 미리 생성해 두는 이름 풀 (백그라운드 스레드에서 배치로 채움)
+CITY_NAME_POOL_ENABLED = config('CITY_NAME_POOL_ENABLED', default=True, cast=bool)
+# 워커 시작 때 모든 구간(city.services.pool_keys(), 50개)을 배치 요청으로 채운다.
+# gunicorn --preload면 꺼야 한다 (fork 전에 만든 채우기 스레드는 자식 프로세스에 없다)
+CITY_NAME_POOL_PREFILL = config('CITY_NAME_POOL_PREFILL', default=True, cast=bool)
+CITY_NAME_POOL_BATCH_SIZE = config('CITY_NAME_POOL_BATCH_SIZE', default=8, cast=int)
+CITY_NAME_POOL_LOW_WATERMARK = config('CITY_NAME_POOL_LOW_WATERMARK', default=2, cast=int)
+CITY_NAME_POOL_MAX_KEYS = config('CITY_NAME_POOL_MAX_KEYS', default=512, cast=int)
+CITY_NAME_POOL_WORKERS = config('CITY_NAME_POOL_WORKERS', default=2, cast=int)
+# 비어 있는 구간은 실시간 생성 뒤 다시 채운다. 업스트림 장애 중에 계속 부르지 않도록 구간마다 이 간격(초)에 한 번만
+CITY_NAME_POOL_EMPTY_REFILL_INTERVAL = config('CITY_NAME_POOL_EMPTY_REFILL_INTERVAL', default=30.0, cast=float)
+
+# 게임 저장 이력 (키프레임 사이에는 달라진 필드만 저장)
+SAVEGAME_KEYFRAME_INTERVAL = config('SAVEGAME_KEYFRAME_INTERVAL', default=20, cast=int)
+# load-game/check-saved-data read-through 캐시 (초, 0이면 쓰지 않음). save-game은 처리한 워커의 캐시만 갱신하므로
+# 워커가 여러 개면 CACHE_BACKEND가 Redis/Memcached 같은 공유 캐시여야 한다. 프로세스 로컬 캐시면 다른 워커가
+# 이전 저장을 돌려줘 409 충돌이 나므로 기본으로 끈다
+SAVEGAME_CACHE_TTL = config('SAVEGAME_CACHE_TTL', default=0 if CACHE_IS_LOCAL else 600, cast=int)
+SAVEGAME_HISTORY_KEEP = config('SAVEGAME_HISTORY_KEEP', default=100, cast=int)  # compact_game_history 기본 보존 개수
+# 바이너리 저장 포맷(savegame/binary.py)의 태그 사전. 클라이언트와 같은 순서여야 하며, 없으면 태그를 문자열로 보낸다
+SAVEGAME_BINARY_TAG_DICTIONARY = config('SAVEGAME_BINARY_TAG_DICTIONARY', default='', cast=Csv(post_process=tuple))
+SAVEGAME_BULK_MAX_ITEMS = config('SAVEGAME_BULK_MAX_ITEMS', default=1000, cast=int)  # save-game/bulk, load-game/bulk 한 번에 처리할 개수
+
+# Unity 카카오 로그인 롱폴링 (ASGI 배포에서만 동작)
+# 완료 알림은 콜백을 처리한 워커에서 나가므로, 워커가 여러 개면 모든 워커에 전달되는 PostgresSessionNotifier여야 한다
+# (LocalSessionNotifier는 같은 프로세스의 대기만 깨운다. 다른 워커에서 대기 중인 요청은 wait초를 다 채운다)
+KAKAO_SESSION_NOTIFIER = config(
+    'KAKAO_SESSION_NOTIFIER',
+    default='users.notifications.PostgresSessionNotifier'
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+    else 'users.notifications.LocalSessionNotifier',
+)
+KAKAO_SESSION_LONGPOLL_MAX_WAIT = config('KAKAO_SESSION_LONGPOLL_MAX_WAIT', default=30, cast=int)
+KAKAO_SESSION_TTL = config('KAKAO_SESSION_TTL', default=600, cast=int)  # Unity 로그인 세션 유효 시간 (초)
+KAKAO_APP_CACHE_TTL = config('KAKAO_APP_CACHE_TTL', default=300, cast=int)  # 카카오 SocialApp 설정 프로세스 캐시 (초)
+KAKAO_AUTH_URL = config('KAKAO_AUTH_URL', default='https://kauth.kakao.com')
+KAKAO_API_URL = config('KAKAO_API_URL', default='https://kapi.kakao.com')
+# True면 카카오 콜백을 async 뷰로 처리한다 (uvicorn 등 ASGI로 배포할 때 사용)
+KAKAO_CALLBACK_ASYNC = config('KAKAO_CALLBACK_ASYNC', default=False, cast=bool)
+
+# 외부 제공자 호출용 공용 HTTP 클라이언트 (users/http_client.py)
+OUTBOUND_HTTP_TIMEOUT = config('OUTBOUND_HTTP_TIMEOUT', default=10, cast=float)  # 초
+OUTBOUND_HTTP_POOL_HOSTS = config('OUTBOUND_HTTP_POOL_HOSTS', default=10, cast=int)  # 연결 풀을 둘 호스트 수
+OUTBOUND_HTTP_POOL_SIZE = config('OUTBOUND_HTTP_POOL_SIZE', default=20, cast=int)  # 호스트당 유지할 연결 수
+OUTBOUND_HTTP_ASYNC_MAX_CONNECTIONS = config('OUTBOUND_HTTP_ASYNC_MAX_CONNECTIONS', default=200, cast=int)  # async 클라이언트 동시 연결 상한
+OUTBOUND_HTTP_RETRIES = config('OUTBOUND_HTTP_RETRIES', default=2, cast=int)
+OUTBOUND_HTTP_BACKOFF = config('OUTBOUND_HTTP_BACKOFF', default=0.2, cast=float)  # 재시도 백오프 기준/지터 (초)
+# Unity 로그인 세션 저장소. users.session_store.CacheSessionStore를 쓰면 로그인 중 DB를 쓰지 않는다
+# (워커가 여러 개면 KAKAO_SESSION_CACHE가 Redis 같은 공유 캐시여야 함)
+KAKAO_SESSION_STORE = config('KAKAO_SESSION_STORE', default='users.session_store.ORMSessionStore')
+KAKAO_SESSION_CACHE = config('KAKAO_SESSION_CACHE', default='default')
+# 만료 세션 정리 주기 (초). 0이면 프로세스 내 정리를 하지 않는다 (sweep_kakao_sessions 명령을 cron으로 실행)
+KAKAO_SESSION_SWEEP_INTERVAL = config('KAKAO_SESSION_SWEEP_INTERVAL', default=0, cast=int)
+KAKAO_SESSION_SWEEP_BATCH = config('KAKAO_SESSION_SWEEP_BATCH', default=1000, cast=int)
+
 # CORS 설정
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:8000",
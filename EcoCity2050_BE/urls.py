@@ -4,7 +4,9 @@ from django.views.generic import TemplateView
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
-from users.views import KakaoCallbackView
+from users.views import kakao_callback
+
+from .instrumentation import metrics_view
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -18,9 +20,11 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    # Prometheus 스크랩 (INTERNAL_IPS만)
+    path("metrics/", metrics_view, name="metrics"),
     path("users/", include("users.urls")),
     # 카카오 콜백 전용 (카카오가 실제로 호출하는 URL)
-    path('accounts/kakao/login/callback/', KakaoCallbackView.as_view(), name='kakao_callback'),
+    path('accounts/kakao/login/callback/', kakao_callback, name='kakao_callback'),
 
     # Swagger & ReDoc
     path(r"swagger(<format>\.json|\.yaml)", schema_view.without_ui(cache_timeout=0), name="schema-json"),
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "EcoCity2050_BE.settings")
 
 application = get_wsgi_application()
+
+# 앱 로딩 이후에 import 해야 한다
+from city.services import prefill_name_pool  # noqa: E402
+from EcoCity2050_BE.db import warm_up  # noqa: E402
+
+warm_up()
+prefill_name_pool()
@@ -0,0 +1,69 @@
+"""DB 연결 방식(DB_CONN_MODE)별 요청 지연 비교
+
+설정은 프로세스 시작 때 한 번 읽으므로 모드마다 benchmarks/endpoints.py를 새 프로세스로
+실행하고, 매 요청 DB를 쓰는 시나리오(save-game, game-history)의 결과를 나란히 보여준다.
+연결 비용(TLS 핸드셰이크 포함)은 원격 DB에서 커지므로 운영과 같은 DB 호스트로 잰다.
+
+    DB_HOST=db.example.com python benchmarks/db_connections.py --requests 500 --concurrency 8 --output db.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+MODES = ("none", "persistent", "pool")
+SCENARIOS = ("save-game", "game-history")
+
+
+def run_mode(mode, args, output):
+    command = [
+        sys.executable, os.path.join(HERE, "endpoints.py"),
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--output", output,
+    ]
+    for scenario in SCENARIOS:
+        command += ["--scenario", scenario]
+    if args.settings:
+        command += ["--settings", args.settings]
+    subprocess.run(command, env={**os.environ, "DB_CONN_MODE": mode}, check=True, stdout=subprocess.DEVNULL)
+    with open(output, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", action="append", choices=MODES, help="비교할 모드 (기본 전부)")
+    parser.add_argument("--requests", type=int, default=300, help="시나리오별 측정 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시에 요청을 보내는 스레드 수")
+    parser.add_argument("--settings", help="DJANGO_SETTINGS_MODULE (기본 EcoCity2050_BE.settings)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    reports = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in args.mode or MODES:
+            print(f"{mode} 측정 중...", file=sys.stderr)
+            reports[mode] = run_mode(mode, args, os.path.join(workdir, f"{mode}.json"))
+
+    print(f"{'scenario':<16}{'mode':<12}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'err':>5}")
+    for scenario in SCENARIOS:
+        for mode, report in reports.items():
+            row = next(row for row in report["results"] if row["scenario"] == scenario)
+            latency = row["latency_ms"]
+            print(
+                f"{scenario:<16}{mode:<12}{row['throughput_rps']:>9.1f}{latency['p50']:>9.2f}"
+                f"{latency['p95']:>9.2f}{latency['p99']:>9.2f}{row['errors']:>5}"
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,449 @@
+"""공개 엔드포인트 부하/지연 벤치마크
+
+가짜 업스트림(benchmarks/fakes.py)을 띄우고 test_ 데이터베이스를 만든 뒤
+시나리오마다 요청을 동시에 보내 처리량, p50/p95/p99 지연, 요청당 쿼리 수를 잰다.
+결과를 JSON으로 저장해 두면 커밋 사이 회귀를 --compare로 비교할 수 있다.
+
+    python benchmarks/endpoints.py --requests 500 --concurrency 8 --output before.json
+    python benchmarks/endpoints.py --requests 500 --concurrency 8 --output after.json --compare before.json
+    python benchmarks/endpoints.py --transport http --upstream-delay 0.1 --scenario unity-login
+
+--transport client는 Django 테스트 클라이언트(프로세스 안, 미들웨어 포함)로,
+http는 로컬 스레드 WSGI 서버에 실제 HTTP 요청을 보낸다.
+DB는 DJANGO_SETTINGS_MODULE 설정의 DB 서버에 테스트 DB를 만들어 쓰고 끝나면 지운다
+(SQLite는 동시 쓰기에서 database is locked가 나므로 save-game 수치는 Postgres에서 잰다).
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fakes import FakeKakaoServer, FakeOpenAIServer  # noqa: E402
+
+BASE_KAKAO_ID = 3_000_000_000
+TAGS = ("태양광", "풍력", "대중교통", "자전거", "숲", "재활용", "수소", "전기차")
+SATISFACTION = ("매우 불만", "불만", "보통", "만족", "매우 만족")
+# name-city는 지표 구간별로 캐시되므로 서로 다른 지표 조합 개수를 정해 둔다
+CITY_STATS_VARIANTS = 50
+
+Player = namedtuple("Player", ["kakao_id", "access"])
+
+
+# --- 요청 전송 ---
+
+class ClientTransport:
+    """Django 테스트 클라이언트 (스레드마다 하나)"""
+
+    def __init__(self):
+        from django.test import Client
+
+        self.client = Client()
+
+    @staticmethod
+    def _result(response):
+        try:
+            body = json.loads(response.content)
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+    def get(self, path, params=None, headers=None):
+        return self._result(self.client.get(path, params or {}, headers=headers))
+
+    def post(self, path, data, headers=None):
+        return self._result(
+            self.client.post(path, json.dumps(data), content_type="application/json", headers=headers)
+        )
+
+
+class HTTPTransport:
+    """로컬 WSGI 서버로 보내는 실제 HTTP 요청 (스레드마다 keep-alive 세션 하나)"""
+
+    def __init__(self, base_url):
+        import requests
+
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    @staticmethod
+    def _result(response):
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+    def get(self, path, params=None, headers=None):
+        return self._result(self.session.get(self.base_url + path, params=params, headers=headers, timeout=60))
+
+    def post(self, path, data, headers=None):
+        return self._result(self.session.post(self.base_url + path, json=data, headers=headers, timeout=60))
+
+
+def start_wsgi_server():
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def setup(self):
+            super().setup()
+            # 헤더/본문을 따로 쓰는 wsgiref + keep-alive에서 Nagle 때문에 생기는 40ms 지연 방지
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler, allow_reuse_address=True)
+    server.daemon_threads = True
+    server.set_app(WSGIHandler())
+    threading.Thread(target=server.serve_forever, name="bench-wsgi", daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+class QueryCounter:
+    """모든 스레드의 DB 연결에 거는 execute_wrapper (시나리오 사이에 reset)"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def reset(self):
+        with self._lock:
+            count, self.count = self.count, 0
+        return count
+
+
+# --- 시나리오 ---
+
+def game_state(n):
+    rng = random.Random(n)
+    return {
+        "co2Tons": round(rng.uniform(0, 5000), 2),
+        "citizenSatisfaction": rng.choice(SATISFACTION),
+        "budget": rng.randint(0, 1_000_000),
+        "topTags": rng.sample(TAGS, rng.randint(1, 4)),
+        "aiCityName": "솔빛시",
+    }
+
+
+def save_game(transport, player, n):
+    status, _ = transport.post("/save-game/", {"userId": player.kakao_id, **game_state(n)})
+    return status == 200
+
+
+def load_game(transport, player, n):
+    status, _ = transport.get("/load-game/", {"userId": player.kakao_id})
+    return status == 200
+
+
+def check_saved_data(transport, player, n):
+    status, _ = transport.get("/check-saved-data/", {"userId": player.kakao_id})
+    return status == 200
+
+
+def game_history(transport, player, n):
+    # 캐시를 거치지 않고 매번 DB를 읽는다 (연결 방식 비교용, db_connections.py)
+    status, _ = transport.get("/game-history/", {"userId": player.kakao_id, "limit": 10})
+    return status == 200
+
+
+def name_city(transport, player, n):
+    status, body = transport.post("/name-city/", game_state(n % CITY_STATS_VARIANTS))
+    return status == 200 and bool(body and body.get("cityName"))
+
+
+def profile(transport, player, n):
+    status, _ = transport.get("/users/profile/", headers={"Authorization": f"Bearer {player.access}"})
+    return status == 200
+
+
+def unity_login(transport, player, n):
+    """로그인 시작 -> 카카오 콜백 -> 세션 폴링 한 번을 요청 하나로 잰다"""
+    status, body = transport.get("/users/kakao/unity/login/")
+    if status != 200:
+        return False
+    state = body["state"]
+    status, _ = transport.get("/accounts/kakao/login/callback/", {"code": player.kakao_id, "state": state})
+    if status != 200:
+        return False
+    status, body = transport.get("/users/kakao/unity/session/", {"state": state})
+    return status == 200 and body.get("status") == "completed"
+
+
+SCENARIOS = {
+    "save-game": save_game,
+    "load-game": load_game,
+    "check-saved-data": check_saved_data,
+    "game-history": game_history,
+    "name-city": name_city,
+    "profile": profile,
+    "unity-login": unity_login,
+}
+
+
+# --- 실행/집계 ---
+
+def percentile(sorted_values, pct):
+    """nearest-rank 백분위수"""
+    index = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def seed(users):
+    """카카오 SocialApp, 사용자(저장 데이터 포함)를 만들고 Player 목록을 돌려준다"""
+    from allauth.socialaccount.models import SocialApp
+
+    from users.kakao import clear_kakao_app_cache, issue_tokens, upsert_kakao_user
+
+    SocialApp.objects.create(provider="kakao", name="kakao", client_id="bench", secret="bench")
+    clear_kakao_app_cache()
+
+    transport = ClientTransport()
+    players = []
+    for index in range(users):
+        kakao_id = str(BASE_KAKAO_ID + index)
+        user, _ = upsert_kakao_user(kakao_id, f"시민{index}")
+        _, access, _ = issue_tokens(user, "")
+        player = Player(kakao_id, access)
+        save_game(transport, player, index)
+        players.append(player)
+    return players
+
+
+def run_scenario(name, players, args, make_transport, counter, upstreams):
+    from django.db import connections
+
+    func = SCENARIOS[name]
+    concurrency = args.concurrency
+    lock = threading.Lock()
+    issued = [0]
+    latencies = []
+    errors = [0]
+
+    def worker(slot):
+        transport = make_transport()
+        # 스레드마다 다른 사용자를 써서 같은 행을 두고 경합하지 않게 한다
+        mine = players[slot::concurrency]
+        local, failed, n = [], 0, 0
+        try:
+            while True:
+                with lock:
+                    if issued[0] >= args.requests:
+                        break
+                    issued[0] += 1
+                started = time.perf_counter()
+                try:
+                    ok = func(transport, mine[n % len(mine)], n * concurrency + slot)
+                except Exception:
+                    ok = False
+                local.append(time.perf_counter() - started)
+                failed += not ok
+                n += 1
+        finally:
+            connections.close_all()
+            with lock:
+                latencies.extend(local)
+                errors[0] += failed
+
+    warmup = make_transport()
+    for n in range(args.warmup):
+        func(warmup, players[n % len(players)], n)
+
+    counter.reset()
+    upstream_before = sum(server.requests for server in upstreams)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(slot,)) for slot in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    queries = counter.reset()
+    upstream = sum(server.requests for server in upstreams) - upstream_before
+
+    latencies.sort()
+    count = len(latencies)
+    return {
+        "scenario": name,
+        "requests": count,
+        "errors": errors[0],
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "mean": round(sum(latencies) / count * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        },
+        "queries_per_request": round(queries / count, 2),
+        "upstream_per_request": round(upstream / count, 2),
+    }
+
+
+def metadata(args):
+    import django
+    from django.db import connection
+
+    def git(*command):
+        try:
+            return subprocess.run(
+                ["git", *command], cwd=ROOT, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "settings": os.environ["DJANGO_SETTINGS_MODULE"],
+        "transport": args.transport,
+        "concurrency": args.concurrency,
+        "users": args.users,
+        "upstream_delay": args.upstream_delay,
+    }
+
+
+def print_results(results):
+    print(
+        f"{'scenario':<18}{'req':>6}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}"
+        f"{'p99 ms':>9}{'q/req':>7}{'up/req':>7}"
+    )
+    for row in results:
+        latency = row["latency_ms"]
+        print(
+            f"{row['scenario']:<18}{row['requests']:>6}{row['errors']:>5}{row['throughput_rps']:>9.1f}"
+            f"{latency['p50']:>9.2f}{latency['p95']:>9.2f}{latency['p99']:>9.2f}"
+            f"{row['queries_per_request']:>7.2f}{row['upstream_per_request']:>7.2f}"
+        )
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {row["scenario"]: row for row in json.load(f)["results"]}
+
+    def change(new, old):
+        if not old:
+            return "     -"
+        return f"{(new - old) / old * 100:+6.1f}%"
+
+    print(f"\n{baseline_path} 대비 (지연은 낮을수록, req/s는 높을수록 좋음)")
+    print(f"{'scenario':<18}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>13}")
+    for row in results:
+        old = baseline.get(row["scenario"])
+        if old is None:
+            continue
+        print(
+            f"{row['scenario']:<18}{change(row['throughput_rps'], old['throughput_rps']):>9}"
+            + "".join(
+                f"{change(row['latency_ms'][key], old['latency_ms'][key]):>9}" for key in ("p50", "p95", "p99")
+            )
+            + f"{old['queries_per_request']:>6.2f}->{row['queries_per_request']:<6.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="실행할 시나리오 (여러 번 지정 가능, 기본 전부)")
+    parser.add_argument("--requests", type=int, default=300, help="시나리오별 측정 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시에 요청을 보내는 스레드 수")
+    parser.add_argument("--warmup", type=int, default=20, help="시나리오별 측정 전 요청 수")
+    parser.add_argument("--users", type=int, default=64, help="미리 만들어 둘 사용자 수")
+    parser.add_argument("--transport", choices=("client", "http"), default="client")
+    parser.add_argument("--upstream-delay", type=float, default=0.0, help="가짜 카카오/OpenAI 응답 지연 (초)")
+    parser.add_argument("--settings", help="DJANGO_SETTINGS_MODULE (기본 EcoCity2050_BE.settings)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+    args.users = max(args.users, args.concurrency)
+
+    kakao = FakeKakaoServer(delay=args.upstream_delay).start()
+    openai = FakeOpenAIServer(delay=args.upstream_delay).start()
+    # decouple은 환경 변수를 먼저 보므로 설정을 불러오기 전에 가짜 업스트림으로 돌린다
+    os.environ.update({
+        "KAKAO_AUTH_URL": kakao.url,
+        "KAKAO_API_URL": kakao.url,
+        "OPENAI_BASE_URL": openai.base_url,
+        "OPENAI_API_KEY": "fake",
+    })
+    if args.settings:
+        os.environ["DJANGO_SETTINGS_MODULE"] = args.settings
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "EcoCity2050_BE.settings")
+
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.db import connection, connections
+    from django.db.backends.signals import connection_created
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "127.0.0.1"]
+    if connection.vendor == "sqlite":
+        # 메모리 DB는 스레드/서버 간에 공유되지 않으므로 임시 파일을 쓴다
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(), "bench.sqlite3")
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    counter = QueryCounter()
+    connection_created.connect(counter.install, weak=False)
+    counter.install(connection=connection)
+    try:
+        players = seed(args.users)
+        # 운영 워커처럼(wsgi.py) 도시 이름 풀을 미리 채우고 잰다
+        from city.services import prefill_name_pool
+
+        prefill_name_pool(wait=True, timeout=120)
+        if args.transport == "http":
+            base_url = start_wsgi_server()
+            make_transport = lambda: HTTPTransport(base_url)  # noqa: E731
+        else:
+            make_transport = ClientTransport
+
+        results = []
+        for name in args.scenario or SCENARIOS:
+            results.append(run_scenario(name, players, args, make_transport, counter, (kakao, openai)))
+            print(f"{name}: {results[-1]['throughput_rps']} req/s", file=sys.stderr)
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    report = {"meta": metadata(args), "results": results}
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.output}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
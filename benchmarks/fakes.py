@@ -0,0 +1,172 @@
+"""로컬 가짜 업스트림 서버 (벤치마크/개발용)
+
+FakeKakaoServer는 카카오 OAuth의 토큰 교환(POST /oauth/token)과
+사용자 정보 조회(GET /v2/user/me)를 흉내 낸다. 인가 코드가 숫자면 그 값이
+카카오 회원번호가 되고, delay로 업스트림 지연을 줄 수 있다.
+인가 코드 "invalid"는 토큰 교환에서, "expired"는 사용자 정보 조회에서 실패한다.
+FakeOpenAIServer는 도시 이름 생성에 쓰는 chat completions(POST /v1/chat/completions)를 흉내 낸다.
+fail_status를 정하면 그 상태 코드로 실패한다 (업스트림 장애 흉내, 테스트용).
+
+    python benchmarks/fakes.py kakao --port 8901 --delay 0.2
+    KAKAO_AUTH_URL=http://127.0.0.1:8901 KAKAO_API_URL=http://127.0.0.1:8901 python manage.py runserver
+
+    python benchmarks/fakes.py openai --port 8902 --delay 0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8902/v1 OPENAI_API_KEY=fake python manage.py runserver
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import zlib
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+
+class FakeServer(ThreadingHTTPServer):
+    """스레드에서 돌아가는 가짜 서버. 요청 수와 받은 TCP 연결 수를 센다"""
+
+    daemon_threads = True
+    request_queue_size = 1024  # 동시 연결이 몰려도 listen backlog에서 끊기지 않게
+    handler = _Handler
+
+    def __init__(self, port=0, delay=0.0):
+        super().__init__(("127.0.0.1", port), self.handler)
+        self.delay = delay
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def handle_error(self, request, client_address):
+        # 타임아웃으로 클라이언트가 먼저 끊은 연결은 정상 상황이다
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name=type(self).__name__, daemon=True).start()
+        return self
+
+
+class _KakaoHandler(_Handler):
+    def do_POST(self):
+        self.server.count()
+        time.sleep(self.server.delay)
+        if self.path != "/oauth/token":
+            return self.send_json(404, {"error": "not found"})
+        form = parse_qs(self.read_body().decode("utf-8"))
+        code = form.get("code", [""])[0]
+        if not code or code == "invalid":
+            return self.send_json(400, {"error": "invalid_grant"})
+        self.send_json(200, {"access_token": f"fake-{code}", "token_type": "bearer", "expires_in": 21599})
+
+    def do_GET(self):
+        self.server.count()
+        time.sleep(self.server.delay)
+        if self.path != "/v2/user/me":
+            return self.send_json(404, {"error": "not found"})
+        token = self.headers.get("Authorization", "").removeprefix("Bearer fake-")
+        if token == "expired":
+            return self.send_json(401, {"msg": "this access token does not exist", "code": -401})
+        kakao_id = int(token) if token.isdigit() else 4_000_000_000 + abs(hash(token)) % 10**9
+        self.send_json(200, {
+            "id": kakao_id,
+            "kakao_account": {"profile": {"nickname": f"시민{kakao_id % 10000}"}},
+        })
+
+
+class FakeKakaoServer(FakeServer):
+    handler = _KakaoHandler
+
+
+class _OpenAIHandler(_Handler):
+    NAMES = ("푸른숲", "솔빛", "바람마루", "새온누리", "하늘빛골", "그린하랑", "맑은내", "초록별")
+
+    def do_POST(self):
+        self.server.count()
+        time.sleep(self.server.delay)
+        if self.path != "/v1/chat/completions":
+            return self.send_json(404, {"error": {"message": "not found"}})
+        body = json.loads(self.read_body() or b"{}")
+        if self.server.fail_status is not None:
+            return self.send_json(self.server.fail_status, {"error": {"message": "upstream unavailable"}})
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        # "도시 이름 n개를 한 줄에 하나씩" 요청이면 n줄, 아니면 한 개
+        match = re.search(r"(\d+)개를", prompt)
+        count = int(match.group(1)) if match else 1
+        seed = zlib.crc32(prompt.encode("utf-8"))
+        names = [f"{self.NAMES[(seed + i) % len(self.NAMES)]}{seed % 97 + i}" for i in range(count)]
+        self.send_json(200, {
+            "id": f"chatcmpl-{seed}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "\n".join(names)},
+            }],
+        })
+
+
+class FakeOpenAIServer(FakeServer):
+    handler = _OpenAIHandler
+    fail_status = None
+
+    @property
+    def base_url(self):
+        return f"{self.url}/v1"
+
+
+SERVERS = {"kakao": FakeKakaoServer, "openai": FakeOpenAIServer}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 업스트림 서버 실행")
+    parser.add_argument("server", choices=sorted(SERVERS))
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--delay", type=float, default=0.0, help="응답 지연 (초)")
+    args = parser.parse_args()
+
+    server = SERVERS[args.server](args.port, args.delay)
+    print(f"{args.server} fake server: {server.url} (delay {args.delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
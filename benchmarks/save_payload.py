@@ -0,0 +1,114 @@
+"""게임 저장 데이터 JSON vs 바이너리 포맷 벤치마크
+
+실제 save-game 요청/load-game 응답과 같은 모양의 데이터로 크기와
+DRF 파서/렌더러 기준 인코딩/디코딩 시간을 비교한다.
+
+    python benchmarks/save_payload.py --count 2000 --repeat 5
+"""
+import argparse
+import gzip
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TAGS = (
+    "태양광", "풍력", "대중교통", "자전거", "숲", "재활용", "수소", "스마트그리드",
+    "녹색건축", "전기차", "도시농업", "탄소포집", "제로웨이스트", "습지복원",
+)
+SATISFACTION = ("매우 불만", "불만", "보통", "만족", "매우 만족")
+CITY_NAMES = ("솔빛시", "푸른숲섬", "바람마루", "새온누리", "하늘빛골", "그린하랑시")
+
+
+def configure():
+    from django.conf import settings
+
+    if not settings.configured:
+        settings.configure(SAVEGAME_BINARY_TAG_DICTIONARY=TAGS)
+
+
+def make_payloads(count, seed=2050):
+    rng = random.Random(seed)
+    now = datetime(2025, 9, 1, tzinfo=timezone.utc)
+    saves, loads = [], []
+    for index in range(count):
+        state = {
+            "co2Tons": round(rng.uniform(0, 5000), 2),
+            "citizenSatisfaction": rng.choice(SATISFACTION),
+            "budget": rng.randint(0, 1_000_000),
+            "topTags": rng.sample(TAGS, rng.randint(1, 5)),
+            "aiCityName": rng.choice(CITY_NAMES),
+        }
+        version = rng.randint(1, 300)
+        saves.append({"userId": str(3_000_000_000 + index), "version": version, **state})
+        loads.append({
+            **state,
+            "version": version + 1,
+            "lastSaved": (now + timedelta(seconds=rng.randint(0, 10**7))).isoformat(),
+        })
+    return saves, loads
+
+
+def timed(func, items, repeat):
+    """repeat번 돌려 가장 빠른 회차의 건당 마이크로초"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - started)
+    return best / len(items) * 1e6
+
+
+def measure(name, render, parse, payloads, repeat):
+    encoded = [render(payload) for payload in payloads]
+    return {
+        "format": name,
+        "bytes": sum(map(len, encoded)) / len(encoded),
+        "gzip_bytes": sum(len(gzip.compress(body)) for body in encoded) / len(encoded),
+        "encode_us": timed(render, payloads, repeat),
+        "decode_us": timed(parse, encoded, repeat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=2000, help="페이로드 개수")
+    parser.add_argument("--repeat", type=int, default=5, help="반복 횟수 (가장 빠른 회차 사용)")
+    args = parser.parse_args()
+
+    configure()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from savegame.binary import BinarySaveParser, BinarySaveRenderer
+
+    json_renderer, json_parser = JSONRenderer(), JSONParser()
+    binary_renderer, binary_parser = BinarySaveRenderer(), BinarySaveParser()
+
+    saves, loads = make_payloads(args.count)
+    print(f"{'payload':<12}{'format':<8}{'bytes':>8}{'gzip':>8}{'encode µs':>12}{'decode µs':>12}")
+    for label, payloads in (("save 요청", saves), ("load 응답", loads)):
+        for name, renderer, parse in (
+            ("json", json_renderer, json_parser),
+            ("binary", binary_renderer, binary_parser),
+        ):
+            row = measure(
+                name,
+                renderer.render,
+                lambda body, parse=parse: parse.parse(io.BytesIO(body)),
+                payloads,
+                args.repeat,
+            )
+            print(
+                f"{label:<12}{row['format']:<8}{row['bytes']:>8.1f}{row['gzip_bytes']:>8.1f}"
+                f"{row['encode_us']:>12.2f}{row['decode_us']:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
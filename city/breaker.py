@@ -0,0 +1,65 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """연속 실패(느린 응답 포함)가 쌓이면 일정 시간 업스트림 호출을 막는다
+
+    closed: 정상 호출
+    open: recovery_timeout 동안 호출 차단
+    half_open: 복구 시간이 지난 뒤 시험 호출 하나만 허용, 성공하면 closed
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, recovery_timeout, slow_call_threshold):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._trips = 0
+
+    @property
+    def trips(self):
+        """open 상태로 전환된 횟수"""
+        return self._trips
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return self.CLOSED
+            if self._probing or time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self.OPEN
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if not self._probing and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self, elapsed=0.0):
+        if elapsed >= self.slow_call_threshold:
+            self.record_failure()
+            return
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self._trips += 1
+            self._probing = False
@@ -0,0 +1,21 @@
+import hashlib
+import random
+
+# 도시 이름에 어울리는 음절 (업스트림 장애 시 로컬 생성용)
+SYLLABLES = (
+    "가", "나", "다", "라", "마", "바", "사", "아", "하", "온",
+    "누", "리", "솔", "빛", "별", "숲", "늘", "담", "새", "해",
+    "푸", "른", "초", "록", "바", "람", "미", "르", "은", "결",
+    "한", "울", "보", "람", "다", "온", "그", "린", "하", "랑",
+)
+ENDINGS = ("시", "섬", "뜰", "터", "골", "빛", "숲", "마루")
+
+
+def generate_local_name(stats):
+    """지표/태그로 시드를 정해 항상 같은 2~4음절 이름을 만든다"""
+    seed = hashlib.sha256(repr(stats).encode("utf-8")).digest()
+    rng = random.Random(seed)
+    ending = rng.choice(ENDINGS)
+    length = rng.randint(2, 4) - len(ending)
+    head = "".join(rng.choice(SYLLABLES) for _ in range(max(length, 1)))
+    return head + ending
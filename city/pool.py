@@ -0,0 +1,86 @@
+import concurrent.futures
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class CityNamePool:
+    """지표 구간별로 미리 생성해 둔 도시 이름 풀
+
+    prefill(keys)로 워커 시작 때 구간마다 채워 두고, take()는 O(1)로 이름 하나를 꺼낸다.
+    꺼낸 뒤 남은 이름이 low_watermark 아래면 fetch(key)로 한 번에 여러 개를 받아
+    백그라운드 스레드에서 채운다. 비어 있으면 None만 돌려주고 채우기는 예약하지 않는다
+    (호출한 쪽이 실시간 생성을 하므로 같은 요청에서 업스트림을 두 번 부르지 않게).
+    빈 구간은 호출한 쪽이 실시간 생성을 마친 뒤 refill_if_empty(key)로 채운다
+    (구간마다 empty_refill_interval초에 한 번. 시작 때 채우기가 실패해도 풀이 계속 비어 있지 않게).
+    """
+
+    def __init__(self, fetch, low_watermark, max_keys, workers=1, empty_refill_interval=30.0):
+        self.fetch = fetch
+        self.low_watermark = low_watermark
+        self.max_keys = max_keys
+        self.empty_refill_interval = empty_refill_interval
+        self._names = OrderedDict()  # key -> deque
+        self._refilling = set()
+        self._empty_refill_at = {}  # key -> 빈 구간 채우기를 마지막으로 예약한 시각 (monotonic)
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="city-name-pool")
+
+    def take(self, key):
+        """이름을 하나 꺼낸다. 없으면 None"""
+        with self._lock:
+            names = self._names.get(key)
+            if not names:
+                return None
+            name = names.popleft()
+            remaining = len(names)
+        if remaining < self.low_watermark:
+            self.schedule_refill(key)
+        return name
+
+    def prefill(self, keys, wait=False, timeout=None):
+        """구간마다 채우기를 예약한다. wait면 끝날 때까지 (최대 timeout초) 기다린다"""
+        futures = [future for future in map(self.schedule_refill, keys) if future is not None]
+        if wait:
+            concurrent.futures.wait(futures, timeout=timeout)
+
+    def refill_if_empty(self, key):
+        """구간이 비어 있으면 채우기를 예약한다 (구간마다 empty_refill_interval초에 한 번). 예약 안 했으면 None"""
+        now = time.monotonic()
+        with self._lock:
+            if self._names.get(key):
+                return None
+            last = self._empty_refill_at.get(key)
+            if last is not None and now - last < self.empty_refill_interval:
+                return None
+            self._empty_refill_at[key] = now
+        return self.schedule_refill(key)
+
+    def schedule_refill(self, key):
+        """채우기를 예약한다. 이미 채우는 중이면 None"""
+        with self._lock:
+            if key in self._refilling:
+                return None
+            self._refilling.add(key)
+        return self._executor.submit(self._refill, key)
+
+    def size(self, key):
+        with self._lock:
+            return len(self._names.get(key, ()))
+
+    def _refill(self, key):
+        try:
+            names = self.fetch(key)
+            with self._lock:
+                self._names.setdefault(key, deque()).extend(names)
+                self._names.move_to_end(key)
+                while len(self._names) > self.max_keys:
+                    self._names.popitem(last=False)
+        except Exception:
+            logger.exception("도시 이름 풀 채우기 실패: %s", key)
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
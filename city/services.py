@@ -0,0 +1,386 @@
+"""도시 이름 생성 서비스 (OpenAI)"""
+import asyncio
+import functools
+import logging
+import re
+import threading
+import time
+import weakref
+from collections import Counter
+from dataclasses import dataclass
+
+from django.conf import settings
+from openai import AsyncOpenAI, OpenAI
+
+from EcoCity2050_BE.instrumentation import record_outbound
+
+from .breaker import CircuitBreaker
+from .cache import TTLCache
+from .fallback import generate_local_name
+from .pool import CityNamePool
+from .singleflight import SingleFlight, ThreadSingleFlight
+
+logger = logging.getLogger(__name__)
+
+# 지표 정규화 단위 (같은 구간이면 같은 이름을 재사용)
+CO2_BUCKET_TONS = 10
+BUDGET_BUCKET = 1000
+# 이름 풀은 CO2/예산의 넓은 구간(버킷 n개 묶음)만 보고 만족도와 태그는 보지 않는다.
+# 구간 수가 정해져 있어 워커 시작 때 모든 구간을 미리 채울 수 있다 (마지막 구간은 그 이상 전부)
+POOL_CO2_BUCKETS = 50  # 500t
+POOL_CO2_BANDS = 10
+POOL_BUDGET_BUCKETS = 200  # 200,000
+POOL_BUDGET_BANDS = 5
+
+SYSTEM_PROMPT = (
+    "너는 게임 도시 이름 네이머다. "
+    "한국어, 2~4음절, 한 단어, 공백/특수문자 없이."
+)
+
+_QUOTES_AND_SPACES = re.compile(r'[\"\'‘’“”\s]')
+_LIST_MARKER = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s*")
+
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _band(bucket, size, bands):
+    return min(max(bucket // size, 0), bands - 1) * size
+
+
+@dataclass(frozen=True)
+class CityStats:
+    """정규화된 도시 지표. 캐시 키로 그대로 사용한다"""
+
+    co2_bucket: int
+    satisfaction: str
+    budget_bucket: int
+    tags: tuple
+
+    @classmethod
+    def from_data(cls, data):
+        tags = data.get("topTags", []) or []
+        if isinstance(tags, str):
+            tags = [tags]
+        return cls(
+            co2_bucket=int(_to_number(data.get("co2Tons", 0)) // CO2_BUCKET_TONS),
+            satisfaction=str(data.get("citizenSatisfaction", "") or "").strip(),
+            budget_bucket=int(_to_number(data.get("budget", 0)) // BUDGET_BUCKET),
+            tags=tuple(sorted({str(tag).strip() for tag in tags if str(tag).strip()})),
+        )
+
+    def coarse(self):
+        """이름 풀용 넓은 구간 (pool_keys() 중 하나)"""
+        return CityStats(
+            co2_bucket=_band(self.co2_bucket, POOL_CO2_BUCKETS, POOL_CO2_BANDS),
+            satisfaction="",
+            budget_bucket=_band(self.budget_bucket, POOL_BUDGET_BUCKETS, POOL_BUDGET_BANDS),
+            tags=(),
+        )
+
+    @property
+    def co2(self):
+        return self.co2_bucket * CO2_BUCKET_TONS
+
+    @property
+    def budget(self):
+        return self.budget_bucket * BUDGET_BUCKET
+
+
+def pool_keys():
+    """이름 풀의 모든 구간"""
+    return [
+        CityStats(co2_bucket=co2 * POOL_CO2_BUCKETS, satisfaction="", budget_bucket=budget * POOL_BUDGET_BUCKETS, tags=())
+        for co2 in range(POOL_CO2_BANDS)
+        for budget in range(POOL_BUDGET_BANDS)
+    ]
+
+
+def build_messages(stats, count=1):
+    if count == 1:
+        instruction = "도시 이름 1개만 답하라."
+    else:
+        instruction = f"서로 다른 도시 이름 {count}개를 한 줄에 하나씩 답하라."
+    # 이름 풀 구간(coarse)에는 만족도와 태그가 없다
+    indicators = [f"CO2={stats.co2}t"]
+    if stats.satisfaction:
+        indicators.append(f"시민만족도={stats.satisfaction}")
+    indicators.append(f"예산={stats.budget}")
+    content = f"지표: {', '.join(indicators)}\n"
+    if stats.tags:
+        content += f"도시 특징 태그: {', '.join(stats.tags)}\n"
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": content + instruction},
+    ]
+
+
+def clean_name(text):
+    return _QUOTES_AND_SPACES.sub("", (text or "").strip())
+
+
+def parse_names(text):
+    """여러 줄 응답에서 이름 목록을 뽑는다 ("1. 푸른숲" 같은 번호 제거)"""
+    names = []
+    for line in (text or "").splitlines():
+        name = clean_name(_LIST_MARKER.sub("", line))
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+# 프로세스 전역 클라이언트 (httpx 커넥션 풀 재사용). WSGI 요청과 이름 풀 채우기가 같이 쓴다
+_client = None
+_client_lock = threading.Lock()
+# AsyncOpenAI는 이벤트 루프에 묶이므로 루프별로 하나씩 둔다.
+# ASGI 서버는 루프가 하나라 프로세스당 하나지만, WSGI에서 async_to_sync로 부르면
+# 요청마다 새 루프가 생겨 클라이언트도 매번 생기므로 WSGI에서는 get_client()를 쓴다
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _client_options():
+    return {
+        "api_key": settings.OPENAI_API_KEY,
+        "base_url": settings.OPENAI_BASE_URL or None,
+        "timeout": settings.CITY_NAME_DEADLINE,
+    }
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(**_client_options())
+    return _client
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncOpenAI(**_client_options())
+        _async_clients[loop] = client
+    return client
+
+
+_flight = SingleFlight()  # ASGI (이벤트 루프 하나)
+_sync_flight = ThreadSingleFlight()  # WSGI (같은 프로세스의 요청 스레드끼리)
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _record(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def get_stats():
+    """이름 생성 카운터 (요청, 캐시/풀 적중, 업스트림 호출, 합쳐진 호출, 로컬 대체, 차단기)"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["coalesced"] = _flight.coalesced + _sync_flight.coalesced
+    stats["breaker_trips"] = get_breaker().trips
+    stats["breaker_open"] = int(get_breaker().state != CircuitBreaker.CLOSED)
+    return stats
+
+
+@functools.cache
+def get_breaker():
+    return CircuitBreaker(
+        failure_threshold=settings.CITY_NAME_BREAKER_FAILURES,
+        recovery_timeout=settings.CITY_NAME_BREAKER_RECOVERY,
+        slow_call_threshold=settings.CITY_NAME_BREAKER_SLOW_CALL,
+    )
+
+
+@functools.cache
+def get_name_cache():
+    return TTLCache(settings.CITY_NAME_CACHE_SIZE, settings.CITY_NAME_CACHE_TTL)
+
+
+def fetch_name_batch(stats):
+    """이름 풀 채우기용 배치 요청 (풀 워커 스레드에서 실행)"""
+    breaker = get_breaker()
+    if not breaker.allow():
+        return []
+
+    _record("pool_refills")
+    try:
+        r = get_client().chat.completions.create(
+            model=settings.CITY_NAME_MODEL,
+            temperature=1.0,
+            messages=build_messages(stats, count=settings.CITY_NAME_POOL_BATCH_SIZE),
+            # 요청 경로 밖이라 실시간 마감보다 넉넉하게 기다린다
+            timeout=settings.CITY_NAME_DEADLINE * 3,
+        )
+    except Exception:
+        breaker.record_failure()
+        raise
+    # 배치 응답은 원래 느리므로 지연은 실패로 치지 않는다
+    breaker.record_success()
+    return parse_names(r.choices[0].message.content)
+
+
+@functools.cache
+def get_name_pool():
+    return CityNamePool(
+        fetch_name_batch,
+        low_watermark=settings.CITY_NAME_POOL_LOW_WATERMARK,
+        max_keys=settings.CITY_NAME_POOL_MAX_KEYS,
+        workers=settings.CITY_NAME_POOL_WORKERS,
+        empty_refill_interval=settings.CITY_NAME_POOL_EMPTY_REFILL_INTERVAL,
+    )
+
+
+def prefill_name_pool(wait=False, timeout=None):
+    """이름 풀의 모든 구간을 백그라운드에서 채운다 (wsgi.py/asgi.py가 워커 시작 때 부른다)"""
+    if not (settings.CITY_NAME_POOL_ENABLED and settings.CITY_NAME_POOL_PREFILL and settings.OPENAI_API_KEY):
+        return
+    get_name_pool().prefill(pool_keys(), wait=wait, timeout=timeout)
+
+
+async def _request_name(stats):
+    _record("upstream_calls")
+    breaker = get_breaker()
+    started = time.monotonic()
+    try:
+        # 클라이언트 재시도까지 포함해 마감 시간 안에 끝나야 한다
+        r = await asyncio.wait_for(
+            get_async_client().chat.completions.create(
+                model=settings.CITY_NAME_MODEL,
+                temperature=0.7,
+                messages=build_messages(stats)
+            ),
+            timeout=settings.CITY_NAME_DEADLINE,
+        )
+    except Exception:
+        breaker.record_failure()
+        raise
+    finally:
+        record_outbound(time.monotonic() - started)
+    breaker.record_success(time.monotonic() - started)
+    return clean_name(r.choices[0].message.content)
+
+
+def _request_name_sync(stats):
+    _record("upstream_calls")
+    breaker = get_breaker()
+    started = time.monotonic()
+    try:
+        # 동기 호출은 중간에 끊을 수 없으므로 재시도 없이 마감 시간을 타임아웃으로 쓴다
+        # (with_options는 같은 httpx 커넥션 풀을 쓰는 복사본을 만든다)
+        r = get_client().with_options(max_retries=0).chat.completions.create(
+            model=settings.CITY_NAME_MODEL,
+            temperature=0.7,
+            messages=build_messages(stats),
+            timeout=settings.CITY_NAME_DEADLINE,
+        )
+    except Exception:
+        breaker.record_failure()
+        raise
+    finally:
+        record_outbound(time.monotonic() - started)
+    breaker.record_success(time.monotonic() - started)
+    return clean_name(r.choices[0].message.content)
+
+
+def _fallback_name(stats):
+    _record("fallbacks")
+    return generate_local_name(stats)
+
+
+def _lookup(stats):
+    """캐시 -> 미리 생성된 이름 풀 순으로 찾는다. 없으면 None"""
+    _record("requests")
+    cache = get_name_cache()
+    name = cache.get(stats)
+    if name is not None:
+        _record("cache_hits")
+        return name
+
+    if settings.CITY_NAME_POOL_ENABLED:
+        name = get_name_pool().take(stats.coarse())
+        if name is not None:
+            _record("pool_hits")
+            cache.set(stats, name)
+            return name
+    return None
+
+
+def _refill_after_miss(stats):
+    """실시간 생성을 마친 뒤 비어 있던 풀 구간을 채운다 (업스트림을 같은 요청과 동시에 두 번 부르지 않게)"""
+    if settings.CITY_NAME_POOL_ENABLED:
+        get_name_pool().refill_if_empty(stats.coarse())
+
+
+def _remember(stats, name):
+    if not name:
+        return "이름생성실패"
+    get_name_cache().set(stats, name)
+    return name
+
+
+def generate_city_name(stats):
+    """지표로 도시 이름을 만든다 (WSGI용, 프로세스 전역 클라이언트 사용)
+
+    캐시 -> 미리 생성된 이름 풀 -> 실시간 생성 순으로 찾고,
+    실시간 생성이 마감 시간을 넘기거나 차단기가 열려 있으면 로컬 이름으로 대체한다.
+    """
+    name = _lookup(stats)
+    if name is not None:
+        return name
+
+    # 업스트림 장애 중에는 기다리지 않고 로컬에서 만든 이름을 준다 (캐시하지 않음)
+    if not get_breaker().allow():
+        return _fallback_name(stats)
+
+    # 프롬프트가 지표로만 결정되므로 같은 지표의 동시 요청은 업스트림 호출 하나를 공유한다
+    # (gunicorn sync 워커는 요청을 하나씩 처리하므로 --threads로 띄울 때 합쳐진다)
+    try:
+        name = _sync_flight.do(stats, lambda: _request_name_sync(stats))
+    except Exception as e:
+        logger.warning("도시 이름 생성 실패, 로컬 이름으로 대체합니다: %r", e)
+        return _fallback_name(stats)
+    finally:
+        _refill_after_miss(stats)
+    return _remember(stats, name)
+
+
+async def agenerate_city_name(stats):
+    """generate_city_name의 async 버전 (ASGI용)"""
+    name = _lookup(stats)
+    if name is not None:
+        return name
+
+    if not get_breaker().allow():
+        return _fallback_name(stats)
+
+    # 프롬프트가 지표로만 결정되므로 같은 지표의 동시 요청은 업스트림 호출 하나를 공유한다
+    try:
+        name = await _flight.do(stats, lambda: _request_name(stats))
+    except Exception as e:
+        logger.warning("도시 이름 생성 실패, 로컬 이름으로 대체합니다: %r", e)
+        return _fallback_name(stats)
+    finally:
+        _refill_after_miss(stats)
+    return _remember(stats, name)
+
+
+def reset_state():
+    """클라이언트, 캐시, 이름 풀, 차단기, 카운터를 처음 상태로 돌린다 (테스트용)"""
+    global _client, _flight, _sync_flight
+    with _client_lock:
+        _client = None
+    _async_clients.clear()
+    _flight = SingleFlight()
+    _sync_flight = ThreadSingleFlight()
+    get_breaker.cache_clear()
+    get_name_cache.cache_clear()
+    get_name_pool.cache_clear()
+    with _stats_lock:
+        _stats.clear()
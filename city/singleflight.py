@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 하나의 실행으로 합친다 (asyncio 전용)
+
+    먼저 들어온 호출이 실행을 맡고, 실행 중에 같은 키로 들어온 호출은
+    새로 실행하지 않고 그 결과(또는 예외)를 함께 받는다.
+    """
+
+    def __init__(self):
+        # 태스크는 이벤트 루프에 묶이므로 루프별로 진행 중인 호출을 관리한다
+        self._calls = weakref.WeakKeyDictionary()  # loop -> {key: Task}
+        self._lock = threading.Lock()
+        self._coalesced = 0
+
+    @property
+    def coalesced(self):
+        """다른 호출의 결과를 공유받은 호출 수"""
+        return self._coalesced
+
+    async def do(self, key, func):
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+
+        task = calls.get(key)
+        if task is None:
+            task = loop.create_task(func())
+            calls[key] = task
+            task.add_done_callback(lambda t: self._forget(calls, key, t))
+        else:
+            with self._lock:
+                self._coalesced += 1
+
+        # 기다리던 요청 하나가 취소되어도 다른 요청이 받을 실행은 계속되어야 한다
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _forget(calls, key, task):
+        if calls.get(key) is task:
+            del calls[key]
+        if not task.cancelled():
+            # 모든 대기자가 취소된 경우 "never retrieved" 경고 방지
+            task.exception()
+
+
+class ThreadSingleFlight:
+    """SingleFlight의 스레드 버전 (WSGI 요청 스레드용)
+
+    WSGI에서는 요청마다 이벤트 루프가 달라 SingleFlight로는 합쳐지지 않으므로
+    같은 프로세스의 스레드끼리 Future 하나로 결과를 나눠 받는다.
+    """
+
+    def __init__(self):
+        self._calls = {}  # key -> Future
+        self._lock = threading.Lock()
+        self._coalesced = 0
+
+    @property
+    def coalesced(self):
+        """다른 호출의 결과를 공유받은 호출 수"""
+        return self._coalesced
+
+    def do(self, key, func):
+        leader = False
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._coalesced += 1
+            else:
+                future = self._calls[key] = Future()
+                future.set_running_or_notify_cancel()
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            self._forget(key)
+            future.set_exception(e)
+            raise
+        self._forget(key)
+        future.set_result(result)
+        return result
+
+    def _forget(self, key):
+        # 결과를 넣기 전에 빼서, 이후 호출은 (캐시를 확인한 뒤) 새로 실행하게 한다
+        with self._lock:
+            del self._calls[key]
@@ -1,3 +1,337 @@
-from django.test import TestCase
+import json
+import threading
+import time
 
-# Create your tests here.
+from django.test import AsyncRequestFactory, Client, SimpleTestCase, override_settings
+
+from benchmarks.fakes import FakeOpenAIServer
+
+from . import services
+from .pool import CityNamePool
+from .breaker import CircuitBreaker
+from .fallback import generate_local_name
+from .services import CityStats, agenerate_city_name, pool_keys, prefill_name_pool
+from .singleflight import ThreadSingleFlight
+from .views import AsyncNameCityView
+
+
+def game_state(co2=1200, satisfaction="만족", budget=50000, tags=("태양광", "숲")):
+    return {"co2Tons": co2, "citizenSatisfaction": satisfaction, "budget": budget, "topTags": list(tags)}
+
+
+class FakeOpenAITestCase(SimpleTestCase):
+    """로컬 가짜 OpenAI 호환 서버(benchmarks/fakes.py)에 붙여 도시 이름 서비스를 테스트한다"""
+
+    delay = 0.0
+    pool_enabled = False
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = FakeOpenAIServer(delay=cls.delay).start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+        cls.enterClassContext(override_settings(
+            OPENAI_API_KEY="test",
+            OPENAI_BASE_URL=cls.server.base_url,
+            CITY_NAME_POOL_ENABLED=cls.pool_enabled,
+        ))
+
+    def setUp(self):
+        services.reset_state()
+        self.addCleanup(services.reset_state)
+        self.server.requests = 0
+        self.server.connections = 0
+        self.server.fail_status = None
+        self.server.delay = self.delay
+
+    def post(self, data):
+        return self.client.post("/name-city/", json.dumps(data), content_type="application/json")
+
+
+class NameCityTests(FakeOpenAITestCase):
+    def test_sync_view_reuses_process_client(self):
+        for co2 in range(5):
+            response = self.post(game_state(co2=co2 * 100))
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json()["cityName"])
+
+        self.assertEqual(self.server.requests, 5)
+        # 프로세스 전역 클라이언트의 keep-alive 연결 하나로 보내고 AsyncOpenAI는 만들지 않는다
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(services._async_clients), 0)
+
+    def test_same_bucket_is_served_from_cache(self):
+        first = self.post(game_state(co2=1201)).json()["cityName"]
+        second = self.post(game_state(co2=1209, tags=("숲", "태양광"))).json()["cityName"]
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(services.get_stats()["cache_hits"], 1)
+
+    def test_invalid_json(self):
+        response = self.client.post("/name-city/", "{", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.server.requests, 0)
+
+    def test_non_object_body(self):
+        self.assertEqual(self.post([game_state()]).status_code, 400)
+        self.assertEqual(self.server.requests, 0)
+
+    def test_invalid_token_is_rejected_by_drf_authentication(self):
+        response = self.client.post(
+            "/name-city/", json.dumps(game_state()), content_type="application/json",
+            HTTP_AUTHORIZATION="Bearer not-a-token",
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.server.requests, 0)
+
+    @override_settings(OPENAI_API_KEY="")
+    def test_missing_api_key(self):
+        self.assertEqual(self.post(game_state()).status_code, 500)
+
+    async def test_async_generation_shares_loop_client(self):
+        first = await agenerate_city_name(CityStats.from_data(game_state(co2=0)))
+        second = await agenerate_city_name(CityStats.from_data(game_state(co2=500)))
+
+        self.assertTrue(first and second)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(len(services._async_clients), 1)
+
+
+@override_settings(
+    CITY_NAME_BREAKER_FAILURES=3,
+    CITY_NAME_BREAKER_RECOVERY=0.2,
+    CITY_NAME_BREAKER_SLOW_CALL=1.0,
+    CITY_NAME_DEADLINE=0.3,
+)
+class BreakerTests(FakeOpenAITestCase):
+    """업스트림 장애 중 차단기와 로컬 대체 이름"""
+
+    def name(self, co2):
+        response = self.post(game_state(co2=co2))
+        self.assertEqual(response.status_code, 200)
+        return response.json()["cityName"]
+
+    def local_name(self, co2):
+        return generate_local_name(CityStats.from_data(game_state(co2=co2)))
+
+    def trip(self):
+        self.server.fail_status = 503
+        for co2 in (0, 100, 200):
+            self.assertEqual(self.name(co2), self.local_name(co2))
+        self.assertEqual(services.get_breaker().state, CircuitBreaker.OPEN)
+
+    def test_opens_after_consecutive_failures(self):
+        self.trip()
+        self.assertEqual(self.server.requests, 3)
+
+        # 열려 있는 동안에는 업스트림을 부르지 않고 로컬 이름을 바로 준다
+        self.assertEqual(self.name(300), self.local_name(300))
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(services.get_stats()["fallbacks"], 4)
+
+    def test_half_open_probe_closes_on_success(self):
+        self.trip()
+        self.server.fail_status = None
+        time.sleep(0.25)
+
+        self.assertNotEqual(self.name(300), self.local_name(300))
+        self.assertEqual(self.server.requests, 4)
+        self.assertEqual(services.get_breaker().state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        self.trip()
+        time.sleep(0.25)
+
+        self.assertEqual(self.name(300), self.local_name(300))
+        self.assertEqual(self.server.requests, 4)
+        breaker = services.get_breaker()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(breaker.trips, 2)
+
+        # 다시 복구 시간까지 막는다
+        self.assertEqual(self.name(400), self.local_name(400))
+        self.assertEqual(self.server.requests, 4)
+
+    def test_deadline_falls_back_to_local_name(self):
+        self.server.delay = 1.0
+
+        started = time.monotonic()
+        self.assertEqual(self.name(0), self.local_name(0))
+        self.assertLess(time.monotonic() - started, 0.9)
+        # 마감을 넘긴 이름은 캐시하지 않는다
+        self.server.delay = 0.0
+        self.assertNotEqual(self.name(0), self.local_name(0))
+
+    async def test_async_deadline_falls_back_to_local_name(self):
+        self.server.delay = 1.0
+        stats = CityStats.from_data(game_state())
+
+        started = time.monotonic()
+        self.assertEqual(await agenerate_city_name(stats), generate_local_name(stats))
+        self.assertLess(time.monotonic() - started, 0.9)
+
+
+class AsyncNameCityViewTests(FakeOpenAITestCase):
+    """CITY_NAME_ASYNC=True일 때 연결되는 DRF async 뷰"""
+
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.view = AsyncNameCityView.as_view()
+
+    async def post_async(self, data, **extra):
+        request = self.factory.post("/name-city/", data, content_type="application/json", **extra)
+        response = await self.view(request)
+        return response.render()
+
+    async def test_names_city(self):
+        response = await self.post_async(json.dumps(game_state()))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json.loads(response.content)["cityName"])
+        self.assertEqual(len(services._async_clients), 1)
+
+    async def test_drf_errors(self):
+        # 파싱 오류와 인증 실패는 동기 뷰와 같은 DRF 형식({"detail": ...})으로 응답한다
+        response = await self.post_async("{")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("detail", json.loads(response.content))
+
+        response = await self.post_async(json.dumps(game_state()), headers={"authorization": "Bearer not-a-token"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.server.requests, 0)
+
+
+class CoalescingTests(FakeOpenAITestCase):
+    delay = 0.3
+
+    def test_concurrent_sync_requests_share_one_upstream_call(self):
+        callers = 8
+        barrier = threading.Barrier(callers)
+        names = []
+
+        def call():
+            client = Client()
+            barrier.wait()
+            response = client.post("/name-city/", json.dumps(game_state()), content_type="application/json")
+            names.append(response.json()["cityName"])
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(len(set(names)), 1)
+        stats = services.get_stats()
+        # 업스트림 응답 뒤에 들어온 호출은 캐시에서 받는다
+        self.assertEqual(stats["coalesced"] + stats.get("cache_hits", 0), callers - 1)
+
+    def test_failure_is_shared_by_waiting_callers(self):
+        flight = ThreadSingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        errors = []
+
+        def fail():
+            calls.append(1)
+            started.set()
+            release.wait()
+            raise RuntimeError("upstream down")
+
+        def call():
+            try:
+                flight.do("key", fail)
+            except RuntimeError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=call) for _ in range(3)]
+        for thread in followers:
+            thread.start()
+        while flight.coalesced < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(errors), 4)
+
+
+class NamePoolTests(FakeOpenAITestCase):
+    pool_enabled = True
+
+    def drain_pool(self):
+        # 예약된 채우기가 끝날 때까지 기다린다
+        services.get_name_pool()._executor.shutdown(wait=True)
+
+    def test_prefilled_pool_serves_without_upstream_calls(self):
+        prefill_name_pool(wait=True)
+        self.assertEqual(self.server.requests, len(pool_keys()))
+
+        self.server.requests = 0
+        for satisfaction, tags in (("만족", ("숲",)), ("보통", ("수소", "풍력")), ("불만", ())):
+            response = self.post(game_state(satisfaction=satisfaction, tags=tags))
+            self.assertEqual(response.status_code, 200)
+        self.drain_pool()
+
+        self.assertEqual(self.server.requests, 0)
+        self.assertEqual(services.get_stats()["pool_hits"], 3)
+
+    def test_cold_miss_refills_bucket_after_live_call(self):
+        self.assertEqual(self.post(game_state(co2=0)).status_code, 200)
+        self.drain_pool()
+        # 실시간 생성 1 + 그 뒤 빈 구간 채우기 1
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(services.get_stats()["pool_refills"], 1)
+
+        # 같은 구간의 다른 지표는 채워진 풀에서 받는다
+        self.server.requests = 0
+        self.assertEqual(self.post(game_state(co2=100)).status_code, 200)
+        self.drain_pool()
+        self.assertEqual(self.server.requests, 0)
+        self.assertEqual(services.get_stats()["pool_hits"], 1)
+
+    def test_pool_keys_cover_every_stat(self):
+        keys = set(pool_keys())
+        for co2, budget in ((-10, -1), (0, 0), (1234.5, 456789), (10**9, 10**12)):
+            self.assertIn(CityStats.from_data(game_state(co2=co2, budget=budget)).coarse(), keys)
+
+
+class CityNamePoolTests(SimpleTestCase):
+    def make_pool(self, fetch, interval):
+        pool = CityNamePool(fetch, low_watermark=1, max_keys=8, empty_refill_interval=interval)
+        self.addCleanup(pool._executor.shutdown, wait=True)
+        return pool
+
+    def test_empty_bucket_refill_is_rate_limited(self):
+        calls = []
+
+        def fetch_while_down(key):
+            calls.append(key)
+            return []
+
+        pool = self.make_pool(fetch_while_down, interval=60)
+        pool.refill_if_empty("key").result()
+        # 업스트림 장애 중: 간격 안에서는 다시 부르지 않는다
+        self.assertIsNone(pool.refill_if_empty("key"))
+        self.assertIsNone(pool.take("key"))
+        self.assertEqual(calls, ["key"])
+
+    def test_empty_bucket_recovers_after_interval(self):
+        batches = [[], ["솔빛", "바람"]]
+        pool = self.make_pool(lambda key: batches.pop(0), interval=0)
+
+        pool.refill_if_empty("key").result()
+        self.assertIsNone(pool.take("key"))
+        pool.refill_if_empty("key").result()
+        self.assertEqual(pool.take("key"), "솔빛")
+        # 채워진 구간은 빈 구간 채우기를 예약하지 않는다
+        self.assertIsNone(pool.refill_if_empty("key"))
@@ -1,55 +1,102 @@
-import os, re
-from rest_framework.decorators import api_view
-from rest_framework.response import Response
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from rest_framework import status
-from openai import OpenAI
-
-@api_view(["POST"])
-def name_city(request):
-    co2 = request.data.get("co2Tons", 0)
-    satis = request.data.get("citizenSatisfaction", "")
-    budget = request.data.get("budget", 0)
-    tags = request.data.get("topTags", []) or []
-
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        return Response(
-            {"cityName": "에러", "detail": "OPENAI_API_KEY not found in environment"},
-            status=500
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .services import CityStats, agenerate_city_name, generate_city_name
+
+
+def _request_data(request):
+    """요청 본문 (폼이면 topTags를 목록으로). JSON 객체가 아니면 None"""
+    data = request.data
+    if hasattr(data, "getlist"):
+        tags = data.getlist("topTags")
+        data = data.dict()
+        if tags:
+            data["topTags"] = tags
+    return data if isinstance(data, dict) else None
+
+
+def _check_request(request):
+    """요청 본문을 읽는다. 처리할 수 없으면 (None, 오류 응답)"""
+    data = _request_data(request)
+    if data is None:
+        return None, Response(
+            {"cityName": "에러", "detail": "JSON 객체가 필요합니다."},
+            status=status.HTTP_400_BAD_REQUEST
         )
 
-    messages = [
-        {
-            "role": "system",
-            "content": "너는 게임 도시 이름 네이머다. "
-                       "한국어, 2~4음절, 한 단어, 공백/특수문자 없이."
-        },
-        {
-            "role": "user",
-            "content": (
-                f"지표: CO2={co2}t, 시민만족도={satis}, 예산={budget}\n"
-                f"도시 특징 태그: {', '.join(tags)}\n"
-                f"도시 이름 1개만 답하라."
-            )
-        }
-    ]
-
-    try:
-        client = OpenAI(api_key=api_key)
-
-        r = client.chat.completions.create(
-            model="gpt-4o-mini",
-            temperature=0.7,
-            messages=messages
+    if not settings.OPENAI_API_KEY:
+        return None, Response(
+            {"cityName": "에러", "detail": "OPENAI_API_KEY not found in environment"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    return data, None
 
-        text = (r.choices[0].message.content or "").strip()
-        name = re.sub(r'[\"\'‘’“”\s]', "", text) or "이름생성실패"
 
-        return Response({"cityName": name})
+def _error(e):
+    return Response(
+        {"cityName": "에러", "detail": str(e)},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
 
-    except Exception as e:
-        return Response(
-            {"cityName": "에러", "detail": str(e)},
-            status=500
-        )
+
+class NameCityView(APIView):
+    """게임 지표로 도시 이름을 지어 준다 (WSGI: 프로세스 전역 OpenAI 클라이언트로 동기 호출)"""
+
+    def post(self, request):
+        data, error = _check_request(request)
+        if error is not None:
+            return error
+
+        try:
+            return Response({"cityName": generate_city_name(CityStats.from_data(data))})
+        except Exception as e:
+            return _error(e)
+
+
+class AsyncAPIView(APIView):
+    """async 핸들러를 쓰는 APIView
+
+    인증/권한/스로틀(initial)은 sync_to_async로 돌리고 핸들러만 이벤트 루프에서 기다린다.
+    예외 처리와 응답 형식은 APIView.dispatch와 같다.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, request.method.lower(), None)
+            if request.method.lower() not in self.http_method_names or handler is None:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if not isinstance(response, Response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+# ASGI에서는 이벤트 루프에서 바로 실행되어 느린 업스트림이 워커를 붙잡지 않는다
+class AsyncNameCityView(AsyncAPIView):
+    async def post(self, request):
+        data, error = _check_request(request)
+        if error is not None:
+            return error
+
+        try:
+            return Response({"cityName": await agenerate_city_name(CityStats.from_data(data))})
+        except Exception as e:
+            return _error(e)
+
+
+# CITY_NAME_ASYNC 설정에 따라 name-city URL에 연결할 뷰 (둘 다 DRF 인증/권한/스로틀/오류 형식을 따른다)
+name_city = (AsyncNameCityView if settings.CITY_NAME_ASYNC else NameCityView).as_view()
@@ -0,0 +1,205 @@
+"""게임 저장 데이터용 고정 레이아웃 바이너리 포맷
+
+모바일 Unity 클라이언트가 JSON 대신 쓸 수 있는 작은 포맷이다.
+Content-Type/Accept가 MEDIA_TYPE이면 savegame API가 이 포맷으로 읽고 쓴다.
+
+레이아웃 (little endian)
+    헤더: 매직 b"EC", 포맷 버전(u8), 태그 사전 id(u8), 필드 존재 비트마스크(u16)
+    본문: FIELDS 순서대로, 비트가 켜진 필드만 종류별로 인코딩
+        str  u16 길이 + UTF-8
+        f64 / i64 / u32 / bool  struct 그대로
+        time  UTC epoch 마이크로초(i64)
+        tags  u8 개수 + 태그마다 u8 사전 번호 (사전에 없으면 0xFF + str)
+
+값이 None인 필드는 보내지 않는다 (디코딩하면 키가 없음).
+"""
+import functools
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+
+MEDIA_TYPE = "application/vnd.ecocity2050.save"
+MAGIC = b"EC"
+FORMAT_VERSION = 1
+
+# (키, 종류) — 순서가 비트마스크 위치이므로 새 필드는 끝에만 추가한다
+FIELDS = (
+    ("userId", "str"),
+    ("version", "u32"),
+    ("co2Tons", "f64"),
+    ("citizenSatisfaction", "str"),
+    ("budget", "i64"),
+    ("topTags", "tags"),
+    ("aiCityName", "str"),
+    ("lastSaved", "time"),
+    ("created", "bool"),
+    ("exists", "bool"),
+    ("message", "str"),
+    ("error", "str"),
+    ("currentVersion", "u32"),
+    ("detail", "str"),
+)
+
+_KEYS = frozenset(key for key, _ in FIELDS)
+_HEADER = struct.Struct("<2sBBH")
+_LENGTH = struct.Struct("<H")
+_COUNT = struct.Struct("<B")
+_SCALARS = {
+    "f64": struct.Struct("<d"),
+    "i64": struct.Struct("<q"),
+    "u32": struct.Struct("<I"),
+    "bool": struct.Struct("<?"),
+    "time": struct.Struct("<q"),
+}
+_INLINE_TAG = 0xFF
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def dictionary_id(tags):
+    """태그 사전 식별 바이트 (사전이 없으면 0)"""
+    if not tags:
+        return 0
+    return zlib.crc32("\n".join(tags).encode("utf-8")) & 0xFF or 1
+
+
+@functools.lru_cache(maxsize=8)
+def _dictionary(tags):
+    """(사전 id, 태그 -> 번호). tags는 튜플이어야 한다"""
+    return dictionary_id(tags), {tag: position for position, tag in enumerate(tags[:_INLINE_TAG])}
+
+
+def _encode_str(value):
+    raw = str(value).encode("utf-8")
+    return _LENGTH.pack(len(raw)) + raw
+
+
+def _encode_time(value):
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return _SCALARS["time"].pack((value - _EPOCH) // timedelta(microseconds=1))
+
+
+def encode(data, tags=()):
+    """dict를 바이너리로. FIELDS에 없는 키가 있으면 ValueError"""
+    unknown = set(data) - _KEYS
+    if unknown:
+        raise ValueError(f"바이너리 포맷에 없는 필드: {', '.join(sorted(unknown))}")
+
+    dict_id, index = _dictionary(tuple(tags))
+    mask = 0
+    parts = []
+    for bit, (key, kind) in enumerate(FIELDS):
+        value = data.get(key)
+        if value is None:
+            continue
+        mask |= 1 << bit
+        try:
+            if kind == "str":
+                parts.append(_encode_str(value))
+            elif kind == "time":
+                parts.append(_encode_time(value))
+            elif kind == "tags":
+                parts.append(_COUNT.pack(len(value)))
+                for tag in value:
+                    position = index.get(tag)
+                    if position is None:
+                        parts.append(_COUNT.pack(_INLINE_TAG) + _encode_str(tag))
+                    else:
+                        parts.append(_COUNT.pack(position))
+            else:
+                parts.append(_SCALARS[kind].pack(value))
+        except (struct.error, TypeError) as e:
+            raise ValueError(f"{key} 값을 인코딩할 수 없습니다: {e}") from e
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, dict_id, mask)
+    return header + b"".join(parts)
+
+
+def decode(payload, tags=()):
+    """바이너리를 dict로. 형식이 맞지 않으면 ValueError"""
+    view = memoryview(payload)
+    try:
+        magic, format_version, dict_id, mask = _HEADER.unpack_from(view, 0)
+    except struct.error as e:
+        raise ValueError("헤더가 잘렸습니다.") from e
+    if magic != MAGIC or format_version != FORMAT_VERSION:
+        raise ValueError("지원하지 않는 저장 데이터 포맷입니다.")
+
+    offset = _HEADER.size
+    data = {}
+
+    def read_str():
+        nonlocal offset
+        (length,) = _LENGTH.unpack_from(view, offset)
+        start = offset + _LENGTH.size
+        if start + length > len(view):
+            raise struct.error("문자열이 잘렸습니다.")
+        offset = start + length
+        return str(view[start:offset], "utf-8")
+
+    try:
+        for bit, (key, kind) in enumerate(FIELDS):
+            if not mask & (1 << bit):
+                continue
+            if kind == "str":
+                data[key] = read_str()
+            elif kind == "tags":
+                (count,) = _COUNT.unpack_from(view, offset)
+                offset += _COUNT.size
+                values = []
+                for _ in range(count):
+                    (position,) = _COUNT.unpack_from(view, offset)
+                    offset += _COUNT.size
+                    if position == _INLINE_TAG:
+                        values.append(read_str())
+                        continue
+                    if dict_id != _dictionary(tuple(tags))[0] or position >= len(tags):
+                        raise ValueError("태그 사전이 서버와 다릅니다.")
+                    values.append(tags[position])
+                data[key] = values
+            else:
+                scalar = _SCALARS[kind]
+                (value,) = scalar.unpack_from(view, offset)
+                offset += scalar.size
+                if kind == "time":
+                    value = (_EPOCH + timedelta(microseconds=value)).isoformat()
+                data[key] = value
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"저장 데이터가 손상되었습니다: {e}") from e
+
+    if offset != len(view):
+        raise ValueError("저장 데이터 뒤에 알 수 없는 바이트가 있습니다.")
+    return data
+
+
+class BinarySaveParser(BaseParser):
+    media_type = MEDIA_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return decode(stream.read(), settings.SAVEGAME_BINARY_TAG_DICTIONARY)
+        except ValueError as e:
+            raise ParseError(str(e))
+
+
+class BinarySaveRenderer(BaseRenderer):
+    media_type = MEDIA_TYPE
+    format = "ecosave"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        response = (renderer_context or {}).get("response")
+        if response is not None and response.exception:
+            # 인증 실패 등 DRF가 만든 에러 본문은 포맷에 있는 키만 남긴다
+            data = {key: value for key, value in data.items() if key in _KEYS}
+        return encode(data, settings.SAVEGAME_BINARY_TAG_DICTIONARY)
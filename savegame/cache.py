@@ -0,0 +1,49 @@
+"""게임 저장 데이터 read-through 캐시
+
+kakao_id별로 load-game 응답 본문(저장이 없으면 None)을 담아 두고,
+check-saved-data도 같은 항목으로 응답한다. save-game이 저장 직후 갱신한다.
+저장을 처리한 워커가 갱신하므로 워커끼리 공유하는 캐시여야 하고,
+SAVEGAME_CACHE_TTL이 0이면(프로세스 로컬 캐시의 기본값) 캐시를 쓰지 않는다.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+_MISSING = object()
+
+
+def _key(kakao_id):
+    return f"savegame:v1:{kakao_id}"
+
+
+def enabled():
+    return settings.SAVEGAME_CACHE_TTL > 0
+
+
+def get(kakao_id):
+    """(찾음 여부, 게임 데이터 또는 None)"""
+    if not enabled():
+        return False, None
+    entry = cache.get(_key(kakao_id), _MISSING)
+    if entry is _MISSING:
+        return False, None
+    return True, entry
+
+
+def set(kakao_id, game_data):
+    if not enabled():
+        return
+    cache.set(_key(kakao_id), game_data, settings.SAVEGAME_CACHE_TTL)
+
+
+def set_many(entries):
+    """{kakao_id: 게임 데이터} 여러 개를 한 번에 갱신"""
+    if not enabled():
+        return
+    cache.set_many(
+        {_key(kakao_id): game_data for kakao_id, game_data in entries.items()},
+        settings.SAVEGAME_CACHE_TTL,
+    )
+
+
+def delete(kakao_id):
+    cache.delete(_key(kakao_id))
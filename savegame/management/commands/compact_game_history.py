@@ -0,0 +1,87 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Min, Q
+
+from savegame.models import SavedGameSnapshot, restore
+
+
+class Command(BaseCommand):
+    help = "오래된 게임 저장 이력을 지우고, 남은 이력의 첫 버전을 키프레임으로 다시 만든다"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep", type=int, default=settings.SAVEGAME_HISTORY_KEEP,
+            help="사용자별로 남길 최근 버전 수",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=200,
+            help="한 트랜잭션에서 처리할 사용자 수",
+        )
+
+    def handle(self, *args, keep, batch_size, **options):
+        if keep < 1:
+            self.stderr.write("--keep은 1 이상이어야 합니다.")
+            return
+
+        # 남길 버전보다 오래된 이력이 있는 사용자
+        candidates = (
+            SavedGameSnapshot.objects.values("user_id")
+            .annotate(latest=Max("version"), oldest=Min("version"))
+            .filter(oldest__lte=F("latest") - keep)
+            .order_by("user_id")
+        )
+
+        last_user_id = 0
+        compacted = deleted = 0
+        while True:
+            batch = list(candidates.filter(user_id__gt=last_user_id)[:batch_size])
+            if not batch:
+                break
+            last_user_id = batch[-1]["user_id"]
+
+            cutoffs = {row["user_id"]: row["latest"] - keep + 1 for row in batch}
+            with transaction.atomic():
+                users, removed = self._compact(cutoffs)
+            compacted += users
+            deleted += removed
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{compacted}명의 이력을 정리했습니다. (삭제된 스냅샷 {deleted}개)"
+        ))
+
+    def _compact(self, cutoffs):
+        """cutoff 버전을 키프레임으로 바꾸고 그보다 오래된 스냅샷을 지운다"""
+        snapshots = SavedGameSnapshot.objects.filter(
+            reduce(or_, (Q(user_id=user_id, version__lte=cutoff) for user_id, cutoff in cutoffs.items()))
+        ).order_by("user_id", "version")
+
+        chains = defaultdict(list)
+        for snapshot in snapshots:
+            if snapshot.is_keyframe:
+                chains[snapshot.user_id] = []
+            chains[snapshot.user_id].append(snapshot)
+
+        keyframes = []
+        for user_id, chain in chains.items():
+            restored = restore(chain, cutoffs[user_id])
+            if restored is None:
+                self.stderr.write(f"user {user_id}: 이력이 끊겨 있어 건너뜁니다.")
+                continue
+            keyframe = chain[-1]
+            keyframe.is_keyframe = True
+            keyframe.data = restored[0]
+            keyframes.append(keyframe)
+
+        if not keyframes:
+            return 0, 0
+
+        SavedGameSnapshot.objects.bulk_update(keyframes, ["is_keyframe", "data"])
+        deleted, _ = SavedGameSnapshot.objects.filter(
+            reduce(or_, (Q(user_id=keyframe.user_id, version__lt=keyframe.version) for keyframe in keyframes))
+        ).delete()
+        return len(keyframes), deleted
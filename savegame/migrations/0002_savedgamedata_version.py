@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("savegame", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="savedgamedata",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:28
+
+import json
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _parse_tags(value):
+    # 0005와 같은 규칙: 예전 top_tags(JSON 문자열)가 깨져 있으면 빈 목록으로 본다 (한 행 때문에 마이그레이션이 멈추지 않게)
+    try:
+        tags = json.loads(value) if value else []
+    except ValueError:
+        return []
+    return tags if isinstance(tags, list) else []
+
+
+def create_initial_keyframes(apps, schema_editor):
+    """기존 저장 데이터마다 현재 version의 키프레임을 만들어 이력의 시작점으로 삼는다"""
+    SavedGameData = apps.get_model("savegame", "SavedGameData")
+    SavedGameSnapshot = apps.get_model("savegame", "SavedGameSnapshot")
+
+    batch = []
+    for saved in SavedGameData.objects.order_by("pk").iterator(chunk_size=1000):
+        batch.append(
+            SavedGameSnapshot(
+                user_id=saved.user_id,
+                version=saved.version,
+                is_keyframe=True,
+                data={
+                    "co2_tons": saved.co2_tons,
+                    "citizen_satisfaction": saved.citizen_satisfaction,
+                    "budget": saved.budget,
+                    "top_tags": _parse_tags(saved.top_tags),
+                    "ai_city_name": saved.ai_city_name,
+                },
+                created_at=saved.updated_at,
+            )
+        )
+        if len(batch) >= 1000:
+            SavedGameSnapshot.objects.bulk_create(batch)
+            batch = []
+    SavedGameSnapshot.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("savegame", "0002_savedgamedata_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SavedGameSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveIntegerField()),
+                ("is_keyframe", models.BooleanField(default=False)),
+                ("data", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="game_snapshots",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "게임 저장 이력",
+                "verbose_name_plural": "게임 저장 이력들",
+                "db_table": "saved_game_snapshot",
+                "ordering": ["-version"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "version"), name="unique_snapshot_user_version"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_initial_keyframes, migrations.RunPython.noop),
+    ]
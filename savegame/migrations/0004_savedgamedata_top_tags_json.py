@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("savegame", "0003_savedgamesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="savedgamedata",
+            name="top_tags_json",
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:40
+
+import json
+
+from django.db import migrations, transaction
+
+BATCH_SIZE = 1000
+
+
+def _parse_tags(value):
+    try:
+        tags = json.loads(value) if value else []
+    except ValueError:
+        return []
+    return tags if isinstance(tags, list) else []
+
+
+def copy_top_tags(apps, schema_editor):
+    """top_tags(JSON 문자열)를 top_tags_json으로 배치 단위로 옮긴다
+
+    배치마다 커밋하므로 중간에 끊겨도 다시 실행하면 남은 행(top_tags_json IS NULL)부터 이어서 처리한다.
+    """
+    SavedGameData = apps.get_model("savegame", "SavedGameData")
+    db_alias = schema_editor.connection.alias
+    pending = SavedGameData.objects.using(db_alias).filter(top_tags_json__isnull=True).order_by("pk")
+
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk).only("pk", "top_tags")[:BATCH_SIZE])
+        if not batch:
+            break
+        for saved in batch:
+            saved.top_tags_json = _parse_tags(saved.top_tags)
+        with transaction.atomic(using=db_alias):
+            SavedGameData.objects.using(db_alias).bulk_update(batch, ["top_tags_json"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    # 배치마다 커밋해야 이어서 실행할 수 있다
+    atomic = False
+
+    dependencies = [
+        ("savegame", "0004_savedgamedata_top_tags_json"),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_top_tags, migrations.RunPython.noop),
+    ]
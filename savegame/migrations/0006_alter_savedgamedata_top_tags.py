@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:40
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("savegame", "0005_copy_top_tags_json"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="savedgamedata",
+            name="top_tags",
+        ),
+        migrations.RenameField(
+            model_name="savedgamedata",
+            old_name="top_tags_json",
+            new_name="top_tags",
+        ),
+        migrations.AlterField(
+            model_name="savedgamedata",
+            name="top_tags",
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name="savedgamedata",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["top_tags"], name="saved_game_top_tags_gin"
+            ),
+        ),
+    ]
@@ -1,5 +1,199 @@
-from django.db import models
+from collections import namedtuple
+
+from django.db import connections, models
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models import Subquery
+from django.utils import timezone
+
+# upsert() 결과: 저장된 사용자 pk, 새 version, 덮어쓰기 직전 값(with_previous일 때)
+UpsertResult = namedtuple("UpsertResult", ["user_id", "version", "previous"])
+
+# 저장 이력(스냅샷)에 남기는 게임 상태 필드
+STATE_FIELDS = ("co2_tons", "citizen_satisfaction", "budget", "top_tags", "ai_city_name")
+
+
+def game_state(values):
+    """필드 값 dict에서 스냅샷용 게임 상태를 뽑는다"""
+    state = {}
+    for name in STATE_FIELDS:
+        if name not in values:
+            continue
+        value = values[name]
+        if name == "top_tags":
+            value = list(value or [])
+        else:
+            value = SavedGameData._meta.get_field(name).to_python(value)
+        state[name] = value
+    return state
+
+
+class SavedGameDataQuerySet(models.QuerySet):
+    def with_tag(self, tag):
+        """도시 태그에 tag가 있는 저장 데이터 (top_tags @> '["tag"]', GIN 인덱스 사용)"""
+        return self.filter(top_tags__contains=[tag])
+
+    def upsert(self, user_id=None, kakao_id=None, expected_version=None, with_previous=False,
+               saved_at=None, **fields):
+        """INSERT ... ON CONFLICT (user_id) DO UPDATE 한 문장으로 저장한다
+
+        user_id 대신 kakao_id를 주면 사용자 조회도 같은 문장(INSERT ... SELECT)에서 한다.
+        저장할 때마다 version이 1씩 올라간다. expected_version이 주어지면
+        저장된 version이 그 값과 같을 때만 덮어쓴다 (오래된 저장 거부).
+        저장되면 UpsertResult를, 사용자가 없거나 거부되면 None을 돌려준다.
+        with_previous=True면 UpsertResult.previous에 덮어쓰기 직전 값 dict(처음이면 None)를 담는다.
+        saved_at은 created_at/updated_at에 쓸 시각이다 (기본값: 현재 시각).
+        """
+        if (user_id is None) == (kakao_id is None):
+            raise TypeError("user_id와 kakao_id 중 하나만 지정해야 합니다.")
+
+        connection = connections[self.db]
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+        user_opts = opts.get_field("user").related_model._meta
+        user_table = qn(user_opts.db_table)
+        user_join = f"u.{qn(user_opts.pk.column)}"
+
+        now = saved_at or timezone.now()
+        values = {
+            field.attname: fields.get(field.name, field.get_default())
+            for field in opts.concrete_fields
+            if not field.primary_key
+        }
+        values.update(user_id=user_id, version=1, created_at=now, updated_at=now)
+        columns = list(values)
+
+        placeholders, params = [], []
+        for column, value in values.items():
+            if column == "user_id" and kakao_id is not None:
+                placeholders.append(user_join)
+                continue
+            placeholders.append("%s")
+            params.append(opts.get_field(column).get_db_prep_save(value, connection))
+
+        if kakao_id is None:
+            source = f"VALUES ({', '.join(placeholders)})"
+        else:
+            source = (
+                f"SELECT {', '.join(placeholders)} FROM {user_table} u "
+                f"WHERE u.{qn('kakao_id')} = %s"
+            )
+            # raw SQL이라 ORM처럼 값을 맞춰 주지 않는다 (숫자 kakao_id는 varchar = bigint 오류)
+            params.append(user_opts.get_field("kakao_id").get_db_prep_value(kakao_id, connection))
+
+        # 넘겨받은 필드만 덮어쓴다 (나머지 기본값은 새로 만들 때만 사용)
+        updates = [
+            f"{qn(column)} = EXCLUDED.{qn(column)}"
+            for column in [opts.get_field(name).attname for name in fields] + ["updated_at"]
+        ]
+        updates.append(f"{qn('version')} = {table}.{qn('version')} + 1")
+
+        sql = (
+            f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) {source} "
+            f"ON CONFLICT ({qn('user_id')}) DO UPDATE SET {', '.join(updates)}"
+        )
+        if expected_version is not None:
+            sql += f" WHERE {table}.{qn('version')} = %s"
+            params.append(expected_version)
+        sql += f" RETURNING {qn('user_id')}, {qn('version')}"
+
+        if not with_previous:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+            return UpsertResult(row[0], row[1], None) if row else None
+
+        previous_columns = ("version",) + STATE_FIELDS
+        if connection.vendor == "postgresql":
+            # 같은 문장 안의 CTE는 같은 스냅샷을 보므로 prev는 덮어쓰기 직전 값이다
+            select_previous = ", ".join(f"s.{qn(column)}" for column in previous_columns)
+            if kakao_id is None:
+                previous_sql = f"SELECT {select_previous} FROM {table} s WHERE s.{qn('user_id')} = %s"
+            else:
+                previous_sql = (
+                    f"SELECT {select_previous} FROM {table} s "
+                    f"JOIN {user_table} u ON {user_join} = s.{qn('user_id')} "
+                    f"WHERE u.{qn('kakao_id')} = %s"
+                )
+            sql = (
+                f"WITH prev AS ({previous_sql}), up AS ({sql}) "
+                f"SELECT up.{qn('user_id')}, up.{qn('version')}, "
+                f"{', '.join(f'prev.{qn(column)}' for column in previous_columns)} "
+                f"FROM up LEFT JOIN prev ON TRUE"
+            )
+            params.insert(0, user_id if kakao_id is None else kakao_id)
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+            if row is None:
+                return None
+            previous = None
+            if row[2] is not None:
+                previous = {
+                    column: _from_db(opts.get_field(column), value, connection)
+                    for column, value in zip(previous_columns, row[2:])
+                }
+            return UpsertResult(row[0], row[1], previous)
+
+        # 그 밖의 DB(개발용 SQLite 등)는 직전 값을 먼저 읽는다
+        if kakao_id is None:
+            previous = self.filter(user_id=user_id)
+        else:
+            previous = self.filter(user__kakao_id=kakao_id)
+        previous = previous.values(*previous_columns).first()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        return UpsertResult(row[0], row[1], previous) if row else None
+
+
+    def bulk_upsert(self, rows, saved_at=None):
+        """여러 사용자의 저장을 INSERT ... ON CONFLICT (user_id) DO UPDATE 한 문장으로 반영한다
+
+        rows는 {user_id: (저장 횟수 n, 마지막 게임 상태 dict)}. version은 upsert()처럼 DB에서 올린다
+        (있던 행은 version + n, 없던 행은 n). 동시에 저장해도 version이 겹치지 않는다.
+        반영된 {user_id: 새 version}을 돌려준다.
+        """
+        connection = connections[self.db]
+        opts = self.model._meta
+        qn = connection.ops.quote_name
+        table = qn(opts.db_table)
+
+        now = saved_at or timezone.now()
+        state_fields = [opts.get_field(name) for name in STATE_FIELDS]
+        columns = ["user_id", *(field.column for field in state_fields), "version", "created_at", "updated_at"]
+        timestamp = opts.get_field("updated_at").get_db_prep_save(now, connection)
+
+        values, params = [], []
+        row_sql = f"({', '.join(['%s'] * len(columns))})"
+        for user_id, (count, state) in rows.items():
+            values.append(row_sql)
+            params.append(user_id)
+            params.extend(field.get_db_prep_save(state[field.name], connection) for field in state_fields)
+            params.extend([count, timestamp, timestamp])
+
+        updates = [
+            f"{qn(column)} = EXCLUDED.{qn(column)}"
+            for column in [field.column for field in state_fields] + ["updated_at"]
+        ]
+        updates.append(f"{qn('version')} = {table}.{qn('version')} + EXCLUDED.{qn('version')}")
+
+        sql = (
+            f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) VALUES {', '.join(values)} "
+            f"ON CONFLICT ({qn('user_id')}) DO UPDATE SET {', '.join(updates)} "
+            f"RETURNING {qn('user_id')}, {qn('version')}"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return dict(cursor.fetchall())
+
+
+def _from_db(field, value, connection):
+    if hasattr(field, "from_db_value"):
+        return field.from_db_value(value, None, connection)
+    return value
+
 
 class SavedGameData(models.Model):
     user = models.OneToOneField(
@@ -10,15 +204,103 @@ class SavedGameData(models.Model):
     co2_tons = models.FloatField(default=0)
     citizen_satisfaction = models.CharField(max_length=100, blank=True)
     budget = models.IntegerField(default=0)
-    top_tags = models.TextField(blank=True)  # JSON 문자열로 저장
+    top_tags = models.JSONField(default=list, blank=True)  # 태그 문자열 리스트 (GIN 인덱스)
     ai_city_name = models.CharField(max_length=100, blank=True)
+    version = models.PositiveIntegerField(default=1)  # 저장할 때마다 1씩 증가
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SavedGameDataQuerySet.as_manager()
+
     class Meta:
         db_table = 'saved_game_data'
         verbose_name = '저장된 게임 데이터'
         verbose_name_plural = '저장된 게임 데이터들'
+        indexes = [
+            GinIndex(fields=['top_tags'], name='saved_game_top_tags_gin'),
+        ]
 
     def __str__(self):
         return f"{self.user}의 게임 데이터 ({self.updated_at})"
+
+
+def make_delta(previous, current):
+    """직전 상태와 달라진 필드만 남긴다"""
+    return {name: value for name, value in current.items() if previous.get(name) != value}
+
+
+class SavedGameSnapshotQuerySet(models.QuerySet):
+    def build(self, user_id, version, state, previous=None):
+        """저장 이력 한 줄을 만든다 (저장하지 않음, bulk_create용)
+
+        previous는 version - 1 시점의 상태(version 포함)다. 직전 상태를 모르거나
+        키프레임 주기가 되면 전체 상태를, 아니면 달라진 필드만 저장한다.
+        """
+        interval = settings.SAVEGAME_KEYFRAME_INTERVAL
+        is_keyframe = (
+            previous is None
+            or previous.get("version") != version - 1
+            or (version - 1) % interval == 0
+        )
+        data = state if is_keyframe else make_delta(game_state(previous), state)
+        return self.model(user_id=user_id, version=version, is_keyframe=is_keyframe, data=data)
+
+    def append(self, user_id, version, state, previous=None):
+        """저장 이력을 한 줄 추가한다 (build() 참고)"""
+        snapshot = self.build(user_id, version, state, previous)
+        snapshot.save(force_insert=True, using=self.db)
+        return snapshot
+
+    def chain(self, version, **user_lookup):
+        """version을 복원하는 데 필요한 스냅샷(직전 키프레임부터)을 한 번에 가져온다
+
+        user_lookup은 user_id=... 또는 user__kakao_id=... 로 사용자를 지정한다.
+        """
+        keyframe = self.filter(
+            is_keyframe=True, version__lte=version, **user_lookup
+        ).order_by("-version").values("version")[:1]
+        return self.filter(
+            version__lte=version, version__gte=Subquery(keyframe), **user_lookup
+        ).order_by("version")
+
+    def state_at(self, version, **user_lookup):
+        """version 시점의 게임 상태와 저장 시각. 이력이 없으면 None"""
+        snapshots = list(self.chain(version, **user_lookup))
+        return restore(snapshots, version)
+
+
+def restore(snapshots, version):
+    """키프레임부터 version까지 순서대로 정렬된 스냅샷으로 상태를 복원한다"""
+    if not snapshots or not snapshots[0].is_keyframe or snapshots[-1].version != version:
+        return None
+    state = {}
+    for snapshot in snapshots:
+        state.update(snapshot.data)
+    return state, snapshots[-1].created_at
+
+
+class SavedGameSnapshot(models.Model):
+    """게임 저장 이력. 키프레임은 전체 상태, 나머지는 직전 버전에서 달라진 필드만 저장"""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='game_snapshots'
+    )
+    version = models.PositiveIntegerField()
+    is_keyframe = models.BooleanField(default=False)
+    data = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = SavedGameSnapshotQuerySet.as_manager()
+
+    class Meta:
+        db_table = 'saved_game_snapshot'
+        verbose_name = '게임 저장 이력'
+        verbose_name_plural = '게임 저장 이력들'
+        ordering = ['-version']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'version'], name='unique_snapshot_user_version'),
+        ]
+
+    def __str__(self):
+        return f"{self.user}의 게임 저장 이력 v{self.version}"
@@ -11,6 +11,7 @@ class SavedGameDataSerializer(serializers.ModelSerializer):
             "budget",
             "top_tags",
             "ai_city_name",
+            "version",
             "created_at",
             "updated_at",
         ]
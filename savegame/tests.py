@@ -1,3 +1,427 @@
-from django.test import TestCase
+from importlib import import_module
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken
+
+from EcoCity2050_BE import routers
+from EcoCity2050_BE.query_budget import QueryBudgetTestMixin
+from EcoCity2050_BE.routers import REPLICA_DB_ALIAS, STICKY_COOKIE
+
+from . import binary, views
+from .models import SavedGameData, SavedGameSnapshot
+
+User = get_user_model()
+
+KAKAO_ID = "3000000001"
+
+
+def game_state(**overrides):
+    return {
+        "userId": KAKAO_ID,
+        "co2Tons": 1200.5,
+        "citizenSatisfaction": "만족",
+        "budget": 50000,
+        "topTags": ["태양광", "숲"],
+        "aiCityName": "솔빛시",
+        **overrides,
+    }
+
+
+class SaveGameTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"kakao_{KAKAO_ID}", kakao_id=KAKAO_ID)
+
+    def save(self, data):
+        return self.client.post("/save-game/", data, content_type="application/json")
+
+    def test_invalid_numeric_field_is_rejected(self):
+        for field, value in (("co2Tons", "많음"), ("budget", "1.5억"), ("budget", [1]), ("co2Tons", None),
+                             ("budget", None), ("budget", True), ("budget", 10**20)):
+            with self.subTest(field=field, value=value):
+                response = self.save(game_state(**{field: value}))
+                self.assertEqual(response.status_code, 400)
+        self.assertFalse(SavedGameData.objects.exists())
+
+    def test_invalid_text_field_is_rejected(self):
+        for field, value in (("citizenSatisfaction", None), ("aiCityName", None), ("aiCityName", "가" * 101)):
+            with self.subTest(field=field, value=value):
+                self.assertEqual(self.save(game_state(**{field: value})).status_code, 400)
+        self.assertFalse(SavedGameData.objects.exists())
+
+    def test_top_tags_must_be_list_of_strings(self):
+        for value in ("태양광", {"태양광": 1}, ["숲", 3], [["숲"]]):
+            with self.subTest(value=value):
+                self.assertEqual(self.save(game_state(topTags=value)).status_code, 400)
+        self.assertFalse(SavedGameData.objects.exists())
+
+        self.assertEqual(self.save(game_state(topTags=None)).status_code, 200)
+        self.assertEqual(SavedGameData.objects.get(user=self.user).top_tags, [])
+
+    def test_numeric_user_id_is_matched_as_text(self):
+        response = self.save(game_state(userId=int(KAKAO_ID)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(SavedGameData.objects.filter(user=self.user).exists())
+
+    def test_upsert_preps_numeric_kakao_id(self):
+        with CaptureQueriesContext(connection) as queries:
+            SavedGameData.objects.upsert(kakao_id=int(KAKAO_ID), co2_tons=1, budget=1)
+
+        self.assertTrue(SavedGameData.objects.filter(user=self.user).exists())
+        self.assertIn(f"'{KAKAO_ID}'", queries[-1]["sql"])
+
+    def test_form_top_tags_keep_every_value(self):
+        data = {**game_state(), "topTags": ["태양광", "숲"]}
+        self.assertEqual(self.client.post("/save-game/", data).status_code, 200)
+        self.assertEqual(SavedGameData.objects.get(user=self.user).top_tags, ["태양광", "숲"])
+
+    def test_save_increments_version(self):
+        self.assertEqual(self.save(game_state()).json()["version"], 1)
+        self.assertEqual(self.save(game_state(version=1)).json()["version"], 2)
+        self.assertEqual(self.save(game_state(version=1)).status_code, 409)
+
+
+class LoadGameCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"kakao_{KAKAO_ID}", kakao_id=KAKAO_ID)
+
+    def setUp(self):
+        cache.clear()
+
+    def save_elsewhere(self):
+        """이 프로세스에서 저장한 뒤, 다른 워커가 저장한 것처럼 캐시를 거치지 않고 바꾼다"""
+        self.client.post("/save-game/", game_state(), content_type="application/json")
+        SavedGameData.objects.filter(user=self.user).update(version=2, ai_city_name="바람마루")
+
+    def load(self):
+        return self.client.get("/load-game/", {"userId": KAKAO_ID}).json()
+
+    @override_settings(SAVEGAME_CACHE_TTL=0)
+    def test_disabled_cache_reads_latest_save(self):
+        self.save_elsewhere()
+        self.assertEqual(self.load()["version"], 2)
+
+    @override_settings(SAVEGAME_CACHE_TTL=600)
+    def test_enabled_cache_serves_write_through_entry(self):
+        self.save_elsewhere()
+        with self.assertNumQueries(0):
+            # 공유 캐시가 아니면 이렇게 이전 저장을 돌려준다
+            self.assertEqual(self.load()["version"], 1)
+
+
+class LimitParameterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"kakao_{KAKAO_ID}", kakao_id=KAKAO_ID)
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+
+    def setUp(self):
+        for budget in (1, 2, 3):
+            self.client.post("/save-game/", game_state(budget=budget), content_type="application/json")
+
+    def history(self, limit):
+        return self.client.get("/game-history/", {"userId": KAKAO_ID, "limit": limit})
+
+    def players(self, limit):
+        token = AccessToken.for_user(self.admin)
+        return self.client.get("/players-by-tag/", {"tag": "숲", "limit": limit}, HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_history_limit_is_clamped(self):
+        for limit, count in (("-1", 1), ("0", 1), ("2", 2), ("1000", 3)):
+            with self.subTest(limit=limit):
+                response = self.history(limit)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()["history"]), count)
+
+    def test_non_integer_limit_is_rejected(self):
+        for limit in ("abc", "", "1.5"):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.history(limit).status_code, 400)
+                self.assertEqual(self.players(limit).status_code, 400)
+
+    @skipUnless(connection.vendor == "postgresql", "top_tags 포함 검색(@>)은 Postgres 전용")
+    def test_players_limit_is_clamped(self):
+        response = self.players("-1")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["players"]), 1)
+
+
+class LegacyTopTagsMigrationTests(SimpleTestCase):
+    def test_malformed_top_tags_become_empty(self):
+        migration = import_module("savegame.migrations.0003_savedgamesnapshot")
+        for value, tags in (('["숲"]', ["숲"]), ("", []), ("{", []), ('"숲"', []), ("null", [])):
+            with self.subTest(value=value):
+                self.assertEqual(migration._parse_tags(value), tags)
+
+
+@override_settings(SAVEGAME_BINARY_TAG_DICTIONARY=("태양광", "숲", "풍력"))
+class BinaryFormatTests(SimpleTestCase):
+    def test_round_trip(self):
+        data = {
+            **game_state(topTags=["숲", "갯벌"]), "version": 3,
+            "lastSaved": "2026-10-18T09:30:00.000001+00:00", "created": False,
+        }
+        payload = binary.encode(data, settings.SAVEGAME_BINARY_TAG_DICTIONARY)
+
+        self.assertEqual(binary.decode(payload, settings.SAVEGAME_BINARY_TAG_DICTIONARY), data)
+
+    def test_none_fields_are_omitted(self):
+        payload = binary.encode({"userId": KAKAO_ID, "message": None})
+        self.assertEqual(binary.decode(payload), {"userId": KAKAO_ID})
+
+    def test_unknown_field_cannot_be_encoded(self):
+        with self.assertRaises(ValueError):
+            binary.encode({"userId": KAKAO_ID, "password": "x"})
+
+    def test_malformed_payload_is_rejected(self):
+        tags = settings.SAVEGAME_BINARY_TAG_DICTIONARY
+        payload = binary.encode(game_state(topTags=["숲"]), tags)
+        cases = {
+            "헤더 잘림": payload[:3],
+            "본문 잘림": payload[:-1],
+            "남는 바이트": payload + b"\0",
+            "매직 불일치": b"XX" + payload[2:],
+            "포맷 버전 불일치": payload[:2] + bytes([binary.FORMAT_VERSION + 1]) + payload[3:],
+        }
+        for name, value in cases.items():
+            with self.subTest(name):
+                with self.assertRaises(ValueError):
+                    binary.decode(value, tags)
+
+        # 사전 번호로 보낸 태그는 서버 사전이 다르면 풀 수 없다
+        with self.assertRaises(ValueError):
+            binary.decode(payload, ("숲", "태양광"))
+
+
+@override_settings(SAVEGAME_BINARY_TAG_DICTIONARY=("태양광", "숲", "풍력"), SAVEGAME_CACHE_TTL=0)
+class BinaryNegotiationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"kakao_{KAKAO_ID}", kakao_id=KAKAO_ID)
+
+    def encode(self, data, tags=None):
+        return binary.encode(data, settings.SAVEGAME_BINARY_TAG_DICTIONARY if tags is None else tags)
+
+    def save(self, payload, **extra):
+        return self.client.post("/save-game/", payload, content_type=binary.MEDIA_TYPE, **extra)
+
+    def test_binary_request_with_json_response(self):
+        response = self.save(self.encode(game_state(topTags=["숲", "갯벌"])))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(SavedGameData.objects.get(user=self.user).top_tags, ["숲", "갯벌"])
+
+    def test_accept_selects_binary_response(self):
+        response = self.save(self.encode(game_state()), HTTP_ACCEPT=binary.MEDIA_TYPE)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], binary.MEDIA_TYPE)
+        self.assertEqual(binary.decode(response.content)["version"], 1)
+
+    def test_load_game_negotiates_format(self):
+        self.client.post("/save-game/", game_state(topTags=["숲"]), content_type="application/json")
+
+        as_json = self.client.get("/load-game/", {"userId": KAKAO_ID})
+        as_binary = self.client.get("/load-game/", {"userId": KAKAO_ID}, HTTP_ACCEPT=binary.MEDIA_TYPE)
+
+        self.assertEqual(as_json["Content-Type"], "application/json")
+        self.assertEqual(as_binary["Content-Type"], binary.MEDIA_TYPE)
+        decoded = binary.decode(as_binary.content, settings.SAVEGAME_BINARY_TAG_DICTIONARY)
+        self.assertEqual(decoded["topTags"], ["숲"])
+        self.assertEqual(decoded["aiCityName"], as_json.json()["aiCityName"])
+
+    def test_malformed_binary_request_is_rejected(self):
+        payload = self.encode(game_state(topTags=["숲"]))
+        for name, value in (("잘림", payload[:-1]), ("사전 불일치", self.encode(game_state(topTags=["숲"]), ("숲",)))):
+            with self.subTest(name):
+                self.assertEqual(self.save(value).status_code, 400)
+        self.assertFalse(SavedGameData.objects.exists())
+
+    def test_error_response_is_binary_when_accepted(self):
+        response = self.save(self.encode({"userId": KAKAO_ID, "co2Tons": 1.0}) + b"\0", HTTP_ACCEPT=binary.MEDIA_TYPE)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("detail", binary.decode(response.content))
+
+
+class BulkSaveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"kakao_{KAKAO_ID}", kakao_id=KAKAO_ID)
+
+    def bulk_save(self, *saves):
+        response = self.client.post("/save-game/bulk/", {"saves": list(saves)}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_versions_follow_order_within_request(self):
+        results = self.bulk_save(game_state(), game_state(budget=1), game_state(version=1))
+
+        self.assertEqual([result.get("version") for result in results], [1, 2, None])
+        self.assertEqual(results[2]["status"], 409)
+        self.assertEqual(SavedGameData.objects.get(user=self.user).version, 2)
+        self.assertEqual(
+            list(SavedGameSnapshot.objects.filter(user=self.user).values_list("version", flat=True)), [2, 1]
+        )
+
+    def test_invalid_item_gets_its_own_error(self):
+        results = self.bulk_save(game_state(co2Tons=None), game_state(topTags="숲"), game_state())
+
+        self.assertEqual([result["status"] for result in results], [400, 400, 200])
+        self.assertEqual(SavedGameData.objects.get(user=self.user).version, 1)
+
+    def test_first_save_racing_another_save_gets_next_version(self):
+        lock_saved_rows = views._lock_saved_rows
+
+        def concurrent_first_save(user_pks):
+            # 행 잠금 조회 뒤, bulk upsert 전에 다른 요청의 첫 저장이 끝난 경우
+            rows = lock_saved_rows(user_pks)
+            self.client.post("/save-game/", game_state(), content_type="application/json")
+            return rows
+
+        with mock.patch.object(views, "_lock_saved_rows", concurrent_first_save):
+            results = self.bulk_save(game_state(budget=1))
+
+        self.assertEqual(results[0]["version"], 2)
+        self.assertFalse(results[0]["created"])
+        self.assertEqual(SavedGameData.objects.get(user=self.user).version, 2)
+        snapshots = SavedGameSnapshot.objects.filter(user=self.user).order_by("version")
+        self.assertEqual([(s.version, s.is_keyframe) for s in snapshots], [(1, True), (2, True)])
+
+
+@override_settings(SAVEGAME_CACHE_TTL=0)
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """@query_budget을 단 savegame 뷰가 예산 안에서 응답하는지 확인한다 (캐시를 끄고 DB 경로로)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"kakao_{KAKAO_ID}", kakao_id=KAKAO_ID)
+        cls.admin = User.objects.create(username="admin", is_staff=True)
+
+    def setUp(self):
+        self.client.post("/save-game/", game_state(), content_type="application/json")
+        self.client.post("/save-game/", game_state(budget=1), content_type="application/json")
+
+    def get(self, path, **params):
+        return self.assertWithinQueryBudget(self.client.get, path, params)
+
+    @skipUnless(connection.vendor == "postgresql", "예산은 Postgres 기준 (SQLite는 직전 상태를 따로 조회)")
+    def test_save(self):
+        response = self.assertWithinQueryBudget(
+            self.client.post, "/save-game/", game_state(version=2), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.assertWithinQueryBudget(
+            self.client.post, "/save-game/", game_state(version=1), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 409)
+
+    def test_bulk_save(self):
+        other = User.objects.create(username="kakao_3000000002", kakao_id="3000000002")
+        saves = [game_state(budget=2), game_state(userId=other.kakao_id), game_state(userId="3000000003")]
+
+        response = self.assertWithinQueryBudget(
+            self.client.post, "/save-game/bulk/", {"saves": saves}, content_type="application/json"
+        )
+
+        self.assertEqual([result["status"] for result in response.json()["results"]], [200, 200, 404])
+
+    def test_load(self):
+        self.assertEqual(self.get("/load-game/", userId=KAKAO_ID).status_code, 200)
+        self.assertEqual(self.get("/load-game/", userId="3000000003").status_code, 404)
+
+    def test_load_version(self):
+        self.assertEqual(self.get("/load-game/", userId=KAKAO_ID, version=1).status_code, 200)
+        # 없는 버전: 이력 체인 조회가 비면 사용자 확인을 한 번 더 한다
+        self.assertEqual(self.get("/load-game/", userId=KAKAO_ID, version=99).status_code, 404)
+        self.assertEqual(self.get("/load-game/", userId="3000000003", version=1).status_code, 404)
+
+    def test_check_saved_data(self):
+        self.assertTrue(self.get("/check-saved-data/", userId=KAKAO_ID).json()["exists"])
+
+    def test_game_history(self):
+        self.assertEqual(len(self.get("/game-history/", userId=KAKAO_ID).json()["history"]), 2)
+        self.assertEqual(self.get("/game-history/", userId="3000000003").status_code, 404)
+
+    @skipUnless(connection.vendor == "postgresql", "top_tags 포함 검색(@>)은 Postgres 전용")
+    def test_players_by_tag(self):
+        token = AccessToken.for_user(self.admin)
+        response = self.assertWithinQueryBudget(
+            self.client.get, "/players-by-tag/", {"tag": "숲"}, HTTP_AUTHORIZATION=f"Bearer {token}"
+        )
+        self.assertEqual(response.json()["count"], 1)
+
+
+@skipIf(REPLICA_DB_ALIAS in settings.DATABASES, "복제본(DB_REPLICA_HOST)이 설정된 환경에서는 그 alias를 건드리지 않는다")
+@override_settings(SAVEGAME_CACHE_TTL=0)
+class ReplicaRoutingTests(TestCase):
+    """복제본 alias를 따로 둔 SQLite(메모리) DB로 붙여 load-game 읽기 라우팅을 확인한다
+
+    복제본에는 첫 저장만 복사해 두어 복제 지연 중인 상태를 흉내 낸다.
+    """
+
+    # 복제본 alias는 setUpClass에서 붙이므로 "__all__"이 그 시점의 alias(default, replica)가 된다
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        connections.settings[REPLICA_DB_ALIAS] = connections.configure_settings({
+            **connections.settings,
+            REPLICA_DB_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+        })[REPLICA_DB_ALIAS]
+        cls.addClassCleanup(connections.settings.pop, REPLICA_DB_ALIAS)
+        cls.addClassCleanup(connections.__delitem__, REPLICA_DB_ALIAS)
+        # 복제본 스키마는 복제로 따라오므로(allow_migrate) 필요한 테이블만 직접 만든다 (GIN 인덱스는 Postgres 전용)
+        with mock.patch.object(SavedGameData._meta, "indexes", []):
+            with connections[REPLICA_DB_ALIAS].schema_editor() as editor:
+                editor.create_model(User)
+                editor.create_model(SavedGameData)
+        cls.enterClassContext(mock.patch.object(routers, "replica_enabled", return_value=True))
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username=f"kakao_{KAKAO_ID}", kakao_id=KAKAO_ID)
+
+    def setUp(self):
+        cache.clear()
+        self.save(game_state())
+        # 첫 저장까지만 복제된 상태
+        User.objects.get(pk=self.user.pk).save(using=REPLICA_DB_ALIAS, force_insert=True)
+        SavedGameData.objects.get(user=self.user).save(using=REPLICA_DB_ALIAS, force_insert=True)
+
+    def save(self, data):
+        response = self.client.post("/save-game/", data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def load(self, client):
+        return client.get("/load-game/", {"userId": KAKAO_ID}).json()["version"]
+
+    def test_saving_client_reads_own_write(self):
+        response = self.save(game_state(version=1))
+
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertEqual(self.load(self.client), 2)
+
+    def test_other_device_reads_own_write_while_pinned(self):
+        self.save(game_state(version=1))
+
+        # 쿠키가 없는 다른 기기도 같은 사용자는 고정 표시(캐시)로 primary에서 읽는다
+        self.assertEqual(self.load(Client()), 2)
+
+    def test_unpinned_reader_reads_replica(self):
+        self.save(game_state(version=1))
+        cache.clear()  # 고정 표시가 끝난 뒤
+
+        # 아직 복제되지 않은 두 번째 저장은 보이지 않는다
+        self.assertEqual(self.load(Client()), 1)
@@ -3,6 +3,10 @@ from . import views
 
 urlpatterns = [
     path('save-game/', views.save_game_data, name='save_game_data'),
+    path('save-game/bulk/', views.bulk_save_game_data, name='bulk_save_game_data'),
     path('load-game/', views.load_game_data, name='load_game_data'),
+    path('load-game/bulk/', views.bulk_load_game_data, name='bulk_load_game_data'),
+    path('game-history/', views.game_history, name='game_history'),
     path('check-saved-data/', views.check_saved_data_exists, name='check_saved_data_exists'),
+    path('players-by-tag/', views.players_by_tag, name='players_by_tag'),
 ]
\ No newline at end of file
@@ -1,15 +1,128 @@
-from rest_framework.decorators import api_view
+import json
+
+from rest_framework.decorators import api_view, parser_classes, permission_classes, renderer_classes
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import permissions, status
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from .models import SavedGameData
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from EcoCity2050_BE.query_budget import query_budget
+from EcoCity2050_BE.routers import pin_to_primary, replica_reads
+
+from . import cache as savegame_cache
+from .binary import BinarySaveParser, BinarySaveRenderer
+from .models import STATE_FIELDS, SavedGameData, SavedGameSnapshot, game_state
 from .serializers import SavedGameDataSerializer
-import json
 
 User = get_user_model()
 
+# save/load/check는 JSON 외에 바이너리 포맷도 Content-Type/Accept로 고를 수 있다
+SAVE_PARSERS = [*api_settings.DEFAULT_PARSER_CLASSES, BinarySaveParser]
+SAVE_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, BinarySaveRenderer]
+
+
+def _game_data(state, version, saved_at):
+    return {
+        "co2Tons": state["co2_tons"],
+        "citizenSatisfaction": state["citizen_satisfaction"],
+        "budget": state["budget"],
+        "topTags": state["top_tags"],
+        "aiCityName": state["ai_city_name"],
+        "version": version,
+        "lastSaved": saved_at.isoformat()
+    }
+
+
+def _load_game_data(user_id):
+    """캐시를 먼저 보고, 없으면 DB에서 읽어 캐시에 채운다 (저장이 없으면 None)
+
+    사용자가 없으면 User.DoesNotExist가 발생한다.
+    """
+    found, game_data = savegame_cache.get(user_id)
+    if found:
+        return game_data
+
+    # 사용자와 저장 데이터를 LEFT JOIN 한 번으로 가져온다
+    user = User.objects.select_related("saved_game").get(kakao_id=user_id)
+    saved_data = getattr(user, "saved_game", None)
+    game_data = None
+    if saved_data is not None:
+        state = game_state({name: getattr(saved_data, name) for name in STATE_FIELDS})
+        game_data = _game_data(state, saved_data.version, saved_data.updated_at)
+
+    savegame_cache.set(user_id, game_data)
+    return game_data
+
+
+def _parse_version(value):
+    if value is None:
+        return None
+    return int(value)
 
+
+def _request_state(data):
+    """요청 본문(dict)에서 저장할 게임 상태를 뽑는다
+
+    null, 숫자가 아닌 값(true/false 포함), 길이/범위를 넘는 값, 문자열 목록이 아닌 topTags는
+    DB에 가기 전에 ValidationError로 거절한다.
+    """
+    if hasattr(data, "getlist"):
+        # 폼 요청은 topTags를 여러 번 보낸다 (get()은 마지막 값 하나만 준다)
+        top_tags = data.getlist("topTags")
+    else:
+        top_tags = data.get("topTags", []) or []
+    values = {
+        "co2_tons": data.get("co2Tons", 0),
+        "citizen_satisfaction": data.get("citizenSatisfaction", ""),
+        "budget": data.get("budget", 0),
+        "top_tags": top_tags,
+        "ai_city_name": data.get("aiCityName", ""),
+    }
+    for name, value in values.items():
+        if name == "top_tags":
+            # 문자열을 list()로 바꾸면 글자 단위로, dict면 키만 남으므로 목록/문자열 타입을 확인한다
+            if not isinstance(value, list) or not all(isinstance(tag, str) for tag in value):
+                raise ValidationError("topTags는 문자열 목록이어야 합니다.")
+            continue
+        if isinstance(value, bool):
+            raise ValidationError(f"{name} 값이 올바르지 않습니다.")
+        # null/형식/max_length/정수 범위 검사 (모델 필드와 같은 규칙)
+        SavedGameData._meta.get_field(name).clean(value, None)
+    return game_state(values)
+
+
+def _parse_limit(value, default, maximum):
+    """limit 쿼리 파라미터 (없으면 default, 1..maximum으로 자름). 정수가 아니면 ValueError"""
+    if value is None:
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def _parse_user_ids(value):
+    """bulk API의 userId 목록 검사 (중복은 순서를 유지한 채 제거). 잘못되면 에러 Response"""
+    if not isinstance(value, list) or not value:
+        return None, Response(
+            {"error": "userIds 목록이 필요합니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(value) > settings.SAVEGAME_BULK_MAX_ITEMS:
+        return None, Response(
+            {"error": f"한 번에 최대 {settings.SAVEGAME_BULK_MAX_ITEMS}명까지 요청할 수 있습니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return list(dict.fromkeys(str(user_id) for user_id in value)), None
+
+
+# Postgres 기준: upsert 1 + 이력 1 (충돌/없는 사용자면 upsert 1 + 현재 version 조회 1)
+@query_budget(2)
 @api_view(["POST"])
+@parser_classes(SAVE_PARSERS)
+@renderer_classes(SAVE_RENDERERS)
 def save_game_data(request):
     """
     게임 데이터를 저장하는 API
@@ -21,44 +134,205 @@ def save_game_data(request):
             {"error": "사용자 인증이 필요합니다."},
             status=status.HTTP_401_UNAUTHORIZED
         )
+    # JSON 숫자로 온 userId도 kakao_id(문자열)로 비교한다
+    user_id = str(user_id)
 
+    # 클라이언트가 마지막으로 불러온/저장한 version (없으면 무조건 덮어씀)
     try:
-        user = User.objects.get(kakao_id=user_id)  # 카카오 ID로 사용자 찾기
-    except User.DoesNotExist:
+        expected_version = _parse_version(request.data.get("version"))
+    except (TypeError, ValueError):
         return Response(
-            {"error": "사용자를 찾을 수 없습니다."},
-            status=status.HTTP_404_NOT_FOUND
+            {"error": "version은 정수여야 합니다."},
+            status=status.HTTP_400_BAD_REQUEST
         )
 
     # 게임 데이터 추출
-    co2_tons = request.data.get("co2Tons", 0)
-    citizen_satisfaction = request.data.get("citizenSatisfaction", "")
-    budget = request.data.get("budget", 0)
-    top_tags = request.data.get("topTags", []) or []
-    ai_city_name = request.data.get("aiCityName", "")
-
-    # 기존 저장된 데이터가 있으면 업데이트, 없으면 새로 생성
-    saved_data, created = SavedGameData.objects.update_or_create(
-        user=user,
-        defaults={
-            'co2_tons': co2_tons,
-            'citizen_satisfaction': citizen_satisfaction,
-            'budget': budget,
-            'top_tags': json.dumps(top_tags),
-            'ai_city_name': ai_city_name,
-        }
-    )
+    try:
+        state = _request_state(request.data)
+    except (TypeError, ValueError, ValidationError):
+        return Response(
+            {"error": "게임 데이터 형식이 올바르지 않습니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-    return Response({
+    saved_at = timezone.now()
+    with transaction.atomic():
+        # 기존 저장된 데이터가 있으면 업데이트, 없으면 새로 생성
+        # (카카오 ID로 사용자 찾기까지 단일 INSERT ... SELECT ... ON CONFLICT)
+        result = SavedGameData.objects.upsert(
+            kakao_id=user_id,
+            expected_version=expected_version,
+            with_previous=True,
+            saved_at=saved_at,
+            co2_tons=state["co2_tons"],
+            citizen_satisfaction=state["citizen_satisfaction"],
+            budget=state["budget"],
+            top_tags=state["top_tags"],
+            ai_city_name=state["ai_city_name"],
+        )
+        if result is not None:
+            # 저장 이력 추가 (직전 버전과 달라진 필드만)
+            SavedGameSnapshot.objects.append(result.user_id, result.version, state, result.previous)
+
+    if result is None:
+        current = list(User.objects.filter(kakao_id=user_id).values_list("saved_game__version", flat=True))
+        if not current:
+            return Response(
+                {"error": "사용자를 찾을 수 없습니다."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        # 다른 기기에서 더 최신 데이터가 저장됨
+        current_version = current[0]
+        return Response({
+            "error": "더 최신 저장 데이터가 있습니다. 다시 불러온 뒤 저장하세요.",
+            "currentVersion": current_version
+        }, status=status.HTTP_409_CONFLICT)
+
+    # 캐시도 바로 갱신 (write-through)
+    savegame_cache.set(user_id, _game_data(state, result.version, saved_at))
+
+    response = Response({
         "message": "게임 데이터가 저장되었습니다.",
-        "created": created
+        "created": result.version == 1,
+        "version": result.version
     }, status=status.HTTP_200_OK)
+    # 복제 지연 동안 이 사용자의 load/check는 primary에서 읽는다
+    pin_to_primary([user_id], response)
+    return response
+
+
+def _lock_saved_rows(user_pks):
+    """현재 저장 데이터 {user pk: version과 게임 상태} (트랜잭션이 끝날 때까지 행 잠금)"""
+    return {
+        row["user_id"]: row
+        for row in SavedGameData.objects.select_for_update()
+        .filter(user_id__in=user_pks)
+        .values("user_id", "version", *STATE_FIELDS)
+    }
+
+
+# 항목 수와 무관: 사용자 IN 조회, 현재 행 잠금 조회, bulk upsert, 이력 bulk insert
+@query_budget(4)
+@api_view(["POST"])
+def bulk_save_game_data(request):
+    """
+    여러 사용자의 게임 데이터를 한 번에 저장하는 API (오프라인 저장 동기화/운영 도구용)
 
+    saves 항목을 순서대로 적용하고(같은 사용자가 여러 번 나오면 차례로 version을 올림)
+    결과는 항목별 status로 돌려준다. 조회는 IN 쿼리, 저장은 bulk upsert 한 번이다.
+    """
+    saves = request.data.get("saves")
+    if not isinstance(saves, list) or not saves:
+        return Response(
+            {"error": "saves 목록이 필요합니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(saves) > settings.SAVEGAME_BULK_MAX_ITEMS:
+        return Response(
+            {"error": f"한 번에 최대 {settings.SAVEGAME_BULK_MAX_ITEMS}개까지 저장할 수 있습니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    results = [None] * len(saves)
+    items = []
+    for index, item in enumerate(saves):
+        if not isinstance(item, dict) or not item.get("userId"):
+            results[index] = {"status": status.HTTP_401_UNAUTHORIZED, "error": "사용자 인증이 필요합니다."}
+            continue
+        user_id = str(item["userId"])
+        try:
+            expected_version = _parse_version(item.get("version"))
+            state = _request_state(item)
+        except (TypeError, ValueError, ValidationError):
+            results[index] = {
+                "userId": user_id,
+                "status": status.HTTP_400_BAD_REQUEST,
+                "error": "게임 데이터 형식이 올바르지 않습니다."
+            }
+            continue
+        items.append((index, user_id, expected_version, state))
+
+    accepted = {}  # user pk -> [(항목 index, 게임 상태)] 적용 순서대로
+    saved_at = timezone.now()
+    with transaction.atomic():
+        user_pks = dict(
+            User.objects.filter(kakao_id__in={item[1] for item in items}).values_list("kakao_id", "pk")
+        )
+        kakao_ids = {pk: user_id for user_id, pk in user_pks.items()}
+        locked = _lock_saved_rows(user_pks.values())
+        current = dict(locked)
 
+        for index, user_id, expected_version, state in items:
+            pk = user_pks.get(user_id)
+            if pk is None:
+                results[index] = {
+                    "userId": user_id,
+                    "status": status.HTTP_404_NOT_FOUND,
+                    "error": "사용자를 찾을 수 없습니다."
+                }
+                continue
+
+            previous = current.get(pk)
+            if previous is not None and expected_version is not None and expected_version != previous["version"]:
+                results[index] = {
+                    "userId": user_id,
+                    "status": status.HTTP_409_CONFLICT,
+                    "error": "더 최신 저장 데이터가 있습니다. 다시 불러온 뒤 저장하세요.",
+                    "currentVersion": previous["version"]
+                }
+                continue
+
+            current[pk] = {"version": previous["version"] + 1 if previous is not None else 1, **state}
+            accepted.setdefault(pk, []).append((index, state))
+
+        versions = {}
+        if accepted:
+            # INSERT ... ON CONFLICT (user_id) DO UPDATE 한 문장. version은 DB에서 저장 횟수만큼 올린다
+            # (아직 행이 없던 사용자는 잠글 행이 없어 동시 저장과 겹칠 수 있으므로 위에서 센 값을 쓰지 않는다)
+            versions = SavedGameData.objects.bulk_upsert(
+                {pk: (len(entries), entries[-1][1]) for pk, entries in accepted.items()},
+                saved_at=saved_at,
+            )
+
+            snapshots = []
+            for pk, entries in accepted.items():
+                first = versions[pk] - len(entries) + 1
+                previous = locked.get(pk)
+                if previous is not None and previous["version"] != first - 1:
+                    previous = None  # 그 사이 다른 저장이 끼었으면 키프레임으로 남긴다
+                for version, (index, state) in enumerate(entries, first):
+                    snapshots.append(SavedGameSnapshot.objects.build(pk, version, state, previous))
+                    previous = {"version": version, **state}
+                    results[index] = {
+                        "userId": kakao_ids[pk],
+                        "status": status.HTTP_200_OK,
+                        "created": version == 1,
+                        "version": version
+                    }
+            SavedGameSnapshot.objects.bulk_create(snapshots)
+
+    # 캐시도 바로 갱신 (write-through)
+    savegame_cache.set_many({
+        kakao_ids[pk]: _game_data(entries[-1][1], versions[pk], saved_at)
+        for pk, entries in accepted.items()
+    })
+
+    response = Response({
+        "saved": sum(1 for result in results if result["status"] == status.HTTP_200_OK),
+        "results": results
+    }, status=status.HTTP_200_OK)
+    pin_to_primary([kakao_ids[pk] for pk in accepted], response)
+    return response
+
+
+# 캐시 미스일 때 사용자+저장 데이터 JOIN 1 (version 지정 시 이력 체인 1, 그 버전이 없으면 사용자 확인 1)
+@query_budget(2)
+@replica_reads
 @api_view(["GET"])
+@renderer_classes(SAVE_RENDERERS)
 def load_game_data(request):
     """
-    저장된 게임 데이터를 불러오는 API
+    저장된 게임 데이터를 불러오는 API (version을 주면 저장 이력에서 해당 버전을 복원)
     """
     user_id = request.query_params.get("userId")
     if not user_id:
@@ -68,34 +342,125 @@ def load_game_data(request):
         )
 
     try:
-        user = User.objects.get(kakao_id=user_id)
-        saved_data = SavedGameData.objects.get(user=user)
+        version = _parse_version(request.query_params.get("version"))
+    except ValueError:
+        return Response(
+            {"error": "version은 정수여야 합니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-        # JSON 형태로 저장된 top_tags를 리스트로 변환
-        top_tags = json.loads(saved_data.top_tags) if saved_data.top_tags else []
+    try:
+        if version is not None:
+            restored = SavedGameSnapshot.objects.state_at(version, user__kakao_id=user_id)
+            if restored is None:
+                if not User.objects.filter(kakao_id=user_id).exists():
+                    raise User.DoesNotExist
+                return Response(
+                    {"error": "해당 버전의 저장 데이터가 없습니다."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            state, saved_at = restored
+            return Response(_game_data(state, version, saved_at), status=status.HTTP_200_OK)
 
-        return Response({
-            "co2Tons": saved_data.co2_tons,
-            "citizenSatisfaction": saved_data.citizen_satisfaction,
-            "budget": saved_data.budget,
-            "topTags": top_tags,
-            "aiCityName": saved_data.ai_city_name,
-            "lastSaved": saved_data.updated_at.isoformat()
-        }, status=status.HTTP_200_OK)
+        game_data = _load_game_data(user_id)
 
     except User.DoesNotExist:
         return Response(
             {"error": "사용자를 찾을 수 없습니다."},
             status=status.HTTP_404_NOT_FOUND
         )
-    except SavedGameData.DoesNotExist:
+
+    if game_data is None:
         return Response(
             {"error": "저장된 게임 데이터가 없습니다."},
             status=status.HTTP_404_NOT_FOUND
         )
 
+    return Response(game_data, status=status.HTTP_200_OK)
+
+
+def _ndjson_game_data(user_ids):
+    """사용자별 게임 데이터를 한 줄씩 JSON으로 만든다 (IN 조회 한 번, 청크 단위로 읽음)"""
+    missing = dict.fromkeys(user_ids)
+    users = (
+        User.objects.filter(kakao_id__in=user_ids)
+        .select_related("saved_game")
+        .order_by("pk")
+    )
+    for user in users.iterator(chunk_size=500):
+        missing.pop(user.kakao_id, None)
+        saved_data = getattr(user, "saved_game", None)
+        if saved_data is None:
+            line = {"userId": user.kakao_id, "error": "저장된 게임 데이터가 없습니다."}
+        else:
+            state = game_state({name: getattr(saved_data, name) for name in STATE_FIELDS})
+            line = {"userId": user.kakao_id, **_game_data(state, saved_data.version, saved_data.updated_at)}
+        yield json.dumps(line, ensure_ascii=False) + "\n"
+
+    for user_id in missing:
+        yield json.dumps({"userId": user_id, "error": "사용자를 찾을 수 없습니다."}, ensure_ascii=False) + "\n"
+
+
+@api_view(["POST"])
+def bulk_load_game_data(request):
+    """
+    여러 사용자의 저장 데이터를 NDJSON(한 줄에 한 사용자)으로 흘려보내는 API
+    """
+    user_ids, error = _parse_user_ids(request.data.get("userIds"))
+    if error is not None:
+        return error
+
+    return StreamingHttpResponse(_ndjson_game_data(user_ids), content_type="application/x-ndjson")
+
 
+# 이력 1 (이력이 없으면 사용자 확인 1)
+@query_budget(2)
 @api_view(["GET"])
+def game_history(request):
+    """
+    게임 저장 이력(버전 목록)을 최신순으로 보여주는 API
+    """
+    user_id = request.query_params.get("userId")
+    if not user_id:
+        return Response(
+            {"error": "사용자 인증이 필요합니다."},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    try:
+        limit = _parse_limit(request.query_params.get("limit"), default=50, maximum=200)
+    except ValueError:
+        return Response(
+            {"error": "limit은 정수여야 합니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    snapshots = list(SavedGameSnapshot.objects.filter(user__kakao_id=user_id).values(
+        "version", "is_keyframe", "created_at"
+    )[:limit])
+
+    if not snapshots and not User.objects.filter(kakao_id=user_id).exists():
+        return Response(
+            {"error": "사용자를 찾을 수 없습니다."},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    return Response({
+        "history": [
+            {
+                "version": snapshot["version"],
+                "keyframe": snapshot["is_keyframe"],
+                "savedAt": snapshot["created_at"].isoformat()
+            }
+            for snapshot in snapshots
+        ]
+    }, status=status.HTTP_200_OK)
+
+
+@query_budget(1)
+@replica_reads
+@api_view(["GET"])
+@renderer_classes(SAVE_RENDERERS)
 def check_saved_data_exists(request):
     """
     저장된 데이터가 존재하는지 확인하는 API
@@ -108,8 +473,8 @@ def check_saved_data_exists(request):
         )
 
     try:
-        user = User.objects.get(kakao_id=user_id)
-        exists = SavedGameData.objects.filter(user=user).exists()
+        # load-game과 같은 캐시 항목으로 응답 (미스면 게임 데이터까지 채워 둔다)
+        exists = _load_game_data(user_id) is not None
 
         return Response({
             "exists": exists
@@ -119,4 +484,44 @@ def check_saved_data_exists(request):
         return Response(
             {"exists": False, "error": "사용자를 찾을 수 없습니다."},
             status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+        )
+
+
+# 인증 사용자 1 + 목록 1 + 개수 1
+@query_budget(3)
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def players_by_tag(request):
+    """
+    도시 태그로 플레이어를 찾는 분석용 API (관리자 전용, top_tags GIN 인덱스 사용)
+    """
+    tag = request.query_params.get("tag")
+    if not tag:
+        return Response(
+            {"error": "tag 파라미터가 필요합니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        limit = _parse_limit(request.query_params.get("limit"), default=100, maximum=1000)
+    except ValueError:
+        return Response(
+            {"error": "limit은 정수여야 합니다."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    queryset = SavedGameData.objects.with_tag(tag)
+    players = queryset.order_by("user_id").values("user__kakao_id", "ai_city_name", "updated_at")[:limit]
+
+    return Response({
+        "tag": tag,
+        "count": queryset.count(),
+        "players": [
+            {
+                "userId": player["user__kakao_id"],
+                "aiCityName": player["ai_city_name"],
+                "lastSaved": player["updated_at"].isoformat()
+            }
+            for player in players
+        ]
+    }, status=status.HTTP_200_OK)
@@ -0,0 +1,41 @@
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+from .tokens import USER_CLAIMS
+
+
+class ClaimsUser(TokenUser):
+    """서명된 토큰 클레임만으로 만든 가벼운 사용자 (DB 행을 읽지 않음)
+
+    is_staff/is_superuser 클레임은 없으므로 항상 False다. 사용자 행을 읽지 않으므로
+    토큰이 만료될 때까지는 삭제/비활성화된 사용자도 인증된다.
+    """
+
+    @cached_property
+    def first_name(self):
+        return self.token.get("nickname", "")
+
+    @cached_property
+    def last_name(self):
+        return self.token.get("last_name", "")
+
+    @cached_property
+    def email(self):
+        return self.token.get("email", "")
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """토큰 클레임을 믿고 DB 조회 없이 인증한다
+
+    기본 인증은 JWTAuthentication이고, 자주 불리며 사용자 상태가 중요하지 않은
+    뷰(프로필, 로그아웃)만 authentication_classes로 이것을 쓴다.
+
+    사용자 정보 클레임이 없는 (UserClaimsRefreshToken 이전에 발급된) 토큰은
+    기존처럼 DB에서 사용자를 읽는다.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
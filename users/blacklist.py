@@ -0,0 +1,153 @@
+"""JWT 블랙리스트 조회 앞단 (블룸 필터 + 최근 항목)
+
+토큰을 refresh할 때마다 BlacklistedToken을 조회하는 대신,
+    1) 이 프로세스가 최근 블랙리스트에 넣은 jti 집합
+    2) 만료되지 않은 블랙리스트 jti로 주기적으로 다시 만드는 블룸 필터
+    3) 필터를 만든 뒤 다른 프로세스가 넣은 jti를 위한 공유 캐시 표시
+순으로 확인한다. DB는 블룸 필터가 "있을 수도 있다"고 할 때(또는 필터가 오래됐을 때)만 읽는다.
+여러 워커로 배포하면 JWT_BLACKLIST_CACHE가 Redis 같은 공유 캐시여야 한다.
+"""
+import functools
+import hashlib
+import logging
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # 더블 해싱: h1 + i * h2
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class BlacklistFilter:
+    def __init__(self, rebuild_interval, cache_alias):
+        self.rebuild_interval = rebuild_interval
+        self.cache = caches[cache_alias]
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = 0.0  # 필터를 만들기 시작한 시각 (monotonic)
+        self._rebuilding = False
+        self._recent = {}  # jti -> 추가 시각 (monotonic)
+        self._stats = Counter()
+
+    @staticmethod
+    def _key(jti):
+        return f"jwt_blacklist:v1:{jti}"
+
+    @property
+    def marker_ttl(self):
+        # 모든 프로세스가 필터를 다시 만들 때까지 남아 있으면 된다
+        return self.rebuild_interval * 2 + 60
+
+    def add(self, jti, exp):
+        """방금 블랙리스트에 넣은 jti를 기록한다 (DB 저장 뒤 호출)"""
+        with self._lock:
+            self._recent[jti] = time.monotonic()
+        remaining = exp - timezone.now().timestamp()
+        if remaining > 0:
+            self.cache.set(self._key(jti), True, min(remaining, self.marker_ttl))
+
+    def _count(self, *keys):
+        with self._lock:
+            self._stats.update(keys)
+
+    def is_blacklisted(self, jti):
+        with self._lock:
+            self._stats["checks"] += 1
+            if jti in self._recent:
+                self._stats["recent_hits"] += 1
+                return True
+            bloom, built_at = self._bloom, self._built_at
+
+        age = time.monotonic() - built_at
+        if bloom is None or age >= self.rebuild_interval:
+            self._schedule_rebuild(wait=bloom is None)
+            with self._lock:
+                bloom, built_at = self._bloom, self._built_at
+            age = time.monotonic() - built_at
+
+        # 필터가 없거나 표시 TTL보다 오래됐으면 필터/표시를 믿을 수 없으므로 DB 조회
+        if bloom is None or age >= self.marker_ttl or jti in bloom:
+            self._count("db_checks")
+            return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+        if self.cache.get(self._key(jti)) is not None:
+            self._count("bloom_negatives", "cache_hits")
+            return True
+        self._count("bloom_negatives")
+        return False
+
+    def _schedule_rebuild(self, wait):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        if wait:
+            # 요청 스레드에서 바로 만든다 (요청의 DB 연결/트랜잭션은 그대로 둔다)
+            self._rebuild()
+            return
+        threading.Thread(target=self._rebuild_in_background, name="jwt-blacklist-bloom", daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            self._rebuild()
+        finally:
+            # 이 스레드가 연 DB 연결만 닫는다
+            connections.close_all()
+
+    def _rebuild(self):
+        started = time.monotonic()
+        try:
+            jtis = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).values_list(
+                "token__jti", flat=True
+            )
+            bloom = BloomFilter(int(jtis.count() * 1.5) + 1024)
+            for jti in jtis.iterator(chunk_size=10000):
+                bloom.add(jti)
+            with self._lock:
+                self._bloom, self._built_at = bloom, started
+                # 조회를 시작한 뒤에 추가된 항목은 새 필터에 없을 수 있으므로 남긴다
+                self._recent = {jti: added for jti, added in self._recent.items() if added >= started}
+                self._stats["rebuilds"] += 1
+        except Exception:
+            logger.exception("JWT 블랙리스트 블룸 필터 생성 실패")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def get_stats(self):
+        with self._lock:
+            age = time.monotonic() - self._built_at if self._bloom is not None else None
+            return {**self._stats, "recent": len(self._recent), "bloom_age": age}
+
+
+@functools.cache
+def get_blacklist_filter():
+    return BlacklistFilter(settings.JWT_BLACKLIST_BLOOM_REBUILD, settings.JWT_BLACKLIST_CACHE)
@@ -0,0 +1,189 @@
+"""외부 제공자(카카오 등) 호출용 공용 HTTP 클라이언트
+
+모든 스레드가 연결 풀(HTTPAdapter) 하나를 같이 써서 호스트별 keep-alive 연결을
+재사용한다. requests.Session은 스레드 안전하지 않으므로 세션은 스레드마다 만들고
+어댑터만 공유한다. 멱등 요청(GET)만 지터가 섞인 지수 백오프로 재시도하고,
+호스트별 응답 시간을 모아 get_stats()로 보여준다.
+
+async 뷰는 arequest()를 쓴다 (이벤트 루프마다 httpx.AsyncClient 하나, 같은 재시도 규칙과 통계).
+"""
+import asyncio
+import bisect
+import functools
+import random
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from EcoCity2050_BE.instrumentation import record_outbound
+
+# 재시도해도 되는 메서드와 응답 코드
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = (502, 503, 504)
+
+# 응답 시간 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+class HostLatency:
+    """호스트 하나의 요청 수, 실패 수, 응답 시간 합/최대, 구간별 개수"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # 마지막 칸은 +Inf
+
+    def record(self, elapsed, failed):
+        self.count += 1
+        self.errors += failed
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+            "total_seconds": self.total,
+            "buckets": dict(zip(LATENCY_BUCKETS + (float("inf"),), self.buckets)),
+        }
+
+
+_stats_lock = threading.Lock()
+_stats = {}  # host -> HostLatency
+
+
+def _record(host, elapsed, failed):
+    with _stats_lock:
+        _stats.setdefault(host, HostLatency()).record(elapsed, failed)
+    record_outbound(elapsed)
+
+
+def get_stats():
+    """호스트별 응답 시간 통계"""
+    with _stats_lock:
+        return {host: latency.as_dict() for host, latency in _stats.items()}
+
+
+@functools.cache
+def get_adapter():
+    """프로세스 공용 연결 풀"""
+    retry = Retry(
+        total=settings.OUTBOUND_HTTP_RETRIES,
+        # 연결 실패는 요청이 나가기 전이라 모든 메서드를 재시도하지만,
+        # 읽기 실패/5xx 재시도는 GET만 (토큰 교환 POST가 두 번 나가지 않게)
+        allowed_methods=IDEMPOTENT_METHODS,
+        status_forcelist=RETRY_STATUSES,
+        backoff_factor=settings.OUTBOUND_HTTP_BACKOFF,
+        backoff_jitter=settings.OUTBOUND_HTTP_BACKOFF,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=settings.OUTBOUND_HTTP_POOL_HOSTS,
+        pool_maxsize=settings.OUTBOUND_HTTP_POOL_SIZE,
+        max_retries=retry,
+    )
+
+
+def get_session():
+    """현재 스레드의 세션 (공용 어댑터 사용)"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = get_adapter()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def request(method, url, **kwargs):
+    """requests.request와 같지만 연결을 재사용하고 호스트별 응답 시간을 기록한다"""
+    kwargs.setdefault("timeout", settings.OUTBOUND_HTTP_TIMEOUT)
+    host = urlsplit(url).netloc
+    started = time.perf_counter()
+    failed = True
+    try:
+        response = get_session().request(method, url, **kwargs)
+        failed = response.status_code >= 500
+        return response
+    finally:
+        _record(host, time.perf_counter() - started, failed)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+_async_clients = weakref.WeakKeyDictionary()  # 이벤트 루프 -> httpx.AsyncClient
+
+
+def get_async_client():
+    """현재 이벤트 루프의 AsyncClient (루프 안에서 연결을 재사용)"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        limits = httpx.Limits(
+            max_connections=settings.OUTBOUND_HTTP_ASYNC_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OUTBOUND_HTTP_POOL_SIZE,
+        )
+        # transport의 retries는 연결 실패만 재시도한다 (모든 메서드에 안전)
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=settings.OUTBOUND_HTTP_RETRIES)
+        client = httpx.AsyncClient(transport=transport, timeout=settings.OUTBOUND_HTTP_TIMEOUT)
+        _async_clients[loop] = client
+    return client
+
+
+def _backoff(attempt):
+    """urllib3 Retry와 같은 지수 백오프 + 지터 (초)"""
+    base = settings.OUTBOUND_HTTP_BACKOFF
+    return base * (2 ** attempt) + random.uniform(0, base)
+
+
+async def arequest(method, url, **kwargs):
+    """request()의 async 버전. 응답은 httpx.Response, 실패는 httpx.HTTPError"""
+    client = get_async_client()
+    attempts = settings.OUTBOUND_HTTP_RETRIES + 1 if method in IDEMPOTENT_METHODS else 1
+    host = urlsplit(url).netloc
+    started = time.perf_counter()
+    failed = True
+    try:
+        for attempt in range(attempts):
+            last = attempt + 1 == attempts
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                if last:
+                    raise
+            else:
+                if last or response.status_code not in RETRY_STATUSES:
+                    failed = response.status_code >= 500
+                    return response
+            await asyncio.sleep(_backoff(attempt))
+    finally:
+        _record(host, time.perf_counter() - started, failed)
+
+
+async def aget(url, **kwargs):
+    return await arequest("GET", url, **kwargs)
+
+
+async def apost(url, **kwargs):
+    return await arequest("POST", url, **kwargs)
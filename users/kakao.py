@@ -0,0 +1,263 @@
+"""카카오 로그인 공용 도우미 (동기 KakaoCallbackView와 async 콜백이 같이 쓴다)"""
+import threading
+import time
+from collections import namedtuple
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+from allauth.socialaccount.models import SocialApp
+
+from . import http_client
+from .serializers import UserSerializer
+from .tokens import UserClaimsRefreshToken
+
+User = get_user_model()
+
+# 카카오 SocialApp에서 로그인에 필요한 값만 뽑은 것
+KakaoAppConfig = namedtuple("KakaoAppConfig", ["client_id", "secret"])
+
+_lock = threading.Lock()
+_cached = None  # (만료 시각, KakaoAppConfig 또는 None)
+
+
+def get_kakao_app():
+    """카카오 SocialApp 설정 (없으면 None)
+
+    프로세스 안에서 KAKAO_APP_CACHE_TTL초 동안 캐시한다. admin에서 SocialApp을
+    고치면 시그널로 이 프로세스의 캐시는 바로 지워지고, 다른 워커는 TTL이 지나면 반영된다.
+    """
+    global _cached
+
+    cached = _cached
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    try:
+        social_app = SocialApp.objects.get(provider='kakao')
+        config = KakaoAppConfig(social_app.client_id, social_app.secret or "")
+    except SocialApp.DoesNotExist:
+        config = None
+
+    with _lock:
+        _cached = (time.monotonic() + settings.KAKAO_APP_CACHE_TTL, config)
+    return config
+
+
+async def aget_kakao_app():
+    cached = _cached
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    return await sync_to_async(get_kakao_app)()
+
+
+def clear_kakao_app_cache():
+    global _cached
+
+    with _lock:
+        _cached = None
+
+
+class KakaoLoginError(Exception):
+    """카카오 연동 실패. body는 그대로 400 응답 본문으로 쓴다"""
+
+    def __init__(self, body):
+        super().__init__(body.get("error"))
+        self.body = body
+
+
+def _token_request(social_app, callback_url, code):
+    url = f"{settings.KAKAO_AUTH_URL}/oauth/token"
+    data = {
+        "grant_type": "authorization_code",
+        "client_id": social_app.client_id,
+        "redirect_uri": callback_url,
+        "code": code,
+    }
+    # client_secret이 설정되어 있으면 포함
+    if social_app.secret:
+        data["client_secret"] = social_app.secret
+    return url, data
+
+
+def _access_token(token_json):
+    access_token = token_json.get("access_token")
+    if not access_token:
+        raise KakaoLoginError({"error": "카카오에서 access_token을 받지 못했습니다.", "detail": token_json})
+    return access_token
+
+
+def _user_info_request(access_token):
+    return f"{settings.KAKAO_API_URL}/v2/user/me", {"Authorization": f"Bearer {access_token}"}
+
+
+def parse_user_info(user_json):
+    """카카오 사용자 정보에서 (회원번호, 닉네임)"""
+    kakao_id = user_json.get("id")
+    # nickname 위치는 카카오 응답 구조에 따라 다를 수 있으므로 안전하게 추출
+    kakao_account = user_json.get("kakao_account", {})
+    profile = kakao_account.get("profile", {}) if isinstance(kakao_account, dict) else {}
+    nickname = profile.get("nickname") or ""
+
+    if not kakao_id:
+        raise KakaoLoginError({"error": "카카오 ID를 가져오지 못했습니다.", "detail": user_json})
+    return kakao_id, nickname
+
+
+def fetch_user_info(social_app, callback_url, code):
+    """인가 코드로 토큰을 교환하고 사용자 정보를 조회한다"""
+    # 1) 코드 -> 액세스 토큰 교환
+    url, data = _token_request(social_app, callback_url, code)
+    try:
+        token_resp = http_client.post(url, data=data)
+        token_resp.raise_for_status()
+        token_json = token_resp.json()
+    except requests.RequestException as e:
+        raise KakaoLoginError({"error": f"카카오 토큰 교환 실패: {str(e)}"})
+
+    # 2) 사용자 정보 조회
+    url, headers = _user_info_request(_access_token(token_json))
+    try:
+        user_resp = http_client.get(url, headers=headers)
+        user_resp.raise_for_status()
+        return user_resp.json()
+    except requests.RequestException as e:
+        raise KakaoLoginError({"error": f"카카오 사용자 정보 조회 실패: {str(e)}"})
+
+
+async def afetch_user_info(social_app, callback_url, code):
+    """fetch_user_info()의 async 버전"""
+    url, data = _token_request(social_app, callback_url, code)
+    try:
+        token_resp = await http_client.apost(url, data=data)
+        token_resp.raise_for_status()
+        token_json = token_resp.json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise KakaoLoginError({"error": f"카카오 토큰 교환 실패: {str(e) or type(e).__name__}"})
+
+    url, headers = _user_info_request(_access_token(token_json))
+    try:
+        user_resp = await http_client.aget(url, headers=headers)
+        user_resp.raise_for_status()
+        return user_resp.json()
+    except (httpx.HTTPError, ValueError) as e:
+        raise KakaoLoginError({"error": f"카카오 사용자 정보 조회 실패: {str(e) or type(e).__name__}"})
+
+
+def get_or_create_kakao_user(kakao_id, nickname):
+    """(사용자, "login success" 또는 "register success")"""
+    user, created = upsert_kakao_user(kakao_id, nickname)
+    return user, "register success" if created else "login success"
+
+
+def upsert_kakao_user(kakao_id, nickname):
+    """카카오 사용자를 만들거나 갱신하고 (사용자, 새로 만들었는지)
+
+    Postgres에서는 INSERT ... ON CONFLICT (username) 한 문장이다. 처음 로그인이 몰려도
+    IntegrityError가 나지 않고, 닉네임(first_name)은 바뀌었을 때만(빈 값 제외) 쓴다.
+    """
+    username = f"kakao_{kakao_id}"  # 숫자만 있는 username 충돌/문제 방지
+    kakao_id = str(kakao_id)
+    nickname = nickname or ""
+
+    connection = connections[router.db_for_write(User)]
+    if connection.vendor != "postgresql":
+        return _upsert_kakao_user_orm(username, kakao_id, nickname)
+
+    opts = User._meta
+    qn = connection.ops.quote_name
+    table = qn(opts.db_table)
+    fields = [field for field in opts.concrete_fields if not field.primary_key]
+    values = {field.attname: field.get_default() for field in fields}
+    values.update(
+        # create_user(password=None)와 같은 사용 불가 비밀번호
+        password=make_password(None),
+        username=username,
+        first_name=nickname,
+        kakao_id=kakao_id,
+        date_joined=timezone.now(),
+    )
+    columns = ", ".join(qn(field.column) for field in fields)
+    returning = ", ".join(qn(field.column) for field in opts.concrete_fields)
+    first_name, kakao_column = qn("first_name"), qn("kakao_id")
+
+    sql = (
+        f"WITH up AS ("
+        f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * len(fields))}) "
+        f"ON CONFLICT ({qn('username')}) DO UPDATE SET "
+        f"{first_name} = CASE WHEN EXCLUDED.{first_name} <> '' "
+        f"THEN EXCLUDED.{first_name} ELSE {table}.{first_name} END, "
+        f"{kakao_column} = COALESCE({table}.{kakao_column}, EXCLUDED.{kakao_column}) "
+        # 바뀐 게 없으면 UPDATE(쓰기)를 하지 않는다
+        f"WHERE (EXCLUDED.{first_name} <> '' AND {table}.{first_name} IS DISTINCT FROM EXCLUDED.{first_name}) "
+        f"OR {table}.{kakao_column} IS NULL "
+        f"RETURNING {returning}, (xmax = 0) AS created"
+        f") "
+        f"SELECT * FROM up "
+        f"UNION ALL "
+        f"SELECT {returning}, FALSE FROM {table} "
+        f"WHERE {qn('username')} = %s AND NOT EXISTS (SELECT 1 FROM up)"
+    )
+    params = [field.get_db_prep_save(values[field.attname], connection) for field in fields]
+    params.append(username)
+
+    # 다른 트랜잭션이 이 문장 시작 뒤에 같은 사용자를 커밋했으면 (UPDATE 안 함 + 스냅샷에 안 보임)
+    # 행이 안 나오므로, 새 스냅샷으로 한 번 더 실행한다
+    for _ in range(2):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is not None:
+            names = [field.attname for field in opts.concrete_fields]
+            return User.from_db(connection.alias, names, row[:-1]), row[-1]
+    raise User.DoesNotExist(username)
+
+
+def _upsert_kakao_user_orm(username, kakao_id, nickname):
+    """Postgres가 아닌 DB(개발용 SQLite 등)용"""
+    try:
+        with transaction.atomic():
+            return User.objects.create_user(username=username, kakao_id=kakao_id, first_name=nickname), True
+    except IntegrityError:
+        pass
+
+    user = User.objects.get(username=username)
+    changed = []
+    if nickname and user.first_name != nickname:
+        user.first_name = nickname
+        changed.append("first_name")
+    if not user.kakao_id:
+        user.kakao_id = kakao_id
+        changed.append("kakao_id")
+    if changed:
+        user.save(update_fields=changed)
+    return user, False
+
+
+def issue_tokens(user, message):
+    """JWT를 발급하고 (응답 본문, access, refresh)"""
+    refresh = UserClaimsRefreshToken.for_user(user)
+    access_token_jwt = str(refresh.access_token)
+    refresh_token_jwt = str(refresh)
+
+    data = {
+        "user": UserSerializer(user).data,
+        "message": message,
+        "token": {"access": access_token_jwt, "refresh": refresh_token_jwt},
+    }
+    return data, access_token_jwt, refresh_token_jwt
+
+
+def set_token_cookies(response, access_token_jwt, refresh_token_jwt):
+    # 개발환경에서 https가 아닐 수 있으니 settings.DEBUG 기반으로 secure 옵션 설정
+    secure_cookie = not getattr(settings, "DEBUG", False)
+
+    # 쿠키 저장 (프론트와의 정책에 맞게 name/path/domain/samesite 조정하세요)
+    response.set_cookie("accessToken", access_token_jwt, httponly=True, secure=secure_cookie, samesite="None")
+    response.set_cookie("refreshToken", refresh_token_jwt, httponly=True, secure=secure_cookie, samesite="None")
+    return response
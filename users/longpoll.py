@@ -0,0 +1,58 @@
+"""Unity 카카오 로그인 세션 롱폴링 (ASGI 전용)
+
+`GET /users/kakao/unity/session/?state=...&wait=25` 요청을 콜백이 세션을 완료할 때까지
+(최대 wait초) ASGI 계층에서 붙잡아 두었다가 기존 폴링 뷰로 넘긴다.
+wait 파라미터가 없거나 WSGI로 배포된 경우에는 기존처럼 즉시 응답한다.
+"""
+import asyncio
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.urls import reverse
+
+from .notifications import get_notifier
+from .session_store import get_session_store
+
+
+def _parse_wait(value):
+    try:
+        wait = int(value)
+    except (TypeError, ValueError):
+        return 0
+    return max(0, min(wait, settings.KAKAO_SESSION_LONGPOLL_MAX_WAIT))
+
+
+class KakaoSessionLongPollMiddleware:
+    """세션 폴링 요청을 완료 알림이 올 때까지 대기시키는 ASGI 미들웨어"""
+
+    def __init__(self, app):
+        self.app = app
+        self._path = None
+
+    @property
+    def path(self):
+        if self._path is None:
+            self._path = reverse("kakao_unity_session")
+        return self._path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET" and scope["path"] == self.path:
+            query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+            state = query.get("state", [None])[0]
+            wait = _parse_wait(query.get("wait", [None])[0])
+            if state and wait:
+                await self._wait_for_completion(state, wait)
+
+        await self.app(scope, receive, send)
+
+    async def _wait_for_completion(self, state, timeout):
+        notifier = get_notifier()
+        # 조회보다 먼저 구독해야 그 사이에 온 완료 알림을 놓치지 않는다
+        event = notifier.subscribe(state)
+        try:
+            if await get_session_store().ais_pending(state):
+                await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            notifier.unsubscribe(state, event)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "만료된 JWT 토큰(outstanding/blacklisted)을 나눠서 지운다 (flushexpiredtokens의 짧은 DELETE 버전)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.JWT_PURGE_BATCH,
+            help="DELETE 한 번에 지울 토큰 수",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        if batch_size < 1:
+            self.stderr.write("--batch-size는 1 이상이어야 합니다.")
+            return
+
+        now = timezone.now()
+        outstanding = blacklisted = 0
+        while True:
+            pks = list(
+                OutstandingToken.objects.filter(expires_at__lte=now)
+                .order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                break
+            # 블랙리스트 행은 CASCADE로 같은 배치에서 함께 지워진다
+            _, counts = OutstandingToken.objects.filter(pk__in=pks).delete()
+            outstanding += counts.get(OutstandingToken._meta.label, 0)
+            blacklisted += counts.get(BlacklistedToken._meta.label, 0)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"만료된 토큰 {outstanding}개(블랙리스트 {blacklisted}개)를 지웠습니다."
+        ))
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.models import KakaoAuthSession
+
+
+class Command(BaseCommand):
+    help = "만료된 Unity 카카오 로그인 세션을 나눠서 지운다"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=settings.KAKAO_SESSION_SWEEP_BATCH,
+            help="DELETE 한 번에 지울 세션 수",
+        )
+
+    def handle(self, *args, batch_size, **options):
+        if batch_size < 1:
+            self.stderr.write("--batch-size는 1 이상이어야 합니다.")
+            return
+
+        deleted = KakaoAuthSession.objects.sweep(batch_size)
+        self.stdout.write(self.style.SUCCESS(f"만료된 세션 {deleted}개를 지웠습니다."))
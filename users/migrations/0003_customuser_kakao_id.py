@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:31
+
+from django.db import migrations, models
+
+
+def backfill_kakao_id(apps, schema_editor):
+    """카카오 로그인으로 만든 사용자(username = kakao_<회원번호>)의 kakao_id를 채운다"""
+    User = apps.get_model("users", "CustomUser")
+
+    batch = []
+    for user in User.objects.filter(username__startswith="kakao_").only("pk", "username").iterator(chunk_size=1000):
+        user.kakao_id = user.username[len("kakao_"):]
+        batch.append(user)
+        if len(batch) >= 1000:
+            User.objects.bulk_update(batch, ["kakao_id"])
+            batch = []
+    User.objects.bulk_update(batch, ["kakao_id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_kakaoauthsession"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="kakao_id",
+            field=models.CharField(blank=True, max_length=32, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_kakao_id, migrations.RunPython.noop),
+    ]
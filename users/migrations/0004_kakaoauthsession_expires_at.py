@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:37
+
+from datetime import timedelta
+
+import users.models
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_expires_at(apps, schema_editor):
+    """기존 세션은 예전 규칙(created_at + 10분)대로 만료 시각을 채운다"""
+    KakaoAuthSession = apps.get_model("users", "KakaoAuthSession")
+    KakaoAuthSession.objects.filter(expires_at__isnull=True).update(
+        expires_at=F("created_at") + timedelta(minutes=10)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_customuser_kakao_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="kakaoauthsession",
+            name="expires_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="kakaoauthsession",
+            name="expires_at",
+            field=models.DateTimeField(
+                db_index=True, default=users.models.kakao_session_expiry
+            ),
+        ),
+    ]
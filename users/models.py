@@ -1,3 +1,6 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 import uuid
@@ -5,7 +8,31 @@ from django.utils import timezone
 
 
 class CustomUser(AbstractUser):
-    pass
+    # 카카오 회원번호 (savegame API의 userId). 카카오 로그인 사용자만 값이 있다
+    kakao_id = models.CharField(max_length=32, unique=True, null=True, blank=True)
+
+
+def kakao_session_expiry():
+    return timezone.now() + timedelta(seconds=settings.KAKAO_SESSION_TTL)
+
+
+class KakaoAuthSessionQuerySet(models.QuerySet):
+    def active(self):
+        """아직 만료되지 않은 세션 (expires_at 인덱스 사용)"""
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+    def sweep(self, batch_size=1000):
+        """만료된 세션을 batch_size개씩 나눠 지운다 (짧은 DELETE 여러 번). 지운 개수를 돌려준다"""
+        deleted = 0
+        while True:
+            pks = list(self.expired().order_by("expires_at").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            count, _ = self.model.objects.filter(pk__in=pks).delete()
+            deleted += count
 
 
 class KakaoAuthSession(models.Model):
@@ -15,14 +42,17 @@ class KakaoAuthSession(models.Model):
     is_completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
     completed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(default=kakao_session_expiry, db_index=True)
+
+    objects = KakaoAuthSessionQuerySet.as_manager()
 
     # 세션 만료
     @property
     def is_expired(self):
-        return timezone.now() > self.created_at + timezone.timedelta(minutes=10)
+        return timezone.now() >= self.expires_at
 
     def __str__(self):
         return f"KakaoSession({self.state[:8]}... - {self.is_completed})"
 
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
@@ -0,0 +1,99 @@
+"""Unity 카카오 로그인 세션 완료 알림 (롱폴링 대기 해제용)"""
+import asyncio
+import functools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSessionNotifier:
+    """프로세스 내부 알림. 워커가 하나인 배포(또는 개발 서버)용"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = {}  # state -> {asyncio.Event: loop}
+
+    def subscribe(self, state):
+        """state 완료 시 set 되는 이벤트를 등록한다 (이벤트 루프 안에서 호출)"""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        with self._lock:
+            self._waiters.setdefault(state, {})[event] = loop
+        return event
+
+    def unsubscribe(self, state, event):
+        with self._lock:
+            waiters = self._waiters.get(state)
+            if waiters is None:
+                return
+            waiters.pop(event, None)
+            if not waiters:
+                del self._waiters[state]
+
+    def publish(self, state):
+        """세션 완료를 알린다 (어느 스레드에서 호출해도 안전)"""
+        self._dispatch(state)
+
+    def _dispatch(self, state):
+        with self._lock:
+            waiters = list(self._waiters.get(state, {}).items())
+        for event, loop in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # 대기 중이던 루프가 이미 닫힘
+                pass
+
+
+class PostgresSessionNotifier(LocalSessionNotifier):
+    """Postgres LISTEN/NOTIFY 기반 알림. 여러 워커/프로세스 배포용"""
+
+    channel = "kakao_auth_session"
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def subscribe(self, state):
+        self._ensure_listener()
+        return super().subscribe(state)
+
+    def publish(self, state):
+        # 트랜잭션 안이라면 커밋 시점에 전달된다
+        with connections["default"].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [self.channel, state])
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name="kakao-session-listener", daemon=True
+                )
+                self._listener.start()
+
+    def _listen(self):
+        import psycopg
+
+        while True:
+            try:
+                params = connections["default"].get_connection_params()
+                params["autocommit"] = True
+                with psycopg.connect(**params) as conn:
+                    conn.execute(f"LISTEN {self.channel}")
+                    for notify in conn.notifies():
+                        self._dispatch(notify.payload)
+            except psycopg.Error:
+                logger.exception("카카오 세션 알림 LISTEN 연결 실패, 재시도합니다.")
+                time.sleep(1)
+
+
+@functools.cache
+def get_notifier():
+    return import_string(settings.KAKAO_SESSION_NOTIFIER)()
@@ -1,9 +1,29 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+
+from .tokens import UserClaimsRefreshToken
 
 User = get_user_model()
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name']
\ No newline at end of file
+        fields = ['id', 'username', 'email', 'first_name', 'last_name']
+
+
+class UserClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = UserClaimsRefreshToken
+
+
+class UserClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = UserClaimsRefreshToken
+
+    def validate(self, attrs):
+        # 탈퇴한 사용자의 refresh 토큰: simplejwt는 DoesNotExist를 그대로 올려 500이 된다 -> 401 (InvalidToken)
+        try:
+            return super().validate(attrs)
+        except User.DoesNotExist:
+            raise TokenError(_("User not found"))
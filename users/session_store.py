@@ -0,0 +1,175 @@
+"""Unity 카카오 로그인 세션 상태 저장소
+
+KAKAO_SESSION_STORE 설정으로 고른다.
+    ORMSessionStore: KakaoAuthSession 테이블 (기본값)
+    CacheSessionStore: Django 캐시(Redis 등). 로그인 중에는 DB를 쓰지 않는다
+"""
+import functools
+import uuid
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import KakaoAuthSession
+from .serializers import UserSerializer
+
+MISSING = "missing"
+EXPIRED = "expired"
+PENDING = "pending"
+COMPLETED = "completed"
+
+# poll() 결과: status, 완료된 경우 직렬화된 사용자 정보
+PollResult = namedtuple("PollResult", ["status", "user"])
+
+
+class BaseSessionStore:
+    def create(self):
+        """새 세션을 만들고 state를 돌려준다"""
+        raise NotImplementedError
+
+    def complete(self, state, user):
+        """만료되지 않은 세션을 완료 처리한다. 처리했으면 True (먼저 완료한 요청만)"""
+        raise NotImplementedError
+
+    async def acomplete(self, state, user):
+        return await sync_to_async(self.complete)(state, user)
+
+    def poll(self, state):
+        """세션 상태를 확인한다. 완료된 세션은 한 번만 COMPLETED로 돌려주고 지운다"""
+        raise NotImplementedError
+
+    def is_pending(self, state):
+        raise NotImplementedError
+
+    async def ais_pending(self, state):
+        return await sync_to_async(self.is_pending)(state)
+
+
+class ORMSessionStore(BaseSessionStore):
+    def create(self):
+        return str(KakaoAuthSession.objects.create().state)
+
+    def complete(self, state, user):
+        # 만료되지 않고 아직 완료되지 않은 세션만 UPDATE 한 번으로 완료 처리 (만료된 세션은 sweeper가 지운다)
+        return bool(KakaoAuthSession.objects.active().filter(state=state, is_completed=False).update(
+            user=user,
+            is_completed=True,
+            completed_at=timezone.now(),
+        ))
+
+    async def acomplete(self, state, user):
+        return bool(await KakaoAuthSession.objects.active().filter(state=state, is_completed=False).aupdate(
+            user=user,
+            is_completed=True,
+            completed_at=timezone.now(),
+        ))
+
+    def poll(self, state):
+        try:
+            session = KakaoAuthSession.objects.select_related("user").get(state=state)
+        except KakaoAuthSession.DoesNotExist:
+            return PollResult(MISSING, None)
+
+        if session.is_expired:
+            session.delete()
+            return PollResult(EXPIRED, None)
+
+        if session.is_completed and session.user:
+            user_data = UserSerializer(session.user).data
+            # 세션 삭제 (일회성, 먼저 지운 요청만 결과를 받는다)
+            deleted, _ = KakaoAuthSession.objects.filter(pk=session.pk).delete()
+            if not deleted:
+                return PollResult(MISSING, None)
+            return PollResult(COMPLETED, user_data)
+
+        return PollResult(PENDING, None)
+
+    def is_pending(self, state):
+        return KakaoAuthSession.objects.active().filter(state=state, is_completed=False).exists()
+
+    async def ais_pending(self, state):
+        return await KakaoAuthSession.objects.active().filter(state=state, is_completed=False).aexists()
+
+
+class CacheSessionStore(BaseSessionStore):
+    """캐시 항목 하나로 세션을 표현한다 (TTL이 지나면 캐시가 알아서 지움)
+
+    값은 {"expires_at": epoch 초, "user": None 또는 직렬화된 사용자}.
+    만료된 세션은 캐시에서 사라지므로 EXPIRED 대신 MISSING이 된다.
+    완료는 cache.add로 완료 표시를 먼저 남긴 요청 하나만 한다 (같은 state의 콜백이 두 번 와도 덮어쓰지 않음).
+    """
+
+    def __init__(self):
+        self.cache = caches[settings.KAKAO_SESSION_CACHE]
+
+    @staticmethod
+    def _key(state):
+        return f"kakao_session:v1:{state}"
+
+    @staticmethod
+    def _completed_key(state):
+        return f"kakao_session:v1:{state}:completed"
+
+    def create(self):
+        ttl = settings.KAKAO_SESSION_TTL
+        while True:
+            state = str(uuid.uuid4())
+            entry = {"expires_at": timezone.now().timestamp() + ttl, "user": None}
+            # 같은 state가 이미 있으면 덮어쓰지 않는다
+            if self.cache.add(self._key(state), entry, ttl):
+                return state
+
+    @staticmethod
+    def _complete_entry(entry, user):
+        """완료 처리한 항목과 남은 TTL. 이미 사라졌거나 만료됐으면 None"""
+        if entry is None:
+            return None
+        remaining = entry["expires_at"] - timezone.now().timestamp()
+        if remaining <= 0:
+            return None
+        return {**entry, "user": dict(UserSerializer(user).data)}, remaining
+
+    def complete(self, state, user):
+        key = self._key(state)
+        completed = self._complete_entry(self.cache.get(key), user)
+        if completed is None or not self.cache.add(self._completed_key(state), True, completed[1]):
+            return False
+        self.cache.set(key, *completed)
+        return True
+
+    async def acomplete(self, state, user):
+        key = self._key(state)
+        completed = self._complete_entry(await self.cache.aget(key), user)
+        if completed is None or not await self.cache.aadd(self._completed_key(state), True, completed[1]):
+            return False
+        await self.cache.aset(key, *completed)
+        return True
+
+    def poll(self, state):
+        key = self._key(state)
+        entry = self.cache.get(key)
+        if entry is None:
+            return PollResult(MISSING, None)
+        if entry["user"] is None:
+            return PollResult(PENDING, None)
+        # get-and-delete: delete가 True인 요청 하나만 결과를 받는다
+        if not self.cache.delete(key):
+            return PollResult(MISSING, None)
+        return PollResult(COMPLETED, entry["user"])
+
+    def is_pending(self, state):
+        entry = self.cache.get(self._key(state))
+        return entry is not None and entry["user"] is None
+
+    async def ais_pending(self, state):
+        entry = await self.cache.aget(self._key(state))
+        return entry is not None and entry["user"] is None
+
+
+@functools.cache
+def get_session_store():
+    return import_string(settings.KAKAO_SESSION_STORE)()
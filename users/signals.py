@@ -0,0 +1,12 @@
+from allauth.socialaccount.models import SocialApp
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .kakao import clear_kakao_app_cache
+
+
+@receiver([post_save, post_delete], sender=SocialApp)
+def invalidate_kakao_app(sender, instance, **kwargs):
+    """admin 등에서 SocialApp이 바뀌면 캐시된 카카오 설정을 버린다"""
+    if instance.provider == "kakao":
+        clear_kakao_app_cache()
@@ -0,0 +1,48 @@
+"""만료된 Unity 카카오 로그인 세션을 주기적으로 지우는 프로세스 내 백그라운드 작업
+
+KAKAO_SESSION_SWEEP_INTERVAL > 0 일 때 UsersConfig.ready()에서 시작한다.
+cron 등으로 sweep_kakao_sessions 명령을 돌린다면 켤 필요 없다.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_started = False
+_lock = threading.Lock()
+
+
+def start_session_sweeper():
+    """정리 스레드를 (프로세스당 한 번) 시작한다"""
+    global _started
+
+    interval = settings.KAKAO_SESSION_SWEEP_INTERVAL
+    if interval <= 0:
+        return
+    with _lock:
+        if _started:
+            return
+        _started = True
+
+    thread = threading.Thread(target=_run, args=(interval,), name="kakao-session-sweeper", daemon=True)
+    thread.start()
+
+
+def _run(interval):
+    from .models import KakaoAuthSession
+
+    while True:
+        time.sleep(interval)
+        try:
+            deleted = KakaoAuthSession.objects.sweep(settings.KAKAO_SESSION_SWEEP_BATCH)
+            if deleted:
+                logger.info("만료된 카카오 로그인 세션 %d개 삭제", deleted)
+        except Exception:
+            logger.exception("카카오 로그인 세션 정리 실패")
+        finally:
+            # 이 스레드의 DB 연결은 요청 사이클이 정리해 주지 않는다
+            connections.close_all()
@@ -1,3 +1,501 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from allauth.socialaccount.models import SocialApp
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.db import connection, connections, transaction
+from django.test import AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from benchmarks.fakes import FakeKakaoServer
+from EcoCity2050_BE.query_budget import QueryBudgetTestMixin
+
+from .blacklist import BlacklistFilter, get_blacklist_filter
+from .kakao import clear_kakao_app_cache, upsert_kakao_user
+from .longpoll import KakaoSessionLongPollMiddleware
+from .models import KakaoAuthSession
+from .notifications import get_notifier
+from .session_store import COMPLETED, CacheSessionStore, ORMSessionStore, get_session_store
+from .tokens import UserClaimsRefreshToken
+from .views import kakao_callback_async
+
+User = get_user_model()
+
+
+class SessionStoreTests(TestCase):
+    store_class = ORMSessionStore
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = User.objects.create(username="kakao_1", kakao_id="1")
+        cls.second = User.objects.create(username="kakao_2", kakao_id="2")
+
+    def setUp(self):
+        cache.clear()
+        self.store = self.store_class()
+
+    def test_first_completion_wins(self):
+        state = self.store.create()
+
+        self.assertTrue(self.store.complete(state, self.first))
+        self.assertFalse(self.store.complete(state, self.second))
+
+        result = self.store.poll(state)
+        self.assertEqual(result.status, COMPLETED)
+        self.assertEqual(result.user["id"], self.first.pk)
+
+    async def test_async_first_completion_wins(self):
+        state = await sync_to_async(self.store.create)()
+
+        self.assertTrue(await self.store.acomplete(state, self.first))
+        self.assertFalse(await self.store.acomplete(state, self.second))
+
+
+class CacheSessionStoreTests(SessionStoreTests):
+    store_class = CacheSessionStore
+
+    def test_concurrent_completions(self):
+        state = self.store.create()
+        barrier = threading.Barrier(8)
+        results = []
+
+        def complete():
+            barrier.wait()
+            results.append(self.store.complete(state, self.first))
+
+        threads = [threading.Thread(target=complete) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(True), 1)
+
+
+@override_settings(OUTBOUND_HTTP_RETRIES=0)
+class KakaoCallbackAsyncTests(TestCase):
+    """async 카카오 콜백을 로컬 가짜 카카오 서버(benchmarks/fakes.py)에 붙여 테스트한다"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.kakao = FakeKakaoServer().start()
+        cls.addClassCleanup(cls.kakao.server_close)
+        cls.addClassCleanup(cls.kakao.shutdown)
+        cls.enterClassContext(override_settings(KAKAO_AUTH_URL=cls.kakao.url, KAKAO_API_URL=cls.kakao.url))
+
+    @classmethod
+    def setUpTestData(cls):
+        SocialApp.objects.create(provider="kakao", name="kakao", client_id="test", secret="test")
+
+    def setUp(self):
+        clear_kakao_app_cache()
+        self.addCleanup(clear_kakao_app_cache)
+        self.factory = AsyncRequestFactory()
+
+    async def callback(self, **params):
+        return await kakao_callback_async(self.factory.get("/accounts/kakao/login/callback/", params))
+
+    async def test_token_exchange_failure(self):
+        response = await self.callback(code="invalid")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("토큰 교환 실패", json.loads(response.content)["error"])
+        self.assertFalse(await User.objects.filter(kakao_id__isnull=False).aexists())
+
+    async def test_user_info_failure(self):
+        response = await self.callback(code="expired")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("사용자 정보 조회 실패", json.loads(response.content)["error"])
+        self.assertFalse(await User.objects.filter(kakao_id__isnull=False).aexists())
+
+    async def test_web_login_issues_tokens(self):
+        response = await self.callback(code="12345")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["message"], "register success")
+        self.assertIn("accessToken", response.cookies)
+        self.assertIn("refreshToken", response.cookies)
+        user = await User.objects.aget(kakao_id="12345")
+        self.assertEqual(user.first_name, "시민2345")
+
+    async def test_unity_login_completes_session(self):
+        store = get_session_store()
+        state = await sync_to_async(store.create)()
+
+        response = await self.callback(code="12345", state=state)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json.loads(response.content)["success"])
+        result = await sync_to_async(store.poll)(state)
+        self.assertEqual(result.status, COMPLETED)
+        self.assertEqual(result.user["username"], "kakao_12345")
+
+
+class UpsertKakaoUserTests(TestCase):
+    """upsert_kakao_user 동작 (Postgres에서는 raw SQL 경로, 그 밖에서는 ORM 경로를 탄다)"""
+
+    def upsert(self, kakao_id, nickname):
+        return upsert_kakao_user(kakao_id, nickname)
+
+    def test_first_login_creates_user(self):
+        user, created = self.upsert(12345, "숲지기")
+
+        self.assertTrue(created)
+        self.assertEqual((user.username, user.kakao_id, user.first_name), ("kakao_12345", "12345", "숲지기"))
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(User.objects.get(pk=user.pk).kakao_id, "12345")
+
+    def test_next_login_returns_same_user(self):
+        first, _ = self.upsert(12345, "숲지기")
+        user, created = self.upsert(12345, "숲지기")
+
+        self.assertFalse(created)
+        self.assertEqual(user.pk, first.pk)
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_nickname_is_updated_unless_empty(self):
+        self.upsert(12345, "숲지기")
+
+        user, _ = self.upsert(12345, "바람지기")
+        self.assertEqual(user.first_name, "바람지기")
+
+        user, _ = self.upsert(12345, "")
+        self.assertEqual(user.first_name, "바람지기")
+        self.assertEqual(User.objects.get(pk=user.pk).first_name, "바람지기")
+
+    def test_missing_kakao_id_is_filled_but_not_replaced(self):
+        User.objects.create(username="kakao_12345", first_name="숲지기")
+
+        user, created = self.upsert(12345, None)
+        self.assertFalse(created)
+        self.assertEqual((user.kakao_id, user.first_name), ("12345", "숲지기"))
+
+        User.objects.filter(pk=user.pk).update(kakao_id="legacy")
+        user, _ = self.upsert(12345, "숲지기")
+        self.assertEqual(user.kakao_id, "legacy")
+
+
+class OrmUpsertKakaoUserTests(UpsertKakaoUserTests):
+    """Postgres에서도 ORM 경로(_upsert_kakao_user_orm)가 같은 결과를 내는지 본다"""
+
+    def upsert(self, kakao_id, nickname):
+        with mock.patch.object(connection, "vendor", "sqlite"):
+            return upsert_kakao_user(kakao_id, nickname)
+
+
+@skipUnless(connection.vendor == "postgresql", "INSERT ... ON CONFLICT 경로는 Postgres 전용")
+class PostgresUpsertKakaoUserTests(TransactionTestCase):
+    def test_login_is_single_statement(self):
+        upsert_kakao_user(12345, "숲지기")
+
+        with self.assertNumQueries(1):
+            _, created = upsert_kakao_user(12345, "숲지기")
+        self.assertFalse(created)
+
+    def test_concurrent_first_logins_create_one_user(self):
+        barrier = threading.Barrier(4)
+        results = []
+
+        def login():
+            barrier.wait()
+            try:
+                results.append(upsert_kakao_user(12345, "숲지기"))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=login) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(sum(created for _, created in results), 1)
+        self.assertEqual({user.pk for user, _ in results}, {User.objects.get(username="kakao_12345").pk})
+
+
+class DeletedUserTokenTests(TestCase):
+    """탈퇴(삭제)한 사용자의 refresh 토큰은 500(FK 위반) 대신 토큰 오류로 거절한다"""
+
+    def setUp(self):
+        user = User.objects.create(username="kakao_3", kakao_id="3")
+        self.refresh = UserClaimsRefreshToken.for_user(user)
+        user.delete()
+
+    def test_refresh_is_rejected(self):
+        response = self.client.post("/users/token/refresh/", {"refresh": str(self.refresh)})
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+    def test_blacklist_without_outstanding_row_raises_token_error(self):
+        OutstandingToken.objects.all().delete()
+
+        with self.assertRaises(TokenError):
+            self.refresh.blacklist()
+        self.assertFalse(OutstandingToken.objects.exists())
+
+    def test_logout_is_rejected(self):
+        OutstandingToken.objects.all().delete()
+
+        response = self.client.post(
+            "/users/logout/",
+            {"refresh": str(self.refresh)},
+            HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(OutstandingToken.objects.exists())
+
+
+class AuthenticationScopeTests(TestCase):
+    """기본 인증은 사용자 행을 읽고, 클레임 인증은 지정한 뷰에서만 쓴다"""
+
+    def setUp(self):
+        self.user = User.objects.create(username="kakao_4", kakao_id="4", first_name="숲지기", is_staff=True)
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {UserClaimsRefreshToken.for_user(self.user).access_token}"}
+
+    def test_default_authentication_rejects_inactive_user(self):
+        # tag가 없으면 인증/권한을 통과한 뒤 400
+        self.assertEqual(self.client.get("/players-by-tag/", **self.auth).status_code, 400)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/players-by-tag/", **self.auth).status_code, 401)
+
+    def test_profile_uses_token_claims(self):
+        User.objects.filter(pk=self.user.pk).update(first_name="바람지기")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/users/profile/", **self.auth)
+        self.assertEqual(response.json()["first_name"], "숲지기")
+
+
+@override_settings(JWT_BLACKLIST_FILTER=False)
+class RevokedTokenTests(TestCase):
+    """로컬 캐시(기본 설정)에서는 블랙리스트를 매번 DB에서 확인한다"""
+
+    def test_token_revoked_by_another_worker_is_rejected(self):
+        user = User.objects.create(username="kakao_5", kakao_id="5")
+        refresh = UserClaimsRefreshToken.for_user(user)
+        # 다른 워커가 로그아웃 처리 (이 프로세스의 필터/캐시에는 표시가 없다)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh["jti"]))
+
+        response = self.client.post("/users/token/refresh/", {"refresh": str(refresh)})
+
+        self.assertEqual(response.status_code, 401)
+
+
+class BlacklistFilterTests(TransactionTestCase):
+    def setUp(self):
+        self.blacklist = BlacklistFilter(rebuild_interval=60, cache_alias="default")
+        patcher = mock.patch.object(connections, "close_all", wraps=connections.close_all)
+        self.close_all = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_first_check_keeps_request_connection(self):
+        errors = []
+
+        def request():
+            # 메인 스레드가 아닌 요청 스레드에서 첫 확인 (필터를 그 자리에서 만든다)
+            try:
+                with transaction.atomic():
+                    self.assertFalse(self.blacklist.is_blacklisted("unknown"))
+                    self.assertEqual(User.objects.count(), 0)
+                self.close_all.assert_not_called()
+            except Exception as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(self.blacklist.get_stats()["rebuilds"], 1)
+
+    def test_background_rebuild_closes_its_connection(self):
+        self.blacklist._schedule_rebuild(wait=False)
+        for thread in threading.enumerate():
+            if thread.name == "jwt-blacklist-bloom":
+                thread.join()
+
+        self.assertEqual(self.blacklist.get_stats()["rebuilds"], 1)
+        self.close_all.assert_called_once()
+
+
+@override_settings(OUTBOUND_HTTP_RETRIES=0, KAKAO_SESSION_STORE="users.session_store.ORMSessionStore")
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """@query_budget을 단 users 뷰가 예산 안에서 응답하는지 확인한다 (SocialApp 프로세스 캐시 미스 기준)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.kakao = FakeKakaoServer().start()
+        cls.addClassCleanup(cls.kakao.server_close)
+        cls.addClassCleanup(cls.kakao.shutdown)
+        cls.enterClassContext(override_settings(KAKAO_AUTH_URL=cls.kakao.url, KAKAO_API_URL=cls.kakao.url))
+
+    @classmethod
+    def setUpTestData(cls):
+        SocialApp.objects.create(provider="kakao", name="kakao", client_id="test", secret="test")
+        cls.user = User.objects.create_user(username="player", password="secret-password")
+
+    def setUp(self):
+        get_session_store.cache_clear()
+        self.addCleanup(get_session_store.cache_clear)
+        clear_kakao_app_cache()
+        self.addCleanup(clear_kakao_app_cache)
+        # 프로세스에서 처음 한 번만 하는 블룸 필터 생성은 예산에 넣지 않는다
+        get_blacklist_filter().is_blacklisted("warm-up")
+
+    def test_login_and_refresh(self):
+        response = self.assertWithinQueryBudget(
+            self.client.post, "/users/login/", {"username": "player", "password": "secret-password"}
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.assertWithinQueryBudget(
+            self.client.post, "/users/token/refresh/", {"refresh": response.json()["refresh"]}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_and_logout(self):
+        refresh = UserClaimsRefreshToken.for_user(self.user)
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {refresh.access_token}"}
+
+        response = self.assertWithinQueryBudget(self.client.get, "/users/profile/", **auth)
+        self.assertEqual(response.json()["username"], "player")
+
+        response = self.assertWithinQueryBudget(self.client.post, "/users/logout/", {"refresh": str(refresh)}, **auth)
+        self.assertEqual(response.status_code, 200)
+
+    def test_kakao_login(self):
+        self.assertIn("auth_url", self.assertWithinQueryBudget(self.client.get, "/users/kakao/login/").json())
+
+    def test_unity_login_flow(self):
+        state = self.assertWithinQueryBudget(self.client.get, "/users/kakao/unity/login/").json()["state"]
+        session = {"state": state}
+
+        response = self.assertWithinQueryBudget(self.client.get, "/users/kakao/unity/session/", session)
+        self.assertEqual(response.status_code, 202)
+
+        clear_kakao_app_cache()
+        response = self.assertWithinQueryBudget(
+            self.client.get, "/users/kakao/callback/", {"code": "12345", **session}
+        )
+        self.assertTrue(response.json()["success"])
+
+        response = self.assertWithinQueryBudget(self.client.get, "/users/kakao/unity/session/", session)
+        self.assertEqual(response.json()["status"], "completed")
+
+    def test_callback_with_expired_state(self):
+        state = get_session_store().create()
+        KakaoAuthSession.objects.filter(state=state).update(expires_at=timezone.now())
+
+        # 세션 완료 UPDATE가 0행이면 웹 로그인처럼 토큰을 발급한다
+        response = self.assertWithinQueryBudget(
+            self.client.get, "/users/kakao/callback/", {"code": "12345", "state": state}
+        )
+        self.assertIn("accessToken", response.cookies)
+
+
+@override_settings(
+    KAKAO_SESSION_STORE="users.session_store.ORMSessionStore",
+    KAKAO_SESSION_NOTIFIER="users.notifications.LocalSessionNotifier",
+)
+class LongPollTests(TestCase):
+    """세션 폴링 롱폴링 미들웨어를 실제 ASGI 핸들러 앞에 두고 확인한다"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="kakao_4", kakao_id="4")
+
+    def setUp(self):
+        for cached in (get_session_store, get_notifier):
+            cached.cache_clear()
+            self.addCleanup(cached.cache_clear)
+        # 테스트 클라이언트처럼 요청마다 테스트 트랜잭션의 연결을 닫지 않게 한다
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        self.app = KakaoSessionLongPollMiddleware(ASGIHandler())
+        self.state = get_session_store().create()
+
+    async def get(self, path, query=""):
+        messages = []
+        received = []
+
+        async def receive():
+            if received:
+                # 요청 본문을 넘긴 뒤에는 연결이 끊기지 않은 채로 기다린다
+                await asyncio.Future()
+            received.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": [(b"host", b"testserver")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        started = time.monotonic()
+        await self.app(scope, receive, send)
+        status = next(message["status"] for message in messages if message["type"] == "http.response.start")
+        body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+        return status, json.loads(body), time.monotonic() - started
+
+    async def complete_later(self, delay):
+        await asyncio.sleep(delay)
+        self.assertTrue(await get_session_store().acomplete(self.state, self.user))
+        get_notifier().publish(self.state)
+
+    async def test_parked_request_wakes_on_complete(self):
+        completion = asyncio.create_task(self.complete_later(0.2))
+
+        status, body, elapsed = await self.get("/users/kakao/unity/session/", f"state={self.state}&wait=10")
+        await completion
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body["status"], "completed")
+        self.assertLess(elapsed, 5)
+
+    async def test_timeout_returns_pending(self):
+        status, body, elapsed = await self.get("/users/kakao/unity/session/", f"state={self.state}&wait=1")
+
+        self.assertEqual(status, 202)
+        self.assertEqual(body["status"], "pending")
+        self.assertGreaterEqual(elapsed, 1)
+
+    async def test_without_wait_responds_immediately(self):
+        status, body, elapsed = await self.get("/users/kakao/unity/session/", f"state={self.state}")
+
+        self.assertEqual(status, 202)
+        self.assertLess(elapsed, 1)
+
+    async def test_other_paths_pass_through(self):
+        with mock.patch.object(KakaoSessionLongPollMiddleware, "_wait_for_completion") as wait:
+            status, _, _ = await self.get("/users/kakao/login/", f"state={self.state}&wait=10")
+
+        wait.assert_not_called()
+        self.assertEqual(status, 400)  # SocialApp 미등록 응답이 그대로 나온다
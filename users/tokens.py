@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .blacklist import get_blacklist_filter
+
+User = get_user_model()
+
+# 발급 시 토큰에 넣는 사용자 정보 클레임 (클레임 -> 사용자 필드)
+USER_CLAIMS = {
+    "username": "username",
+    "nickname": "first_name",
+    "last_name": "last_name",
+    "email": "email",
+}
+
+
+class UserClaimsRefreshToken(RefreshToken):
+    """사용자 정보를 클레임으로 담는 refresh 토큰 (access 토큰에도 그대로 복사된다)
+
+    ClaimsJWTAuthentication이 이 클레임으로 DB 조회 없이 사용자를 만든다.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, field in USER_CLAIMS.items():
+            token[claim] = getattr(user, field) or ""
+        return token
+
+    def check_blacklist(self):
+        # 블룸 필터/최근 항목으로 먼저 거르고 필요할 때만 DB를 본다 (users/blacklist.py)
+        if not settings.JWT_BLACKLIST_FILTER:
+            return super().check_blacklist()
+        if get_blacklist_filter().is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def _create_outstanding(self):
+        # simplejwt 기본 구현처럼 사용자 객체를 조회하지 않고 클레임의 user_id를 그대로 쓰되,
+        # 탈퇴한 사용자면 FK 위반(500) 대신 TokenError로 거절한다
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id is not None and not User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).exists():
+            raise TokenError(_("User not found"))
+
+        jti = self.payload[api_settings.JTI_CLAIM]
+        try:
+            with transaction.atomic():
+                token = OutstandingToken.objects.create(
+                    jti=jti,
+                    user_id=user_id,
+                    created_at=self.current_time,
+                    token=str(self),
+                    expires_at=datetime_from_epoch(self.payload["exp"]),
+                )
+            return token, True
+        except IntegrityError:
+            # 같은 토큰을 동시에 처리한 다른 요청이 먼저 INSERT했다
+            return OutstandingToken.objects.get(jti=jti), False
+
+    def _outstanding(self):
+        # 발급 때 만든 행이 있으면 사용자를 다시 확인하지 않는다
+        try:
+            return OutstandingToken.objects.get(jti=self.payload[api_settings.JTI_CLAIM]), False
+        except OutstandingToken.DoesNotExist:
+            return self._create_outstanding()
+
+    def outstand(self):
+        # refresh 교체 후 새 jti로만 불리므로 조회 없이 바로 INSERT한다
+        return self._create_outstanding()
+
+    def blacklist(self):
+        token, _ = self._outstanding()
+        result = BlacklistedToken.objects.get_or_create(token=token)
+        if settings.JWT_BLACKLIST_FILTER:
+            get_blacklist_filter().add(self.payload[api_settings.JTI_CLAIM], self.payload["exp"])
+        return result
@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     # JWT 로그인
     path('login/', views.MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('token/refresh/', views.MyTokenRefreshView.as_view(), name='token_refresh'),
 
     # 사용자 정보 조회
     path('profile/', views.UserDetailView.as_view(), name='user_detail'),
@@ -16,7 +17,7 @@ urlpatterns = [
     path('kakao/unity/session/', views.KakaoUnitySessionView.as_view(), name='kakao_unity_session'),
 
     # 카카오 콜백 (웹/Unity 공용)
-    path('kakao/callback/', views.KakaoCallbackView.as_view(), name='kakao_callback_api'),
+    path('kakao/callback/', views.kakao_callback, name='kakao_callback_api'),
 
     # 로그아웃
     path('logout/', views.LogoutView.as_view(), name='logout'),
@@ -1,35 +1,69 @@
-import requests
 import uuid
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.http import JsonResponse
 from django.shortcuts import redirect
-from django.utils import timezone
+from django.views.decorators.http import require_GET
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from allauth.socialaccount.models import SocialApp
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+from EcoCity2050_BE.query_budget import query_budget
+from EcoCity2050_BE.routers import ReplicaReadMixin
+
+from .authentication import ClaimsJWTAuthentication
+from .kakao import (
+    KakaoLoginError,
+    aget_kakao_app,
+    afetch_user_info,
+    fetch_user_info,
+    get_kakao_app,
+    get_or_create_kakao_user,
+    issue_tokens,
+    parse_user_info,
+    set_token_cookies,
+)
 from .serializers import UserSerializer
-from .models import KakaoAuthSession
+from .notifications import get_notifier
+from .session_store import COMPLETED, EXPIRED, MISSING, get_session_store
+from .tokens import UserClaimsRefreshToken
 
 User = get_user_model()
 
+UNITY_LOGIN_COMPLETED = {
+    "message": "Unity 로그인 완료! 앱으로 돌아가세요.",
+    "success": True
+}
+
 
 # JWT 로그인 (username/password)
 class MyTokenObtainPairView(TokenObtainPairView):
+    query_budget = 2  # 사용자 조회 + outstanding 토큰 INSERT
     @swagger_auto_schema(operation_description="JWT 토큰 발급 (username/password 로그인)")
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
 
 
+# JWT 재발급 (refresh 토큰 교체, 이전 토큰은 블랙리스트 처리)
+class MyTokenRefreshView(TokenRefreshView):
+    # 블랙리스트 확인(블룸 필터 적중 시) + 사용자 + 이전 토큰 블랙리스트(조회 2, INSERT 1) + 새 토큰(사용자 확인 1, INSERT 1)
+    query_budget = 7
+    @swagger_auto_schema(operation_description="refresh 토큰으로 access/refresh 토큰 재발급")
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
+
+
 # 회원 정보 조회 (JWT)
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(ReplicaReadMixin, generics.RetrieveAPIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 0  # 토큰 클레임만 사용
     serializer_class = UserSerializer
 
     @swagger_auto_schema(operation_description="현재 로그인한 사용자 정보 조회")
@@ -43,6 +77,7 @@ class UserDetailView(generics.RetrieveAPIView):
 # 카카오 로그인 시작: 인증 URL 반환
 class KakaoLoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    query_budget = 1  # SocialApp (프로세스 캐시 미스일 때만)
 
     @swagger_auto_schema(
         operation_description="카카오 로그인 시작 URL 반환",
@@ -52,9 +87,8 @@ class KakaoLoginView(APIView):
         ))},
     )
     def get(self, request):
-        try:
-            social_app = SocialApp.objects.get(provider='kakao')
-        except SocialApp.DoesNotExist:
+        social_app = get_kakao_app()
+        if social_app is None:
             return Response(
                 {"error": "카카오 소셜 앱이 등록되지 않았습니다. Django admin에서 SocialApp을 등록하세요."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -66,7 +100,7 @@ class KakaoLoginView(APIView):
         # 카카오 인가 URL 생성
         # 필요한 scope는 서비스에 맞게 확장하세요 (profile_nickname, account_email 등)
         auth_url = (
-            "https://kauth.kakao.com/oauth/authorize"
+            f"{settings.KAKAO_AUTH_URL}/oauth/authorize"
             f"?response_type=code"
             f"&client_id={social_app.client_id}"
             f"&redirect_uri={callback_url}"
@@ -79,6 +113,7 @@ class KakaoLoginView(APIView):
 # Unity용 카카오 로그인 시작: state 포함
 class KakaoUnityLoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    query_budget = 2  # SocialApp (캐시 미스일 때만) + 세션 INSERT
 
     @swagger_auto_schema(
         operation_description="Unity용 카카오 로그인 시작 (state 기반 세션)",
@@ -91,24 +126,22 @@ class KakaoUnityLoginView(APIView):
         ))},
     )
     def get(self, request):
-        try:
-            social_app = SocialApp.objects.get(provider='kakao')
-        except SocialApp.DoesNotExist:
+        social_app = get_kakao_app()
+        if social_app is None:
             return Response(
                 {"error": "카카오 소셜 앱이 등록되지 않았습니다. Django admin에서 SocialApp을 등록하세요."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         # 세션 생성
-        session = KakaoAuthSession.objects.create()
-        state = str(session.state)
+        state = get_session_store().create()
 
         # redirect uri
         callback_url = request.build_absolute_uri('/accounts/kakao/login/callback/')
 
         # state 포함한 카카오 인가 URL 생성
         auth_url = (
-            "https://kauth.kakao.com/oauth/authorize"
+            f"{settings.KAKAO_AUTH_URL}/oauth/authorize"
             f"?response_type=code"
             f"&client_id={social_app.client_id}"
             f"&redirect_uri={callback_url}"
@@ -125,6 +158,7 @@ class KakaoUnityLoginView(APIView):
 # Unity용 카카오 로그인 세션 상태 폴링
 class KakaoUnitySessionView(APIView):
     permission_classes = [permissions.AllowAny]
+    query_budget = 2  # 세션+사용자 조회 + 완료 세션 DELETE (CacheSessionStore면 0)
 
     @swagger_auto_schema(
         operation_description="Unity용 카카오 로그인 세션 상태 확인 (폴링용)",
@@ -135,6 +169,13 @@ class KakaoUnitySessionView(APIView):
                 description="세션 상태 식별자",
                 type=openapi.TYPE_STRING,
                 required=True,
+            ),
+            openapi.Parameter(
+                "wait",
+                openapi.IN_QUERY,
+                description="롱폴링 최대 대기 시간(초). ASGI 배포에서만 적용되며 로그인 완료 시 즉시 응답",
+                type=openapi.TYPE_INTEGER,
+                required=False,
             )
         ],
         responses={
@@ -164,31 +205,25 @@ class KakaoUnitySessionView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            session = KakaoAuthSession.objects.get(state=state)
-        except KakaoAuthSession.DoesNotExist:
+        result = get_session_store().poll(state)
+        if result.status == MISSING:
             return Response(
                 {"error": "유효하지 않은 세션입니다."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
         # 세션 만료 체크
-        if session.is_expired:
-            session.delete()
+        if result.status == EXPIRED:
             return Response(
                 {"error": "세션이 만료되었습니다."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # 로그인 완료된 경우
-        if session.is_completed and session.user:
-            # 세션 삭제 (일회성)
-            user_data = UserSerializer(session.user).data
-            session.delete()
-
+        # 로그인 완료된 경우 (세션은 일회성으로 삭제됨)
+        if result.status == COMPLETED:
             return Response({
                 "status": "completed",
-                "user": user_data,
+                "user": result.user,
                 "message": "로그인 성공"
             }, status=status.HTTP_200_OK)
 
@@ -201,6 +236,7 @@ class KakaoUnitySessionView(APIView):
 # 카카오 콜백: code로 JWT 발급 (카카오 토큰 교환 + 사용자 정보 조회)
 class KakaoCallbackView(APIView):
     permission_classes = [permissions.AllowAny]
+    query_budget = 4  # SocialApp (캐시 미스일 때만) + 사용자 upsert + 세션 완료 UPDATE + 토큰 INSERT (만료된 state면 둘 다)
 
     @swagger_auto_schema(
         operation_description="카카오 OAuth 콜백 (code로 JWT 발급)",
@@ -228,9 +264,8 @@ class KakaoCallbackView(APIView):
         if not code:
             return Response({"error": "code가 없습니다."}, status=status.HTTP_400_BAD_REQUEST)
 
-        try:
-            social_app = SocialApp.objects.get(provider='kakao')
-        except SocialApp.DoesNotExist:
+        social_app = get_kakao_app()
+        if social_app is None:
             return Response(
                 {"error": "카카오 소셜 앱이 등록되지 않았습니다. Django admin에서 SocialApp을 등록하세요."},
                 status=status.HTTP_400_BAD_REQUEST
@@ -239,117 +274,78 @@ class KakaoCallbackView(APIView):
         # callback url은 로그인 시작 때와 동일해야 합니다
         callback_url = request.build_absolute_uri('/accounts/kakao/login/callback/')
 
-        # 1) 코드 -> 액세스 토큰 교환
-        token_url = "https://kauth.kakao.com/oauth/token"
-        token_data = {
-            "grant_type": "authorization_code",
-            "client_id": social_app.client_id,
-            "redirect_uri": callback_url,
-            "code": code,
-        }
-        # client_secret이 설정되어 있으면 포함
-        if getattr(social_app, "secret", None):
-            token_data["client_secret"] = social_app.secret
-
+        # 코드 -> 액세스 토큰 교환 -> 사용자 정보 조회
         try:
-            token_resp = requests.post(token_url, data=token_data, timeout=10)
-            token_resp.raise_for_status()
-            token_json = token_resp.json()
-        except requests.RequestException as e:
-            return Response(
-                {"error": f"카카오 토큰 교환 실패: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        access_token = token_json.get("access_token")
-        if not access_token:
-            return Response(
-                {"error": "카카오에서 access_token을 받지 못했습니다.", "detail": token_json},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # 2) 사용자 정보 조회
-        user_info_url = "https://kapi.kakao.com/v2/user/me"
-        headers = {"Authorization": f"Bearer {access_token}"}
-        try:
-            user_resp = requests.get(user_info_url, headers=headers, timeout=10)
-            user_resp.raise_for_status()
-            user_json = user_resp.json()
-        except requests.RequestException as e:
-            return Response(
-                {"error": f"카카오 사용자 정보 조회 실패: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        kakao_id = user_json.get("id")
-        # nickname 위치는 카카오 응답 구조에 따라 다를 수 있으므로 안전하게 추출
-        kakao_account = user_json.get("kakao_account", {})
-        profile = kakao_account.get("profile", {}) if isinstance(kakao_account, dict) else {}
-        nickname = profile.get("nickname") or ""
-
-        if not kakao_id:
-            return Response({"error": "카카오 ID를 가져오지 못했습니다.", "detail": user_json},
-                            status=status.HTTP_400_BAD_REQUEST)
+            user_json = fetch_user_info(social_app, callback_url, code)
+            kakao_id, nickname = parse_user_info(user_json)
+        except KakaoLoginError as e:
+            return Response(e.body, status=status.HTTP_400_BAD_REQUEST)
 
         # 사용자 생성 또는 조회
-        username = f"kakao_{kakao_id}"  # 숫자만 있는 username 충돌/문제 방지
-        try:
-            user = User.objects.get(username=username)
-            message = "login success"
-        except User.DoesNotExist:
-            # 필요한 필드에 따라 create_user 호출을 조정하세요 (email 필드가 required면 추가 처리)
-            user = User.objects.create_user(username=username)
-            # 닉네임을 first_name에 넣거나 프로필 모델이 따로 있다면 거기에 저장
-            user.first_name = nickname or ""
-            user.save()
-            message = "register success"
+        user, message = get_or_create_kakao_user(kakao_id, nickname)
 
         # Unity 세션 처리 (state가 있는 경우)
         if state:
-            try:
-                session = KakaoAuthSession.objects.get(state=state)
-                if not session.is_expired:
-                    session.user = user
-                    session.is_completed = True
-                    session.completed_at = timezone.now()
-                    session.save()
-
-                    # Unity용 간단한 성공 페이지 반환
-                    return Response({
-                        "message": "Unity 로그인 완료! 앱으로 돌아가세요.",
-                        "success": True
-                    }, status=status.HTTP_200_OK)
-                else:
-                    session.delete()
-            except KakaoAuthSession.DoesNotExist:
-                pass
+            if get_session_store().complete(state, user):
+                # 롱폴링 중인 Unity 클라이언트 깨우기
+                get_notifier().publish(state)
 
-        # 일반 웹 로그인 처리 (JWT 발급)
-        refresh = RefreshToken.for_user(user)
-        access_token_jwt = str(refresh.access_token)
-        refresh_token_jwt = str(refresh)
-
-        data = {
-            "user": UserSerializer(user).data,
-            "message": message,
-            "token": {"access": access_token_jwt, "refresh": refresh_token_jwt},
-        }
+                # Unity용 간단한 성공 페이지 반환
+                return Response(UNITY_LOGIN_COMPLETED, status=status.HTTP_200_OK)
 
+        # 일반 웹 로그인 처리 (JWT 발급)
+        data, access_token_jwt, refresh_token_jwt = issue_tokens(user, message)
         resp = Response(data, status=status.HTTP_200_OK)
+        return set_token_cookies(resp, access_token_jwt, refresh_token_jwt)
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={"ensure_ascii": False})
+
+
+# 카카오 콜백 async 버전 (ASGI 배포용): 업스트림 호출을 기다리는 동안 워커를 붙잡지 않는다
+@query_budget(KakaoCallbackView.query_budget)
+@require_GET
+async def kakao_callback_async(request):
+    code = request.GET.get("code")
+    state = request.GET.get("state")  # Unity에서 온 경우에만 있음
+
+    if not code:
+        return _json({"error": "code가 없습니다."}, status=400)
+
+    social_app = await aget_kakao_app()
+    if social_app is None:
+        return _json(
+            {"error": "카카오 소셜 앱이 등록되지 않았습니다. Django admin에서 SocialApp을 등록하세요."},
+            status=400
+        )
+
+    callback_url = request.build_absolute_uri('/accounts/kakao/login/callback/')
+    try:
+        user_json = await afetch_user_info(social_app, callback_url, code)
+        kakao_id, nickname = parse_user_info(user_json)
+    except KakaoLoginError as e:
+        return _json(e.body, status=400)
+
+    user, message = await sync_to_async(get_or_create_kakao_user)(kakao_id, nickname)
+
+    if state and await get_session_store().acomplete(state, user):
+        await sync_to_async(get_notifier().publish)(state)
+        return _json(UNITY_LOGIN_COMPLETED)
 
-        # 개발환경에서 https가 아닐 수 있으니 settings.DEBUG 기반으로 secure 옵션 설정
-        secure_cookie = not getattr(settings, "DEBUG", False)
+    data, access_token_jwt, refresh_token_jwt = await sync_to_async(issue_tokens)(user, message)
+    return set_token_cookies(_json(data), access_token_jwt, refresh_token_jwt)
 
-        # 쿠키 저장 (프론트와의 정책에 맞게 name/path/domain/samesite 조정하세요)
-        resp.set_cookie("accessToken", access_token_jwt, httponly=True, secure=secure_cookie, samesite="None")
-        resp.set_cookie("refreshToken", refresh_token_jwt, httponly=True, secure=secure_cookie, samesite="None")
 
-        return resp
+# KAKAO_CALLBACK_ASYNC 설정에 따라 콜백 URL에 연결할 뷰
+kakao_callback = kakao_callback_async if settings.KAKAO_CALLBACK_ASYNC else KakaoCallbackView.as_view()
 
 
 # 로그아웃
 class LogoutView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    query_budget = 5  # 블랙리스트 확인 + outstanding 토큰 get_or_create + 블랙리스트 get_or_create
 
     @swagger_auto_schema(
         operation_description="로그아웃 (JWT 토큰 블랙리스트 처리)",
@@ -385,7 +381,7 @@ class LogoutView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            token = RefreshToken(refresh_token)
+            token = UserClaimsRefreshToken(refresh_token)
             # blacklisting app이 활성화되어 있어야 함 (rest_framework_simplejwt.token_blacklist)
             token.blacklist()
 